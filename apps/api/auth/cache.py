@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class Principal(NamedTuple):
+    """The authenticated user as most handlers need it: no ORM instance, no session."""
+
+    id: int
+    email: str
+
+
+class AuthCache:
+    """
+    Bounded TTL caches for the two halves of authentication:
+
+    - tokens: raw bearer token -> user id, so a token is signature-checked
+      once per TTL rather than once per request. Entries never outlive the
+      token's own `exp`.
+    - principals: user id -> Principal, replacing the users lookup.
+
+    invalidate(user_id) drops the principal and every cached token of that
+    user; the ORM hooks in auth/dependencies.py call it when a user is
+    updated or deleted. Other processes only see the change once their
+    entries expire, so the TTL is the upper bound on staleness.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._tokens = OrderedDict()  # token -> (user_id, valid_until)
+        self._principals = OrderedDict()  # user_id -> (Principal, valid_until)
+        self._user_tokens = {}  # user_id -> set of cached tokens
+        self._lock = threading.Lock()
+        self.token_hits = 0
+        self.token_misses = 0
+        self.principal_hits = 0
+        self.principal_misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _get(self, data: OrderedDict, key):
+        entry = data.get(key)
+        if entry is None:
+            return None
+        value, valid_until = entry
+        if valid_until <= time.monotonic():
+            self._drop(data, key)
+            self.expirations += 1
+            return None
+        data.move_to_end(key)
+        return value
+
+    def _put(self, data: OrderedDict, key, value, valid_until: float):
+        data[key] = (value, valid_until)
+        data.move_to_end(key)
+        while len(data) > self.maxsize:
+            self._drop(data, next(iter(data)))
+            self.evictions += 1
+
+    def _drop(self, data: OrderedDict, key):
+        value, _ = data.pop(key)
+        if data is self._tokens:
+            tokens = self._user_tokens.get(value)
+            if tokens is not None:
+                tokens.discard(key)
+                if not tokens:
+                    del self._user_tokens[value]
+
+    def get_token(self, token: str) -> int | None:
+        with self._lock:
+            user_id = self._get(self._tokens, token)
+            if user_id is None:
+                self.token_misses += 1
+            else:
+                self.token_hits += 1
+            return user_id
+
+    def put_token(self, token: str, user_id: int, exp: float | None = None):
+        """Cache a verified token; `exp` is the token's expiry (unix time)."""
+        ttl = self.ttl if exp is None else min(self.ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if token in self._tokens:
+                self._drop(self._tokens, token)
+            self._put(self._tokens, token, user_id, time.monotonic() + ttl)
+            self._user_tokens.setdefault(user_id, set()).add(token)
+
+    def get_principal(self, user_id: int) -> Principal | None:
+        with self._lock:
+            principal = self._get(self._principals, user_id)
+            if principal is None:
+                self.principal_misses += 1
+            else:
+                self.principal_hits += 1
+            return principal
+
+    def put_principal(self, principal: Principal):
+        with self._lock:
+            self._put(self._principals, principal.id, principal, time.monotonic() + self.ttl)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            dropped = 0
+            if user_id in self._principals:
+                self._drop(self._principals, user_id)
+                dropped += 1
+            for token in list(self._user_tokens.get(user_id, ())):
+                self._drop(self._tokens, token)
+                dropped += 1
+            self.invalidations += dropped
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._principals.clear()
+            self._user_tokens.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            tokens = self.token_hits + self.token_misses
+            principals = self.principal_hits + self.principal_misses
+            return {
+                "ttl_seconds": self.ttl,
+                "maxsize": self.maxsize,
+                "tokens": len(self._tokens),
+                "principals": len(self._principals),
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "token_hit_rate": round(self.token_hits / tokens, 4) if tokens else None,
+                "principal_hits": self.principal_hits,
+                "principal_misses": self.principal_misses,
+                "principal_hit_rate": round(self.principal_hits / principals, 4) if principals else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -1,14 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from apps.api.auth.cache import AuthCache, Principal
 from apps.api.core.settings import settings
+from apps.api.db.async_session import get_async_sessionmaker
 from apps.api.db.session import SessionLocal
 from apps.api.db.models import User
 
 security = HTTPBearer()
 
+_auth_cache = (
+    AuthCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+    if settings.AUTH_CACHE_SIZE > 0 else None
+)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -16,11 +25,16 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+def _token_user_id(creds: HTTPAuthorizationCredentials) -> int:
     token = creds.credentials
+    if _auth_cache is not None:
+        user_id = _auth_cache.get_token(token)
+        if user_id is not None:
+            return user_id
 
     try:
         payload = jwt.decode(
@@ -34,8 +48,84 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    user_id = int(user_id)
+    if _auth_cache is not None:
+        _auth_cache.put_token(token, user_id, payload.get("exp"))
+    return user_id
+
+def _principal_query(user_id: int):
+    return select(User.id, User.email).where(User.id == user_id)
+
+def get_current_principal(
+    creds: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    The caller as a Principal (id, email), for handlers that don't need the
+    ORM User. Served from the auth cache; only a miss touches the database,
+    through the request's own session (get_db is cached per request, and a
+    session only checks out a connection once it is used).
+    """
+    user_id = _token_user_id(creds)
+    principal = _auth_cache.get_principal(user_id) if _auth_cache is not None else None
+    if principal is None:
+        row = db.execute(_principal_query(user_id)).first()
+        if row is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal(row.id, row.email)
+        if _auth_cache is not None:
+            _auth_cache.put_principal(principal)
+    return principal
+
+async def get_current_principal_async(
+    creds: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """get_current_principal with the miss served by the request's async session."""
+    user_id = _token_user_id(creds)
+    principal = _auth_cache.get_principal(user_id) if _auth_cache is not None else None
+    if principal is None:
+        row = (await db.execute(_principal_query(user_id))).first()
+        if row is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal(row.id, row.email)
+        if _auth_cache is not None:
+            _auth_cache.put_principal(principal)
+    return principal
+
+def invalidate_user(user_id: int):
+    """Drop a user's cached principal and tokens (call after out-of-band changes)."""
+    if _auth_cache is not None:
+        _auth_cache.invalidate(user_id)
+
+def auth_cache_stats():
+    return _auth_cache.stats() if _auth_cache is not None else None
+
+
+# Invalidation: any flushed change to a User (password, email) or its
+# deletion drops the cached entries right away and again after commit, so a
+# request racing the transaction can't leave the old row cached. Bulk
+# UPDATE/DELETE statements on users carry no ids, so they clear everything.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_invalidate", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop("auth_invalidate", ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("auth_invalidate", None)
 
-    return user
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_change(state):
+    if _auth_cache is None or not (state.is_update or state.is_delete):
+        return
+    if any(m.class_ is User for m in state.all_mappers):
+        _auth_cache.clear()
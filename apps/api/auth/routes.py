@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from apps.api.db.session import SessionLocal
 from apps.api.db.models import User
 from apps.api.auth.schemas import RegisterIn, LoginIn, TokenOut
-from apps.api.auth.security import hash_password, verify_password, create_access_token
+from apps.api.auth.security import (
+    HashingOverloaded,
+    create_access_token,
+    hash_password_async,
+    verify_and_update_async,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -14,23 +20,52 @@ def get_db():
     finally:
         db.close()
 
+# The handlers are async so a request waiting for the hashing pool holds no
+# threadpool slot; the (short) queries still run in the threadpool.
+
+def _overloaded(e: HashingOverloaded):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
 @router.post("/register")
-def register(payload: RegisterIn, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def register(payload: RegisterIn, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(lambda: db.query(User).filter(User.email == payload.email).first())
     if existing:
         raise HTTPException(status_code=409, detail="Email already registered")
 
-    user = User(email=payload.email, password_hash=hash_password(payload.password))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return {"id": user.id, "email": user.email}
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except HashingOverloaded as e:
+        raise _overloaded(e)
+
+    def create():
+        user = User(email=payload.email, password_hash=password_hash)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return {"id": user.id, "email": user.email}
+
+    return await run_in_threadpool(create)
 
 @router.post("/login", response_model=TokenOut)
-def login(payload: LoginIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+async def login(payload: LoginIn, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == payload.email).first())
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    try:
+        ok, new_hash = await verify_and_update_async(payload.password, user.password_hash)
+    except HashingOverloaded as e:
+        raise _overloaded(e)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if new_hash:
+        # stored with outdated ARGON2_* parameters: upgrade transparently
+        def rehash():
+            user.password_hash = new_hash
+            db.commit()
+
+        await run_in_threadpool(rehash)
+
     token = create_access_token(sub=str(user.id))
     return TokenOut(access_token=token)
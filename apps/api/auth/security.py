@@ -1,13 +1,18 @@
+import asyncio
+import threading
+import time
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from apps.api.core.settings import settings
+from apps.api.core.stats import LatencyHistogram
 
 ph = PasswordHasher(
-    time_cost=2,
-    memory_cost=102400,  # 100 MB
-    parallelism=8,
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_KIB,
+    parallelism=settings.ARGON2_PARALLELISM,
     hash_len=32,
     salt_len=16,
 )
@@ -22,7 +27,97 @@ def verify_password(password: str, password_hash: str) -> bool:
     except VerifyMismatchError:
         return False
 
+def verify_and_update(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """
+    Verify, and if the hash was made with other parameters than the current
+    ARGON2_* settings, also return a fresh hash to store (else None).
+    """
+    if not verify_password(password, password_hash):
+        return False, None
+    if ph.check_needs_rehash(password_hash):
+        return True, ph.hash(password)
+    return True, None
+
 def create_access_token(sub: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_EXPIRES_MIN)
     payload = {"sub": sub, "exp": expire}
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALG)
+
+
+class HashingOverloaded(RuntimeError):
+    """Every hashing worker is busy and the wait queue is full; callers should shed load (503)."""
+
+
+class HashingPool:
+    """
+    Runs Argon2 hash/verify on a fixed number of threads (argon2-cffi
+    releases the GIL), so at most `workers` hashes - and workers x
+    memory_cost of RAM - are in flight however many logins arrive. Up to
+    `max_queue` more calls wait; beyond that submit() raises
+    HashingOverloaded immediately instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency = LatencyHistogram()
+
+    def _call(self, fn, args, queued_at: float):
+        try:
+            return fn(*args)
+        finally:
+            self.latency.observe((time.perf_counter() - queued_at) * 1000)
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded(f"Password hashing saturated ({self.workers} workers, {self.max_queue} queued)")
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(self._call, fn, args, time.perf_counter())
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "latency": self.latency.snapshot(),
+                "params": {
+                    "time_cost": ph.time_cost,
+                    "memory_kib": ph.memory_cost,
+                    "parallelism": ph.parallelism,
+                },
+            }
+
+
+_pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    return await _pool.run(hash_password, password)
+
+async def verify_and_update_async(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return await _pool.run(verify_and_update, password, password_hash)
+
+def hashing_stats():
+    return _pool.stats()
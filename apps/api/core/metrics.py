@@ -0,0 +1,365 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from apps.api.core.stats import LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Prometheus' convention is seconds; LatencyHistogram buckets are in ms
+SECONDS_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _snapshot_values(self) -> dict:
+        with self._lock:
+            return {json.dumps(k): v for k, v in self._values.items()}
+
+    def snapshot(self) -> dict:
+        return {"kind": self.kind, "help": self.help, "labels": self.labels, "values": self._snapshot_values()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), n: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+
+class Gauge(_Metric):
+    """
+    mode "sum" adds the workers' values up (in-flight requests); "all"
+    keeps one series per worker, labelled pid (model version, load time).
+    Either way only live workers count.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels=(), mode: str = "sum"):
+        super().__init__(name, help, labels)
+        self.mode = mode
+
+    def set(self, labels=(), value: float = 0):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels=(), n: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+    def dec(self, labels=(), n: float = 1):
+        self.inc(labels, -n)
+
+    def replace(self, values: dict):
+        """Swap in a whole new set of series (e.g. the one current model version)."""
+        with self._lock:
+            self._values = dict(values)
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "mode": self.mode}
+
+
+class Histogram(_Metric):
+    """LatencyHistogram per label set; `scale` converts observations to the exported unit."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=SECONDS_BUCKETS_MS, scale: float = 1.0):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self.scale = scale
+
+    def observe(self, labels=(), value: float = 0):
+        hist = self._values.get(labels)
+        if hist is None:
+            with self._lock:
+                hist = self._values.setdefault(labels, LatencyHistogram(self.buckets))
+        hist.observe(value)
+
+    def _snapshot_values(self) -> dict:
+        with self._lock:
+            items = list(self._values.items())
+        return {
+            json.dumps(k): {
+                "buckets": [n for _, n in h.cumulative()],
+                "sum": h.sum,
+                "count": h.count,
+            }
+            for k, h in items
+        }
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "bounds": [b * self.scale for b in self.buckets], "scale": self.scale}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def on_collect(self, fn):
+        """fn() runs before every snapshot: for gauges read off current state (e.g. the model version)."""
+        self._collectors.append(fn)
+        return fn
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=(), mode="sum") -> Gauge:
+        return self.register(Gauge(name, help, labels, mode))
+
+    def histogram(self, name, help, labels=(), buckets=SECONDS_BUCKETS_MS, scale=1.0) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets, scale))
+
+    def snapshot(self) -> dict:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception:
+                log.exception("Metrics collector %s failed", getattr(fn, "__name__", fn))
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {"pid": os.getpid(), "time": time.time(), "metrics": {m.name: m.snapshot() for m in metrics}}
+
+
+REGISTRY = Registry()
+
+
+# ---------------------------------------------------------------- multiprocess
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshots(directory: str, own_pid: int) -> list:
+    out = []
+    for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+        try:
+            with open(path) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced right now, or garbage
+        if snap.get("pid") != own_pid:
+            out.append(snap)
+    return out
+
+
+def write_snapshot(directory: str, registry: Registry = REGISTRY):
+    """This process' metrics to <directory>/metrics_<pid>.json (atomically, for concurrent readers)."""
+    pid = os.getpid()
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def merge(snapshots: list, per_pid: bool = False) -> dict:
+    """
+    Combine per-process snapshots: counters and histograms are summed over
+    every process that ever wrote one (dead workers' counts stay, so rates
+    don't dip when uvicorn restarts a worker); gauges over live ones only.
+    """
+    merged = {}
+    for snap in snapshots:
+        pid = snap["pid"]
+        live = None
+        for name, m in snap["metrics"].items():
+            if m["kind"] == "gauge":
+                if live is None:
+                    live = pid == os.getpid() or _alive(pid)
+                if not live:
+                    continue
+            into = merged.setdefault(name, {**m, "values": {}})
+            labels = list(m["labels"])
+            if m["kind"] == "gauge" and m.get("mode") == "all" and per_pid:
+                into["labels"] = labels + ["pid"]
+            for key, v in m["values"].items():
+                if m["kind"] == "gauge" and m.get("mode") == "all" and per_pid:
+                    key = json.dumps(json.loads(key) + [str(pid)])
+                old = into["values"].get(key)
+                if old is None:
+                    into["values"][key] = v
+                elif m["kind"] == "histogram":
+                    into["values"][key] = {
+                        "buckets": [a + b for a, b in zip(old["buckets"], v["buckets"])],
+                        "sum": old["sum"] + v["sum"],
+                        "count": old["count"] + v["count"],
+                    }
+                else:
+                    into["values"][key] = old + v
+    return merged
+
+
+# ---------------------------------------------------------------- exposition
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+def _number(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+def render(metrics: dict) -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for name in sorted(metrics):
+        m = metrics[name]
+        lines.append(f"# HELP {name} {_escape(m['help'])}")
+        lines.append(f"# TYPE {name} {m['kind']}")
+        for key in sorted(m["values"]):
+            values = json.loads(key)
+            v = m["values"][key]
+            if m["kind"] != "histogram":
+                lines.append(f"{name}{_labels(m['labels'], values)} {_number(v)}")
+                continue
+            for bound, n in zip(m["bounds"] + [float("inf")], v["buckets"]):
+                le = "+Inf" if bound == float("inf") else _number(round(bound, 9))
+                lines.append(f"{name}_bucket{_labels(m['labels'], values, [('le', le)])} {n}")
+            lines.append(f"{name}_sum{_labels(m['labels'], values)} {_number(v['sum'] * m['scale'])}")
+            lines.append(f"{name}_count{_labels(m['labels'], values)} {v['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def exposition(registry: Registry = REGISTRY, directory: str = "") -> str:
+    """/metrics body: this process' live metrics, plus the other workers' snapshots in multiprocess mode."""
+    own = registry.snapshot()
+    if not directory:
+        return render(merge([own]))
+    return render(merge([own] + _read_snapshots(directory, own["pid"]), per_pid=True))
+
+
+# ---------------------------------------------------------------- HTTP
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "Requests by method, route template and status", ("method", "route", "status")
+)
+http_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "Request latency by method, route template and status",
+    ("method", "route", "status"), scale=0.001,
+)
+http_in_flight = REGISTRY.gauge("http_requests_in_flight", "Requests being served right now")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task per request). Routes
+    are labelled by template (scope["route"].path, e.g. /quiz/{id}), so
+    label cardinality stays bounded; unmatched paths are "<unmatched>".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500  # raised before a response started
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            http_in_flight.dec()
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "<unmatched>"), str(status))
+            http_requests.inc(labels)
+            http_duration.observe(labels, ms)
+
+
+# ---------------------------------------------------------------- snapshots
+
+class SnapshotWriter:
+    """Writes this worker's snapshot every `interval` seconds, for the other workers' /metrics."""
+
+    def __init__(self, directory: str, interval: float = 5.0, registry: Registry = REGISTRY):
+        self.directory = directory
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        try:
+            write_snapshot(self.directory, self.registry)
+        except OSError:
+            log.exception("Could not write metrics snapshot to %s", self.directory)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.write()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.write()  # final counts; its gauges drop out once the pid is gone
+
+
+_writer = None
+
+
+def start_metrics():
+    global _writer
+    from apps.api.core.settings import settings
+
+    if not settings.METRICS_MULTIPROC_DIR or _writer is not None:
+        return
+    writer = SnapshotWriter(settings.METRICS_MULTIPROC_DIR, settings.METRICS_SNAPSHOT_SECONDS)
+    writer.start()
+    _writer = writer
+
+
+def stop_metrics():
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
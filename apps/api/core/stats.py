@@ -0,0 +1,64 @@
+import bisect
+import threading
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _round(ms: float | None) -> float | None:
+    return None if ms is None else round(ms, 4)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram: O(log buckets) per observation, no samples kept."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        i = bisect.bisect_left(self.buckets, ms)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += ms
+            if ms > self.max:
+                self.max = ms
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Upper bound of the bucket holding the q-quantile, capped at the
+        largest observation (a bound no sample reached is not a latency).
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for i, c in enumerate(self._counts):
+                seen += c
+                if seen >= rank and c:
+                    return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+            return self.max
+
+    def cumulative(self) -> list:
+        """(upper bound, cumulative count) pairs, ending with ("+Inf", count)."""
+        with self._lock:
+            out, seen = [], 0
+            for bound, c in zip(self.buckets + ("+Inf",), self._counts):
+                seen += c
+                out.append((bound, seen))
+            return out
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count, 4) if self.count else None,
+            "p50_ms": _round(self.quantile(0.5)),
+            "p99_ms": _round(self.quantile(0.99)),
+            "max_ms": round(self.max, 4),
+        }
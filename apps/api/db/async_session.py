@@ -0,0 +1,41 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from apps.api.core.settings import settings
+from apps.api.db.instrumentation import InstrumentedAsyncQueuePool, instrument_engine
+
+# Async drivers for the sync URLs we use (pip install asyncpg / aiosqlite)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return u.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Created lazily: the driver is only needed when ASYNC_DB is on
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_sessionmaker():
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        from apps.api.db.session import pool_kwargs
+
+        async_engine = create_async_engine(url, pool_pre_ping=True, **pool_kwargs(url, InstrumentedAsyncQueuePool))
+        if settings.DB_INSTRUMENTATION:
+            instrument_engine(async_engine.sync_engine, "async")
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,165 @@
+import re
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from apps.api.core.stats import LatencyHistogram
+
+# Statement fingerprints kept; anything past this is counted under OTHER so a
+# stream of ad-hoc SQL cannot grow the registry without bound
+MAX_FINGERPRINTS = 500
+OTHER = "<other>"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# bound parameters in any paramstyle (not "::date" casts)
+_PARAM = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalized statement: literals and bound parameters become ?, IN lists
+    collapse to (...), whitespace is squeezed. Cached, since SQLAlchemy
+    reuses the same compiled strings.
+    """
+    s = _STRING.sub("?", statement)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("(...)", s)
+    return _SPACE.sub(" ", s).strip()[:500]
+
+
+class _Timed:
+    """Pool mixin timing how long a checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_ms = LatencyHistogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_ms.observe((time.perf_counter() - t0) * 1000)
+
+    def recreate(self):
+        # keep the metrics across pool.recreate() (e.g. after a disconnect)
+        new = super().recreate()
+        new.wait_ms, new.timeouts = self.wait_ms, self.timeouts
+        return new
+
+
+class InstrumentedQueuePool(_Timed, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_Timed, AsyncAdaptedQueuePool):
+    pass
+
+
+class QueryStats:
+    """Per-fingerprint statement latency, fed by engine cursor events."""
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._hist = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> LatencyHistogram:
+        hist = self._hist.get(key)
+        if hist is None:
+            with self._lock:
+                if key not in self._hist and len(self._hist) >= self.max_fingerprints:
+                    key = OTHER
+                hist = self._hist.setdefault(key, LatencyHistogram())
+        return hist
+
+    def observe(self, statement: str, ms: float):
+        self._get(fingerprint(statement)).observe(ms)
+
+    def error(self, statement: str):
+        key = fingerprint(statement)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def snapshot(self, top: int = 20) -> list:
+        """Statements with the most total time first."""
+        with self._lock:
+            items = list(self._hist.items())
+            errors = dict(self._errors)
+        items.sort(key=lambda kv: kv[1].sum, reverse=True)
+        return [
+            {
+                "statement": key,
+                "total_ms": round(hist.sum, 2),
+                "errors": errors.get(key, 0),
+                **hist.snapshot(),
+            }
+            for key, hist in items[:top]
+        ]
+
+
+_engines = {}
+
+
+def instrument_engine(engine, name: str):
+    """Attach statement timing to `engine` (a sync Engine, or AsyncEngine.sync_engine)."""
+    stats = QueryStats()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = conn.info["query_start"].pop()
+        stats.observe(statement, (time.perf_counter() - t0) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if starts:
+            starts.pop()
+        if ctx.statement:
+            stats.error(ctx.statement)
+
+    _engines[name] = (engine, stats)
+    return stats
+
+
+def pool_stats(pool) -> dict:
+    out = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # QueuePool counts up from -pool_size; > 0 means connections past pool_size
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_s=pool.timeout(),
+        )
+    if isinstance(pool, _Timed):
+        out["checkout_wait_ms"] = pool.wait_ms.snapshot()
+        out["checkout_timeouts"] = pool.timeouts
+    return out
+
+
+def db_stats(top: int = 20) -> dict:
+    return {
+        name: {"pool": pool_stats(engine.pool), "statements": stats.snapshot(top)}
+        for name, (engine, stats) in _engines.items()
+    }
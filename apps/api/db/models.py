@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, func , ForeignKey, Integer, JSON,Column
+from sqlalchemy import BigInteger, Date, String, DateTime, func , ForeignKey, Index, Integer, JSON,Column
 from sqlalchemy.orm import Mapped, mapped_column , relationship
 from apps.api.db.session import Base
 
@@ -44,7 +44,7 @@ class QuizSession(Base):
     mode: Mapped[str] = mapped_column(String(20))  # "ml" or "ai"
     model_version: Mapped[str | None] = mapped_column(String(100))
     created_at: Mapped[DateTime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), index=True
     )
 
     answers = relationship("QuizAnswer", back_populates="session")
@@ -52,11 +52,20 @@ class QuizSession(Base):
 
 class QuizAnswer(Base):
     __tablename__ = "quiz_answers"
+    # drift / export read all answers of a session range: (session_id, feature)
+    # also serves plain session_id lookups and ORDER BY session_id
+    __table_args__ = (
+        Index("ix_quiz_answers_session_id_feature_name", "session_id", "feature_name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("quiz_sessions.id"))
     feature_name: Mapped[str] = mapped_column(String(100))
     feature_value: Mapped[str] = mapped_column(String(100))
+    # same as the session's; partition key when partitioned (migration 0004)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
 
     session = relationship("QuizSession", back_populates="answers")
 
@@ -65,9 +74,42 @@ class Recommendation(Base):
     __tablename__ = "recommendations"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    session_id: Mapped[int] = mapped_column(ForeignKey("quiz_sessions.id"))
+    session_id: Mapped[int] = mapped_column(ForeignKey("quiz_sessions.id"), index=True)
     source: Mapped[str] = mapped_column(String(20))  # "ml" | "ai"
     payload: Mapped[dict] = mapped_column(JSON)
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+
+
+# Hourly answer counts per (feature, category) for /monitoring/drift, kept
+# up to date incrementally by monitoring/drift_counts.py. Pseudo-features:
+# "_sessions" (sessions in the hour) and "predicted_meal".
+class DriftCount(Base):
+    __tablename__ = "drift_counts"
+
+    hour: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    feature_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    feature_value: Mapped[str] = mapped_column(String(100), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+# Daily feedback counts for /monitoring/performance, folded in incrementally
+# from a user_feedback.id high-water mark (monitoring/performance_rollup.py).
+# model_version "" = sessions without one.
+class PerformanceRollup(Base):
+    __tablename__ = "performance_rollups"
+
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(100), primary_key=True)
+    confidence_bucket: Mapped[str] = mapped_column(String(20), primary_key=True)
+    samples: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    accepted: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+# High-water marks of incremental jobs (name -> last source id folded in)
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    high_water: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,60 @@
+import logging
+from datetime import date
+
+from sqlalchemy import text
+
+log = logging.getLogger(__name__)
+
+# Event tables that migration 0004 can range-partition by month on created_at
+# (quiz_sessions stays a plain table: feedback and chat rows reference its id,
+# and Postgres FKs to a partitioned table would need created_at in the key)
+PARTITIONED_TABLES = ("quiz_answers", "recommendations")
+MONTHS_AHEAD = 3
+
+
+def _month(d: date, offset: int = 0) -> date:
+    m = d.year * 12 + d.month - 1 + offset
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def is_partitioned(conn, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t))"),
+        {"t": table},
+    ).scalar()
+
+
+def ensure_partitions(conn, start: date | None = None, months_ahead: int = MONTHS_AHEAD) -> list:
+    """
+    Create monthly partitions <table>_pYYYYMM from `start` (default: this
+    month) through `months_ahead` months from now, for every partitioned
+    event table. Idempotent; returns the partitions it created.
+
+    Rows outside every partition land in <table>_default. Keep partitions
+    created ahead of time (API startup calls this), since a month's
+    partition cannot be added once the default already holds rows for it.
+    """
+    created = []
+    today = date.today()
+    start = _month(start or today)
+    end = _month(today, months_ahead + 1)
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        month = start
+        while month < end:
+            name = f"{table}_p{month:%Y%m}"
+            exists = conn.execute(text("SELECT to_regclass(:n) IS NOT NULL"), {"n": name}).scalar()
+            if not exists:
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+            month = _month(month, 1)
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+    if created:
+        log.info("Created partitions: %s", ", ".join(created))
+    return created
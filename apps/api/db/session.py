@@ -1,7 +1,30 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from apps.api.core.settings import settings
+from apps.api.db.instrumentation import InstrumentedQueuePool, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def pool_kwargs(url: str, poolclass) -> dict:
+    # in-memory SQLite uses a single shared connection, not a QueuePool
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:")):
+        return {}
+    kwargs = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_INSTRUMENTATION:
+        kwargs["poolclass"] = poolclass
+    return kwargs
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    **pool_kwargs(settings.DATABASE_URL, InstrumentedQueuePool),
+)
+if settings.DB_INSTRUMENTATION:
+    instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -0,0 +1,485 @@
+import os
+import glob
+import json
+import fcntl
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from apps.api.core.stats import LatencyHistogram
+from apps.api.db.models import QuizAnswer, QuizSession, Recommendation
+from apps.api.monitoring.drift_counts import add_counts, count_sessions
+
+log = logging.getLogger(__name__)
+
+# The database refused these rows: retrying the same batch can never succeed
+REJECTED = (IntegrityError, DataError)
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they were written in UTC
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+class IdAllocator:
+    """
+    Hands out primary keys before the row exists, so /quiz/submit can return
+    its session id without waiting for the insert.
+
+    On Postgres a block of ids is reserved from the table's own sequence in
+    one round trip, so ids never collide with rows inserted the normal way.
+    Without sequences (SQLite, local dev) ids continue from max(id): only
+    safe with one process, and only if every other insert into the table
+    takes its ids from here too (take()) instead of autoincrement.
+    """
+
+    def __init__(self, engine, table: str, block: int = 1000):
+        self.engine = engine
+        self.table = table
+        self.block = block
+        self._ids = deque()
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        return self.take(1)[0]
+
+    def take(self, n: int) -> list:
+        with self._lock:
+            if len(self._ids) < n:
+                self._ids.extend(self._reserve(max(self.block, n - len(self._ids))))
+            return [self._ids.popleft() for _ in range(n)]
+
+    def _reserve(self, n: int):
+        with self.engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                return conn.execute(
+                    text("SELECT nextval(pg_get_serial_sequence(:t, 'id')) FROM generate_series(1, :n)"),
+                    {"t": self.table, "n": n},
+                ).scalars().all()
+            top = conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {self.table}")).scalar()
+        start = max(top, self._last) + 1
+        self._last = start + n - 1
+        return range(start, start + n)
+
+
+class SpillLog:
+    """
+    Append-only JSON-lines segments for records not yet in the database.
+
+    The owning process holds an flock on each of its segments, so at startup
+    any unlocked segment in the directory was left by a dead process and is
+    replayed. A segment is deleted once every record in it is flushed.
+    Records the database rejects go to dead-letter.jsonl instead.
+    """
+
+    def __init__(self, directory: str, segment_records: int = 10_000, fsync: bool = False):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._current = None
+        # seq -> [file object, path, written, flushed, closed]
+        self._segments = {}
+
+    def _rotate(self):
+        if self._current is not None:
+            self._segments[self._current][4] = True
+            self._maybe_delete(self._current)
+        self._seq += 1
+        path = os.path.join(self.directory, f"segment-{os.getpid()}-{int(time.time() * 1000)}-{self._seq}.jsonl")
+        f = open(path, "ab")
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._segments[self._seq] = [f, path, 0, 0, False]
+        self._current = self._seq
+
+    def append(self, record: dict) -> int:
+        line = (json.dumps(record, default=str) + "\n").encode()
+        with self._lock:
+            if self._current is None or self._segments[self._current][2] >= self.segment_records:
+                self._rotate()
+            seg = self._segments[self._current]
+            seg[0].write(line)
+            seg[0].flush()  # in the OS page cache: survives a process crash
+            if self.fsync:
+                os.fsync(seg[0].fileno())  # ... and a host crash
+            seg[2] += 1
+            return self._current
+
+    def ack(self, seq: int, n: int = 1):
+        with self._lock:
+            self._segments[seq][3] += n
+            self._maybe_delete(seq)
+
+    def _maybe_delete(self, seq: int):
+        f, path, written, flushed, closed = self._segments[seq]
+        if closed and flushed >= written:
+            f.close()
+            os.remove(path)
+            del self._segments[seq]
+
+    def close(self):
+        """Close (and delete, if fully flushed) every segment."""
+        with self._lock:
+            for seq in list(self._segments):
+                self._segments[seq][4] = True
+                self._maybe_delete(seq)
+            for f, *_ in self._segments.values():
+                f.close()  # unflushed segments stay for replay
+            self._segments.clear()
+            self._current = None
+
+    def bytes_pending(self) -> int:
+        with self._lock:
+            return sum(seg[0].tell() for seg in self._segments.values())
+
+    def claim_orphans(self):
+        """
+        Segments no live process holds a lock on, as (path, file) with our
+        lock held: the caller replays, deletes and closes them while other
+        workers starting up skip them. Segments another worker already
+        replayed (gone, or deleted after we opened them) are skipped.
+        """
+        for path in sorted(glob.glob(os.path.join(self.directory, "segment-*.jsonl"))):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                continue
+            if os.fstat(f.fileno()).st_nlink == 0:
+                f.close()
+                continue
+            yield path, f
+
+    def dead_letter(self, record: dict, error: str):
+        """Keep a record the database rejected, for a human to look at; never replayed."""
+        line = (json.dumps({"error": error, "at": time.time(), "record": record}, default=str) + "\n").encode()
+        with open(os.path.join(self.directory, "dead-letter.jsonl"), "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # shared by every worker
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+
+class EventWriter:
+    """
+    Write-behind persistence for /quiz/submit.
+
+    record_quiz() assigns the session id, appends the session + answers +
+    recommendation to the spill log and queues it, then returns at once.
+    A background thread inserts queued records in bulk (one executemany per
+    table, one transaction) every `flush_ms` or `batch_size` records.
+    """
+
+    def __init__(self, engine, spill_dir: str, flush_ms: float = 200, batch_size: int = 500,
+                 max_queue: int = 50_000, id_block: int = 1000, fsync: bool = False, drift_counts: bool = True):
+        self.engine = engine
+        self.drift_counts = drift_counts
+        self.flush_interval = flush_ms / 1000
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.ids = IdAllocator(engine, QuizSession.__tablename__, id_block)
+        self.spill = SpillLog(spill_dir, fsync=fsync)
+        self._queue = deque()
+        self._pending = set()  # session ids queued or being flushed
+        self._dead = set()  # session ids dead-lettered: never going to be in the database
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self.flush_ms = LatencyHistogram()
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.last_error = None
+
+    def start(self):
+        self.replay()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is queued and stop; anything left stays in the spill log."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.spill.close()
+
+    def record_quiz(self, user_id: int, model_version: str, answers: dict, prediction: dict) -> int | None:
+        """Session id of the queued record, or None if the queue is full (write it synchronously)."""
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                return None
+
+        session_id = self.ids.next()
+        record = {
+            "session": {
+                "id": session_id,
+                "user_id": user_id,
+                "mode": "ml",
+                "model_version": model_version,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+            "answers": answers,
+            "recommendation": {"source": "ml", "payload": prediction},
+        }
+        seq = self.spill.append(record)
+        with self._cond:
+            self._queue.append((seq, record))
+            self._pending.add(session_id)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return session_id
+
+    def wait_flushed(self, session_id: int, timeout: float = 5.0) -> bool:
+        """
+        Block until a queued session is out of the queue (e.g. before
+        inserting feedback for it). False on timeout. Sessions queued by
+        another worker are not pending here and return True at once; a
+        dead-lettered one returns True too, see is_dead_lettered().
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while session_id in self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.notify_all()  # flush now rather than at the next tick
+                self._cond.wait(remaining)
+            return True
+
+    def is_dead_lettered(self, session_id: int) -> bool:
+        """The session was rejected by the database and will never be stored (by this worker)."""
+        with self._cond:
+            return session_id in self._dead
+
+    def _take(self) -> list:
+        with self._cond:
+            if len(self._queue) < self.batch_size and not self._stop:
+                self._cond.wait(self.flush_interval)
+            n = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self):
+        delay = self.flush_interval
+        while True:
+            batch = self._take()
+            if not batch:
+                if self._stop:
+                    return
+                continue
+            batch, error = self._write(batch)
+            if not batch:
+                delay = self.flush_interval
+                continue
+
+            # connection / operational trouble: leave the rest queued (and in
+            # the spill log) and retry with backoff
+            self.failures += 1
+            self.last_error = str(error)
+            log.error("Write-behind flush of %d records failed", len(batch), exc_info=error)
+            with self._cond:
+                self._queue.extendleft(reversed(batch))
+                if self._stop:
+                    return
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _write(self, items: list):
+        """
+        Insert (seq, record) items. A batch the database rejects
+        (IntegrityError / DataError) is bisected, so the good records still
+        go in and each bad one is dead-lettered on its own; a rejected
+        record that is already there (a commit we never heard back from)
+        counts as written. Returns (items not written, error) when
+        any other error stops it; those are safe to retry.
+        """
+        stack = [items]
+        while stack:
+            part = stack.pop()
+            try:
+                try:
+                    self._insert([record for _, record in part])
+                except REJECTED as e:
+                    if len(part) > 1:
+                        mid = len(part) // 2
+                        stack += [part[mid:], part[:mid]]
+                        continue
+                    if not self._stored([part[0][1]]):
+                        self._dead_letter(part[0], e)
+                        continue
+            except Exception as e:
+                rest = [item for p in [part] + stack[::-1] for item in p]
+                return rest, e
+            self._done(part)
+        return [], None
+
+    def _stored(self, records: list) -> set:
+        """
+        Session ids of `records` already in the database as these very
+        records: same id, user and created_at. A row that merely has the
+        id belongs to someone else, and the record is not written.
+        """
+        want = {
+            r["session"]["id"]: (r["session"]["user_id"], _utc(datetime.fromisoformat(r["session"]["created_at"])))
+            for r in records
+        }
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(QuizSession.id, QuizSession.user_id, QuizSession.created_at)
+                .where(QuizSession.id.in_(list(want)))
+            )
+            return {sid for sid, user_id, created_at in rows if want[sid] == (user_id, _utc(created_at))}
+
+    def _dead_letter(self, item, error: Exception):
+        seq, record = item
+        sid = record["session"]["id"]
+        log.error("Write-behind session %s rejected by the database, dead-lettered: %s", sid, error)
+        self.spill.dead_letter(record, str(error))
+        self.dead_lettered += 1
+        with self._cond:
+            self._dead.add(sid)
+        self._done([item])
+
+    def _done(self, items: list):
+        for seq, _ in items:
+            if seq is not None:  # replayed records have no live segment
+                self.spill.ack(seq)
+        with self._cond:
+            self._pending.difference_update(record["session"]["id"] for _, record in items)
+            self._cond.notify_all()
+
+    def _insert(self, records: list):
+        t0 = time.perf_counter()
+        sessions = [
+            {**r["session"], "created_at": datetime.fromisoformat(r["session"]["created_at"])}
+            for r in records
+        ]
+        answers = [
+            {"session_id": r["session"]["id"], "feature_name": k, "feature_value": v, "created_at": s["created_at"]}
+            for r, s in zip(records, sessions)
+            for k, v in r["answers"].items()
+        ]
+        recommendations = [
+            {"session_id": r["session"]["id"], "created_at": s["created_at"], **r["recommendation"]}
+            for r, s in zip(records, sessions)
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(insert(QuizSession), sessions)
+            if answers:
+                conn.execute(insert(QuizAnswer), answers)
+            conn.execute(insert(Recommendation), recommendations)
+            if self.drift_counts:
+                # same transaction as the rows: replays after a crash count exactly once
+                add_counts(conn, count_sessions(
+                    (s["created_at"], r["answers"], r["recommendation"]["payload"].get("recommended_meal"))
+                    for r, s in zip(records, sessions)
+                ))
+
+        self.flush_ms.observe((time.perf_counter() - t0) * 1000)
+        self.flushed += len(records)
+        self.batches += 1
+
+    def replay(self):
+        """
+        Insert records from segments left by a crashed process, skipping ones
+        already written. A segment that cannot be written now (database
+        down) is left for the next start rather than failing this one.
+        """
+        for path, f in self.spill.claim_orphans():
+            try:
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # torn last line from the crash: never acknowledged to a client
+                for start in range(0, len(records), self.batch_size):
+                    chunk = records[start:start + self.batch_size]
+                    done = self._stored(chunk)
+                    todo = [(None, r) for r in chunk if r["session"]["id"] not in done]
+                    rest, error = self._write(todo)
+                    self.replayed += len(todo) - len(rest)
+                    if rest:
+                        raise error
+                os.remove(path)  # still under our lock: nobody else replays it
+                log.info("Replayed %s (%d records)", os.path.basename(path), len(records))
+            except Exception:
+                log.exception("Could not replay %s; leaving it for the next start", os.path.basename(path))
+            finally:
+                f.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth, pending = len(self._queue), len(self._pending)
+        return {
+            "queue_depth": depth,
+            "pending_sessions": pending,
+            "max_queue": self.max_queue,
+            "spill_bytes": self.spill.bytes_pending(),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+            "flush_ms": self.flush_ms.snapshot(),
+        }
+
+
+_writer = None
+
+
+def get_writer() -> EventWriter | None:
+    """The running writer, or None when WRITE_BEHIND is off."""
+    return _writer
+
+
+def start_writer():
+    global _writer
+    from apps.api.core.settings import settings
+    from apps.api.db.session import engine
+
+    if not settings.WRITE_BEHIND or _writer is not None:
+        return
+    writer = EventWriter(
+        engine,
+        settings.WRITE_BEHIND_DIR,
+        flush_ms=settings.WRITE_BEHIND_FLUSH_MS,
+        batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+        max_queue=settings.WRITE_BEHIND_MAX_QUEUE,
+        id_block=settings.WRITE_BEHIND_ID_BLOCK,
+        fsync=settings.WRITE_BEHIND_FSYNC,
+        drift_counts=settings.DRIFT_COUNTS_FLUSH_SECONDS > 0,
+    )
+    writer.start()
+    _writer = writer
+
+
+def stop_writer():
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def writer_stats():
+    return _writer.stats() if _writer is not None else None
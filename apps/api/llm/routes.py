@@ -3,10 +3,9 @@ import json
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from apps.api.auth.dependencies import get_current_user, get_db
-from apps.api.db.models import User, ChatRecommendation
-
-from openai import OpenAI
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal, get_db
+from apps.api.db.models import ChatRecommendation
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
@@ -28,7 +27,7 @@ OUTPUT_SCHEMA = {
 @router.post("/recommend")
 def llm_recommend(
     payload: dict,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     api_key = os.getenv("OPENAI_API_KEY")
@@ -38,6 +37,8 @@ def llm_recommend(
             detail="OPENAI_API_KEY is not set in environment",
         )
 
+    from openai import OpenAI
+
     client = OpenAI(api_key=api_key)
 
     user_text = str(payload.get("message", "")).strip()
@@ -1,31 +1,91 @@
 from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse, Response
 from apps.api.db.session import Base, engine
 from apps.api.db import models  # noqa
 from apps.api.auth.routes import router as auth_router
-from apps.api.auth.dependencies import get_current_user
-from apps.api.db.models import User
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal, get_current_principal_async
+from apps.api.core.metrics import CONTENT_TYPE, MetricsMiddleware, exposition, start_metrics, stop_metrics
+from apps.api.core.settings import settings
+from apps.api.db.async_session import dispose_async_engine, get_async_sessionmaker
+from apps.api.db.partitions import ensure_partitions
+from apps.api.db.write_behind import start_writer, stop_writer
+from apps.api.monitoring.drift_counts import start_counter, stop_counter
+from apps.api.monitoring.performance_rollup import start_rollup_job, stop_rollup_job
 from apps.api.quiz.routes import router as quiz_router
+from apps.api.quiz.async_routes import router as quiz_async_router
+from apps.api.meals.routes import router as meals_router
 from apps.api.monitoring.routes import router as monitoring_router
 from apps.api.monitoring.performance_routes import router as performance_router
 from apps.api.llm.routes import router as llm_router
+from apps.api.ml.recommender import readiness, start_refresher, start_warm_up, stop_refresher
 
 app = FastAPI(title="What To Eat API")
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    if settings.DB_AUTO_CREATE:
+        Base.metadata.create_all(bind=engine)
+    if settings.ASYNC_DB:
+        # imports the async driver: a missing one (image built without
+        # ASYNC_DB=1, see requirements-async.txt) fails here, not on a request
+        get_async_sessionmaker()
+    if engine.dialect.name == "postgresql":
+        # next months' partitions for partitioned event tables (no-op otherwise)
+        with engine.begin() as conn:
+            ensure_partitions(conn)
+    start_metrics()
+    start_writer()  # replays spill segments left by a crashed process first
+    start_counter()
+    start_rollup_job()
+    start_warm_up()
+    start_refresher()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    stop_refresher()
+    stop_writer()
+    stop_counter()  # flushes what is still counted in memory
+    stop_rollup_job()
+    stop_metrics()
+    await dispose_async_engine()
 
 app.include_router(auth_router)
+if settings.ASYNC_DB:
+    # registered first, so the async /quiz/submit and /quiz/feedback win
+    app.include_router(quiz_async_router)
 app.include_router(quiz_router)
+app.include_router(meals_router)
 app.include_router(monitoring_router)
 app.include_router(performance_router)
 app.include_router(llm_router)
 
 
-@app.get("/me")
-def me(user: User = Depends(get_current_user)):
-    return {"id": user.id, "email": user.email}
+if settings.ASYNC_DB:
+    @app.get("/me")
+    async def me(user: Principal = Depends(get_current_principal_async)):
+        return {"id": user.id, "email": user.email}
+else:
+    @app.get("/me")
+    def me(user: Principal = Depends(get_current_principal)):
+        return {"id": user.id, "email": user.email}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        # unauthenticated like /health: scraped by Prometheus from inside the cluster
+        return Response(exposition(directory=settings.METRICS_MULTIPROC_DIR), media_type=CONTENT_TYPE)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    # Readiness (not liveness): with EAGER_MODEL_LOAD=1 this stays 503 until
+    # the model is loaded and warmed, so Kubernetes holds traffic back.
+    info = readiness()
+    status_code = 200 if info.pop("ready") else 503
+    return JSONResponse(status_code=status_code, content={"status": "ready" if status_code == 200 else "loading", **info})
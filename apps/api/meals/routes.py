@@ -0,0 +1,87 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal
+from apps.api.ml.similar import catalog_version, filter_meals, similar_meals
+
+router = APIRouter(prefix="/meals", tags=["meals"])
+
+# Upper bound on names per /meals/similar request
+MAX_BATCH_SIZE = int(os.getenv("MEALS_MAX_BATCH_SIZE", "500"))
+MAX_SEARCH_LIMIT = 500
+
+
+def nutrition_bounds(
+    min_calories: float | None = None,
+    max_calories: float | None = None,
+    min_proteins: float | None = None,
+    max_proteins: float | None = None,
+    min_carbs: float | None = None,
+    max_carbs: float | None = None,
+    min_fats: float | None = None,
+    max_fats: float | None = None,
+) -> dict:
+    """Optional inclusive nutrition filters, e.g. ?max_calories=600&min_proteins=30."""
+    bounds = {
+        "Calories": (min_calories, max_calories),
+        "Proteins": (min_proteins, max_proteins),
+        "Carbs": (min_carbs, max_carbs),
+        "Fats": (min_fats, max_fats),
+    }
+    return {f: b for f, b in bounds.items() if b != (None, None)}
+
+
+def _catalog_call(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Meal catalog unavailable: {str(e)}")
+
+
+@router.get("/search")
+def search(
+    limit: int = 50,
+    offset: int = 0,
+    bounds: dict = Depends(nutrition_bounds),
+    user: Principal = Depends(get_current_principal),
+):
+    """Meals within the nutrition filters (range index, no full scan)."""
+    limit = max(0, min(limit, MAX_SEARCH_LIMIT))
+    total, meals = _catalog_call(filter_meals, bounds, limit, max(offset, 0))
+    return {"catalog_version": catalog_version(), "total": total, "meals": meals}
+
+
+@router.get("/{name}/similar")
+def similar(
+    name: str,
+    top_n: int = 5,
+    bounds: dict = Depends(nutrition_bounds),
+    user: Principal = Depends(get_current_principal),
+):
+    """Meals most similar to `name` by nutrition profile (cosine), optionally filtered."""
+    result = _catalog_call(similar_meals, [name], top_n, bounds)[0]
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Meal not found: {name}")
+    return {"meal": name, "catalog_version": catalog_version(), "similar": result}
+
+
+@router.post("/similar")
+def similar_batch(
+    names: list[str],
+    top_n: int = 5,
+    bounds: dict = Depends(nutrition_bounds),
+    user: Principal = Depends(get_current_principal),
+):
+    """
+    Batch variant: one lookup pass for many names.
+    Unknown names get "similar": null instead of failing the batch.
+    """
+    if len(names) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} names per request")
+
+    results = _catalog_call(similar_meals, names, top_n, bounds) if names else []
+    return {
+        "catalog_version": catalog_version(),
+        "results": [{"meal": n, "similar": r} for n, r in zip(names, results)],
+    }
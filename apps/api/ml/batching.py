@@ -0,0 +1,97 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceOverloaded(RuntimeError):
+    """The dispatcher queue is full; callers should shed load (503)."""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into one call of `fn`.
+
+    Each caller submits one payload and blocks on its own future. A single
+    worker thread takes the first waiting payload, keeps collecting more for
+    up to `max_wait_ms` or until `max_batch` payloads, then calls
+    fn(payloads) -> results (same length, same order) and hands each caller
+    its result.
+    """
+
+    def __init__(self, fn, max_batch: int = 64, max_wait_ms: float = 2.0, max_queue: int = 1024, name: str = "micro-batcher"):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, payload, timeout: float | None = None):
+        self._ensure_started()
+        fut = Future()
+        try:
+            self._queue.put_nowait((payload, fut))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise InferenceOverloaded(f"Inference queue full ({self._queue.maxsize} waiting)")
+        return fut.result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+            try:
+                results = self.fn([payload for payload, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+                "largest_batch": self.largest_batch,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+from apps.api.ml.lookup import FEATURES
+
+
+def canonical_key(features: dict) -> tuple:
+    """Answers in question order, so dict ordering and value types don't matter."""
+    return tuple(str(features.get(f)) for f in FEATURES)
+
+
+class PredictionCache:
+    """
+    Bounded LRU of class-probability rows keyed by (model version, answers).
+    A new model version never sees another version's entries, and retain()
+    drops versions that are no longer served (called on swap/eviction).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, version: str, key: tuple):
+        with self._lock:
+            value = self._data.get((version, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end((version, key))
+            self.hits += 1
+            return value
+
+    def put(self, version: str, key: tuple, value):
+        with self._lock:
+            self._data[(version, key)] = value
+            self._data.move_to_end((version, key))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def retain(self, versions):
+        versions = set(versions)
+        with self._lock:
+            stale = [k for k in self._data if k[0] not in versions]
+            for k in stale:
+                del self._data[k]
+            self.invalidations += len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_versions": sorted({version for version, _ in self._data}),
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
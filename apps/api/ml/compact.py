@@ -0,0 +1,73 @@
+import json
+import os
+
+import numpy as np
+
+# Compact classifier artifact: the OneHotEncoder + LogisticRegression pipeline
+# folded into one weight row per (feature, category). Scoring an answer set is
+# a gather of ten rows plus the intercept, then a softmax -- NumPy only.
+WEIGHTS_FILE = "weights.npz"
+VOCAB_FILE = "vocab.json"
+FORMAT_VERSION = 1
+
+
+class CompactScorer:
+    def __init__(self, features, categories: dict, classes, weights: np.ndarray, intercept: np.ndarray):
+        self.features = list(features)
+        self.categories = {f: list(categories[f]) for f in self.features}
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.weights = weights
+        self.intercept = intercept
+
+        # weights has one extra all-zero row at the end: unknown categories
+        # contribute nothing, same as handle_unknown="ignore"
+        self._unknown = weights.shape[0] - 1
+        self._index = []
+        offset = 0
+        for f in self.features:
+            cats = self.categories[f]
+            self._index.append({c: offset + i for i, c in enumerate(cats)})
+            offset += len(cats)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(os.path.join(path, VOCAB_FILE)) as f:
+            vocab = json.load(f)
+        if vocab.get("format") != FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported compact model format: {vocab.get('format')}")
+
+        with np.load(os.path.join(path, WEIGHTS_FILE)) as arrays:
+            weights = arrays["weights"]
+            intercept = arrays["intercept"]
+
+        return cls(vocab["features"], vocab["categories"], vocab["classes"], weights, intercept)
+
+    @property
+    def nbytes(self) -> int:
+        return self.weights.nbytes + self.intercept.nbytes
+
+    def encode(self, X) -> np.ndarray:
+        """
+        Row ids into the weight table, shape (n_samples, n_features).
+        X is a list of answer dicts, or columns (dict / DataFrame) keyed by feature.
+        """
+        if isinstance(X, (list, tuple)):
+            rows = [[index.get(str(r.get(f)), self._unknown) for f, index in zip(self.features, self._index)] for r in X]
+            return np.asarray(rows, dtype=np.intp).reshape(len(rows), len(self.features))
+
+        cols = [[index.get(str(v), self._unknown) for v in X[f]] for f, index in zip(self.features, self._index)]
+        return np.asarray(cols, dtype=np.intp).T
+
+    def decision_function(self, X) -> np.ndarray:
+        ids = self.encode(X)
+        return self.weights[ids].sum(axis=1) + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        z = self.decision_function(X)
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        z /= z.sum(axis=1, keepdims=True)
+        return z
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.decision_function(X).argmax(axis=1)]
@@ -0,0 +1,85 @@
+import numpy as np
+
+from apps.api.ml.compact import CompactScorer
+from apps.api.quiz.questions import QUESTIONS
+
+# The quiz answer space is finite (4*3*4*2*2*5*3*3*3*3 = 77,760 combinations),
+# so a loaded classifier can be scored once over every combination and served
+# from a dense table indexed by a mixed-radix code of the answers.
+FEATURES = [q["id"] for q in QUESTIONS]
+OPTIONS = [[o["value"] for o in q["options"]] for q in QUESTIONS]
+RADIX = [len(opts) for opts in OPTIONS]
+SPACE_SIZE = int(np.prod(RADIX))
+
+_OPTION_INDEX = [{v: i for i, v in enumerate(opts)} for opts in OPTIONS]
+
+
+def encode(features: dict) -> int:
+    """
+    Mixed-radix code of an answer set (first question most significant).
+    Raises KeyError for answers outside the quiz options.
+    """
+    code = 0
+    for name, index, radix in zip(FEATURES, _OPTION_INDEX, RADIX):
+        code = code * radix + index[features[name]]
+    return code
+
+
+def all_answers() -> dict:
+    """Every answer combination as columns, row i being the answers with code i."""
+    grid = np.indices(RADIX).reshape(len(RADIX), -1)
+    return {
+        name: np.asarray(opts, dtype=object)[grid[i]]
+        for i, (name, opts) in enumerate(zip(FEATURES, OPTIONS))
+    }
+
+
+class LookupTable:
+    def __init__(self, classes, proba: np.ndarray, labels: np.ndarray):
+        self.classes = [str(c) for c in classes]
+        self.proba = proba
+        self.labels = labels
+
+    @classmethod
+    def build(cls, model):
+        X = all_answers()
+        if not isinstance(model, CompactScorer):
+            # pandas is only needed to feed the sklearn pipeline at build time
+            import pandas as pd
+
+            X = pd.DataFrame(X)
+
+        proba = model.predict_proba(X)
+        # argmax on the float64 scores so labels match model.predict exactly
+        labels = proba.argmax(axis=1).astype(np.uint8)
+        return cls(model.classes_, proba.astype(np.float32), labels)
+
+    @property
+    def nbytes(self) -> int:
+        return self.proba.nbytes + self.labels.nbytes
+
+    def lookup(self, features: dict):
+        code = encode(features)
+        return self.classes[self.labels[code]], self.proba[code]
+
+    def predict(self, features: dict) -> str:
+        return self.lookup(features)[0]
+
+
+def check_consistency(table: LookupTable, model) -> dict:
+    """Compare the table against the live pipeline over the whole answer space."""
+    import pandas as pd
+
+    X = pd.DataFrame(all_answers())
+    preds = model.predict(X)
+    proba = model.predict_proba(X)
+
+    table_preds = np.asarray(table.classes, dtype=object)[table.labels]
+    mismatches = int((table_preds != preds.astype(str)).sum())
+
+    return {
+        "rows": SPACE_SIZE,
+        "label_mismatches": mismatches,
+        "max_abs_proba_diff": float(np.abs(table.proba - proba).max()),
+        "consistent": mismatches == 0,
+    }
@@ -0,0 +1,148 @@
+import os
+import json
+import numpy as np
+
+from apps.api.ml.meal_index import MealIndex
+
+# Loader for the compact meal catalog artifact written by
+# mlops/meal_catalog.py (training code, not in the API image); see there for
+# the file layout. Must stay in sync with mlops/meal_catalog.py and
+# mlops/range_index.py. The .npy files are memory-mapped: every worker
+# process on the host shares one copy of the pages.
+FEATURES = ["Calories", "Proteins", "Carbs", "Fats"]
+VECTORS_FILE = "vectors.npy"
+FEATURES_FILE = "features.npy"
+META_FILE = "meta.json"
+RANGE_ORDER_FILE = "range_order.npy"
+RANGE_VALUES_FILE = "range_values.npy"
+FORMAT_VERSION = 1
+
+# If even the most selective bound matches more than this fraction of the
+# catalog, a sequential scan of the columns beats gathering the candidates
+SCAN_FRACTION = 0.05
+
+
+class RangeIndex:
+    """
+    Sorted per-attribute index for nutrition range filters: per feature the
+    row ids sorted by value plus the sorted values, so one bound pair is two
+    binary searches.
+    """
+
+    def __init__(self, features: list, order: np.ndarray, values: np.ndarray):
+        self.features = list(features)
+        self.col = {f: j for j, f in enumerate(self.features)}
+        # (n_features, n_rows): order[j] = row ids sorted by feature j,
+        # values[j] = that feature's values in the same order
+        self.order = order
+        self.values = values
+
+    @classmethod
+    def build(cls, features: list, X: np.ndarray):
+        # catalogs saved before the range index files
+        X = np.asarray(X, dtype=np.float32)
+        index_dtype = np.int32 if len(X) < 2**31 else np.int64
+        order = np.argsort(X, axis=0, kind="stable").T.astype(index_dtype)
+        values = np.take_along_axis(X, order.T.astype(np.intp), axis=0).T
+        return cls(features, np.ascontiguousarray(order), np.ascontiguousarray(values))
+
+    def __len__(self):
+        return self.order.shape[1]
+
+    def span(self, feature: str, lo=None, hi=None):
+        """[start, stop) positions in order[feature] with lo <= value <= hi."""
+        vals = self.values[self.col[feature]]
+        start = 0 if lo is None else int(np.searchsorted(vals, lo, side="left"))
+        stop = len(vals) if hi is None else int(np.searchsorted(vals, hi, side="right"))
+        return start, max(start, stop)
+
+    def query(self, X: np.ndarray, bounds: dict) -> np.ndarray:
+        """
+        Sorted row ids matching every {feature: (lo, hi)} bound (inclusive,
+        None = open). X is the raw feature matrix the index was built from,
+        used to check the secondary bounds on the candidate rows.
+        """
+        bounds = {f: b for f, b in bounds.items() if b != (None, None)}
+        for f in bounds:
+            if f not in self.col:
+                raise KeyError(f"Unknown feature: {f}")
+        if not bounds:
+            return np.arange(len(self), dtype=np.intp)
+
+        spans = {f: self.span(f, *b) for f, b in bounds.items()}
+        first = min(spans, key=lambda f: spans[f][1] - spans[f][0])
+        start, stop = spans[first]
+        if stop - start > SCAN_FRACTION * len(self):
+            return self._scan(X, bounds)
+        # ascending row ids: the gathers below then walk X front to back
+        rows = np.sort(self.order[self.col[first], start:stop]).astype(np.intp)
+
+        for f, (lo, hi) in bounds.items():
+            if f == first or len(rows) == 0:
+                continue
+            v = X[rows, self.col[f]]
+            keep = np.ones(len(rows), dtype=bool)
+            if lo is not None:
+                keep &= v >= lo
+            if hi is not None:
+                keep &= v <= hi
+            rows = rows[keep]
+        return rows
+
+    def _scan(self, X: np.ndarray, bounds: dict) -> np.ndarray:
+        keep = np.ones(len(X), dtype=bool)
+        for f, (lo, hi) in bounds.items():
+            v = X[:, self.col[f]]
+            if lo is not None:
+                keep &= v >= lo
+            if hi is not None:
+                keep &= v <= hi
+        return np.flatnonzero(keep)
+
+
+class MealCatalog:
+    def __init__(self, index: MealIndex, features: np.ndarray, columns: dict, mean, scale, ranges=None):
+        self.index = index
+        self.features = features
+        self.ranges = ranges if ranges is not None else RangeIndex.build(FEATURES, features)
+        self.columns = columns
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.index)
+
+    def filter(self, bounds: dict) -> np.ndarray:
+        """Row ids within {feature: (lo, hi)} nutrition bounds (inclusive, None = open)."""
+        return self.ranges.query(self.features, bounds)
+
+    def records(self, rows) -> list:
+        """Client-facing fields for the given row ids."""
+        out = []
+        for r in rows:
+            rec = {c: values[r] for c, values in self.columns.items()}
+            rec.update(zip(FEATURES, (float(v) for v in self.features[r])))
+            out.append(rec)
+        return out
+
+
+def load_catalog(path: str, mmap: bool = True) -> MealCatalog:
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        raise RuntimeError(f"Unsupported meal catalog format: {meta.get('format')}")
+
+    mode = "r" if mmap else None
+    vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode=mode)
+    features = np.load(os.path.join(path, FEATURES_FILE), mmap_mode=mode)
+
+    ranges = None
+    if os.path.exists(os.path.join(path, RANGE_ORDER_FILE)):
+        ranges = RangeIndex(
+            meta["features"],
+            np.load(os.path.join(path, RANGE_ORDER_FILE), mmap_mode=mode),
+            np.load(os.path.join(path, RANGE_VALUES_FILE), mmap_mode=mode),
+        )
+
+    index = MealIndex(meta["columns"]["meal_name"], vectors)
+    return MealCatalog(index, features, meta["columns"], meta["scaler_mean"], meta["scaler_scale"], ranges)
@@ -0,0 +1,133 @@
+import numpy as np
+
+# Search side of the meal similarity indexes, for serving: the artifacts are
+# built by mlops/meal_index.py and mlops/ann_index.py (training code, not in
+# the API image). Must stay in sync with those two.
+
+# Cap on the (queries x meals) similarity block computed at once (~128 MB float32)
+MAX_BLOCK = 32_000_000
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over unit vectors
+    (mlops/ann_index.py builds it): a query only scores the rows in its
+    `n_probe` closest cells.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets  # cell c holds rows[offsets[c]:offsets[c + 1]]
+        self.rows = rows
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as f:
+            return cls(f["centroids"], f["offsets"], f["rows"])
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        n_probe = min(max(n_probe, 1), self.n_lists)
+        cell_scores = self.centroids @ query
+        cells = np.argpartition(-cell_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+
+    def search(self, unit: np.ndarray, queries, k: int, n_probe: int, exclude_self: bool = False):
+        """
+        Approximate top-k rows of `unit` for each row id in `queries`,
+        best first (skipping the query row itself with exclude_self).
+        """
+        out_idx, out_scores = [], []
+        for q in queries:
+            cand = self.candidates(unit[q], n_probe)
+            if exclude_self:
+                cand = cand[cand != q]
+            sims = unit[cand] @ unit[q]
+            kk = min(k, len(cand))
+            if kk > 0:
+                top = np.argpartition(-sims, kk - 1)[:kk]
+                top = top[np.argsort(-sims[top], kind="stable")]
+            else:
+                top = np.empty(0, dtype=np.intp)
+            out_idx.append(cand[top])
+            out_scores.append(sims[top])
+        return out_idx, out_scores
+
+
+class MealIndex:
+    """
+    Exact cosine-similarity index over the catalog's unit-length vectors: a
+    query is one matrix-vector product plus an argpartition top-k.
+    """
+
+    def __init__(self, names, unit: np.ndarray):
+        self.names = list(names)
+        # unit-length rows (possibly a read-only memory map)
+        self.unit = unit
+
+        # first occurrence wins, matching a pandas lookup on a duplicated name
+        self.row_of = {}
+        for i, name in enumerate(self.names):
+            self.row_of.setdefault(name, i)
+
+        # optional approximate index for large catalogs
+        self.ann = None
+        self.n_probe = 8
+
+    def __len__(self):
+        return len(self.names)
+
+    def top_k(self, sims: np.ndarray, k: int, exclude: np.ndarray | None = None):
+        """Indices and scores of the k best columns per row of sims, best first."""
+        if exclude is not None:
+            sims[np.arange(len(sims)), exclude] = -np.inf
+        k = min(k, sims.shape[1] - (exclude is not None))
+        if k <= 0:
+            return np.empty((len(sims), 0), dtype=np.intp), np.empty((len(sims), 0), dtype=sims.dtype)
+
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+    def similar_rows(self, rows, top_n: int, exact: bool = False, candidates=None):
+        """
+        Top-n neighbours (excluding the row itself) for each row id,
+        optionally only among the `candidates` row ids (e.g. a range filter).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        top_n = max(int(top_n), 0)
+        if candidates is not None:
+            return self._similar_among(rows, top_n, np.asarray(candidates, dtype=np.intp))
+        if self.ann is not None and not exact:
+            return self.ann.search(self.unit, rows, top_n, self.n_probe, exclude_self=True)
+
+        idx = np.empty((len(rows), min(top_n, max(len(self) - 1, 0))), dtype=np.intp)
+        scores = np.empty(idx.shape, dtype=np.float32)
+
+        step = max(1, MAX_BLOCK // max(len(self), 1))
+        for start in range(0, len(rows), step):
+            block = rows[start:start + step]
+            sims = self.unit[block] @ self.unit.T
+            idx[start:start + step], scores[start:start + step] = self.top_k(sims, top_n, exclude=block)
+        return idx, scores
+
+    def _similar_among(self, rows, top_n: int, candidates: np.ndarray):
+        # exact search over the gathered candidate vectors only; the ANN cells
+        # don't help once a filter has already narrowed the set
+        cand_unit = self.unit[candidates]
+        out_idx, out_scores = [], []
+        step = max(1, MAX_BLOCK // max(len(candidates), 1))
+        for start in range(0, len(rows), step):
+            block = rows[start:start + step]
+            sims = self.unit[block] @ cand_unit.T
+            sims[block[:, None] == candidates[None, :]] = -np.inf
+            idx, scores = self.top_k(sims, top_n)
+            for i, s in zip(idx, scores):
+                keep = s > -np.inf
+                out_idx.append(candidates[i[keep]])
+                out_scores.append(s[keep])
+        return out_idx, out_scores
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+LATEST = "latest"
+
+
+def parse_traffic(spec: str) -> list:
+    """
+    "latest=0.9,<run_id>=0.1" -> [("latest", 0.9), ("<run_id>", 0.1)].
+    Shares are normalized; an empty spec sends everything to the latest run.
+    """
+    split = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        version, _, share = part.partition("=")
+        split.append((version.strip(), float(share or 1)))
+
+    total = sum(share for _, share in split)
+    if total <= 0:
+        return [(LATEST, 1.0)]
+    return [(version, share / total) for version, share in split]
+
+
+def sticky_bucket(user_id, salt: str) -> float:
+    """Stable position in [0, 1) for a user; change the salt to reshuffle."""
+    digest = hashlib.sha1(f"{salt}:{user_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def route(split: list, user_id, salt: str) -> str:
+    x = sticky_bucket(user_id, salt)
+    acc = 0.0
+    for version, share in split:
+        acc += share
+        if x < acc:
+            return version
+    return split[-1][0]
+
+
+class ModelPool:
+    """
+    Resident models by run_id, bounded by count and by (approximate) bytes,
+    evicting the least recently used. Evicted runs reload from the local
+    artifact cache on their next request.
+    """
+
+    def __init__(self, loader, max_models: int, max_bytes: int, on_evict=None):
+        self.loader = loader
+        self.on_evict = on_evict
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, run_id: str):
+        with self._lock:
+            state = self._models.get(run_id)
+            if state is not None:
+                self._models.move_to_end(run_id)
+                return state
+            # one loader per run_id; concurrent callers wait for it
+            event = self._loading.get(run_id)
+            owner = event is None
+            if owner:
+                event = self._loading[run_id] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                state = self._models.get(run_id)
+            return state if state is not None else self.get(run_id)
+
+        try:
+            state = self.loader(run_id)
+            with self._lock:
+                self._models[run_id] = state
+                self.loads += 1
+                evicted = self._evict()
+            if evicted and self.on_evict:
+                self.on_evict(evicted)
+            return state
+        finally:
+            with self._lock:
+                self._loading.pop(run_id).set()
+
+    def _evict(self) -> list:
+        # keep at least the most recently used model, even if it is oversized
+        evicted = []
+        while len(self._models) > 1 and (
+            len(self._models) > self.max_models or self._bytes() > self.max_bytes
+        ):
+            evicted.append(self._models.popitem(last=False)[0])
+            self.evictions += 1
+        return evicted
+
+    def versions(self) -> list:
+        with self._lock:
+            return list(self._models)
+
+    def _bytes(self) -> int:
+        return sum(s.nbytes for s in self._models.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resident": {
+                    run_id: {"bytes": s.nbytes, "loaded_at": s.loaded_at}
+                    for run_id, s in self._models.items()
+                },
+                "bytes": self._bytes(),
+                "max_bytes": self.max_bytes,
+                "max_models": self.max_models,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
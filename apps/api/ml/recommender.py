@@ -1,69 +1,508 @@
 import os
+import shutil
+import logging
 import tempfile
-import joblib
-import pandas as pd
-import mlflow
-from mlflow.tracking import MlflowClient
+import threading
+import time
+import numpy as np
 
-MODEL_NAME = os.getenv("MODEL_NAME", "meal_similarity_recommender")  # keep name if you want
+from apps.api.ml.batching import MicroBatcher
+from apps.api.ml.cache import PredictionCache, canonical_key
+from apps.api.ml.compact import CompactScorer
+from apps.api.ml.lookup import LookupTable
+from apps.api.ml.pool import LATEST, ModelPool, parse_traffic, route
+from apps.api.core.metrics import REGISTRY, SIZE_BUCKETS
+from apps.api.core.stats import DEFAULT_BUCKETS_MS, LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+MODEL_NAME = os.getenv("MODEL_NAME", "meal_similarity_recommender")  # similarity model, see ml/similar.py
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 EXPERIMENT = os.getenv("MLFLOW_EXPERIMENT", "what_to_eat_classifier")
+# Score the whole quiz answer space once at load time and serve from a table
+COMPILED_MODEL = os.getenv("COMPILED_MODEL", "0") == "1"
+# "sklearn": joblib pipeline (needs sklearn/pandas), "compact": NumPy-only scorer
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "sklearn")
+# Downloaded artifacts live here as <run_id>/<artifact path>; point replicas
+# at a shared volume so only the first one hits the artifact store
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "what_to_eat_models"))
+# Poll MLflow for a newer run every N seconds (0 disables the refresher)
+MODEL_REFRESH_SECONDS = float(os.getenv("MODEL_REFRESH_SECONDS", "0"))
+
+# LRU of per-answer-set probabilities, scoped to the model version (0 disables).
+# Not consulted when the compiled lookup table is on: that is already O(1).
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+# Coalesce concurrent small predictions into one predict_proba call
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "0") == "1"
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "64"))
+INFERENCE_BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "2"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "1024"))
+# Canary / A-B serving: "latest=0.9,<run_id>=0.1" (empty = all traffic to latest).
+# Users are assigned sticky by hash(salt, user_id); change the salt to reshuffle.
+MODEL_TRAFFIC = os.getenv("MODEL_TRAFFIC", "")
+MODEL_TRAFFIC_SALT = os.getenv("MODEL_TRAFFIC_SALT", "v1")
+MODEL_POOL_MAX_MODELS = int(os.getenv("MODEL_POOL_MAX_MODELS", "4"))
+MODEL_POOL_MAX_MB = float(os.getenv("MODEL_POOL_MAX_MB", "512"))
+# Load and warm the model at startup instead of on the first request
+EAGER_MODEL_LOAD = os.getenv("EAGER_MODEL_LOAD", "0") == "1"
+
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client():
+    # mlflow is a heavy import; only pay for it when we actually talk to MLflow
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import mlflow
+                from mlflow.tracking import MlflowClient
+
+                mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+                _client = MlflowClient()
+    return _client
+
+
+class LoadedModel:
+    """Everything a prediction needs, swapped as one object on reload."""
 
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    def __init__(self, model, run_id: str, table=None, load_seconds: float = 0.0, nbytes: int = 0):
+        self.model = model
+        self.run_id = run_id
+        self.version = run_id
+        self.table = table
+        self.load_seconds = load_seconds
+        # approximate resident size: artifact size on disk + lookup table
+        self.nbytes = nbytes + (table.nbytes if table is not None else 0)
+        self.loaded_at = time.time()
 
-_client = MlflowClient()
-_model = None
-_model_version = "unloaded"
-_model_run_id = None
 
-def _best_latest_run_id():
+# Readers take one reference to _state and use only that, so a concurrent
+# reload can never pair one run's model with another run's table or version.
+_state = None
+_load_lock = threading.Lock()
+_refresher = None
+_stop_refresher = threading.Event()
+_warm_up = {"seconds": None, "error": None}
+_cache = PredictionCache(PREDICTION_CACHE_SIZE) if PREDICTION_CACHE_SIZE > 0 else None
+_traffic = parse_traffic(MODEL_TRAFFIC) if MODEL_TRAFFIC else None
+_pool_failures = {}  # run_id -> monotonic time before which we don't retry
+_latency = {}  # model version -> LatencyHistogram
+_latency_lock = threading.Lock()
+POOL_RETRY_SECONDS = 60
+
+_inference_seconds = REGISTRY.histogram(
+    "model_inference_duration_seconds", "predict_meals latency by model version (cache / table hits included)",
+    ("version",), buckets=DEFAULT_BUCKETS_MS, scale=0.001,
+)
+# "request": answer sets per predict_meals call; "coalesced": rows per micro-batched predict_proba
+_batch_size = REGISTRY.histogram(
+    "model_inference_batch_size", "Answer sets scored per call", ("kind",), buckets=SIZE_BUCKETS,
+)
+_model_info = REGISTRY.gauge("model_info", "Model version being served as latest (value 1)", ("version",), mode="all")
+_model_load_seconds = REGISTRY.gauge(
+    "model_load_duration_seconds", "Load (and lookup table build) time of the served model", ("version",), mode="all",
+)
+_model_loads = REGISTRY.counter("model_loads_total", "Model loads, latest and pooled canary versions", ("result",))
+
+def _drop_unserved(evicted=None):
+    if _cache is not None:
+        _cache.retain(_served_versions())
+
+_pool = ModelPool(
+    lambda run_id: _load_run(run_id),
+    max_models=MODEL_POOL_MAX_MODELS,
+    max_bytes=int(MODEL_POOL_MAX_MB * 1024 * 1024),
+    on_evict=_drop_unserved,
+)
+
+def _served_versions() -> set:
+    versions = set(_pool.versions())
+    if _state is not None:
+        versions.add(_state.version)
+    return versions
+
+def _default_artifact_path() -> str:
+    return "compact" if MODEL_FORMAT == "compact" else "model/model.joblib"
+
+def _artifact_path(run) -> str | None:
+    if MODEL_FORMAT == "compact":
+        return run.data.tags.get("compact_artifact")
+    if run.data.tags.get("model_artifact") == "model/model.joblib":
+        return "model/model.joblib"
+    return None
+
+def _latest_run():
     # Find the newest FINISHED run that has our artifact tag
-    exp = _client.get_experiment_by_name(EXPERIMENT)
+    exp = _get_client().get_experiment_by_name(EXPERIMENT)
     if not exp:
         raise RuntimeError(f"MLflow experiment not found: {EXPERIMENT}. Train job must run first.")
 
-    runs = _client.search_runs(
+    runs = _get_client().search_runs(
         experiment_ids=[exp.experiment_id],
         filter_string="attributes.status = 'FINISHED'",
         order_by=["attributes.start_time DESC"],
         max_results=20,
     )
     for r in runs:
-        if r.data.tags.get("model_artifact") == "model/model.joblib":
-            return r.info.run_id
-
-    raise RuntimeError("No successful trained model found (FINISHED run with model/model.joblib).")
+        path = _artifact_path(r)
+        if path:
+            return r.info.run_id, path
 
-def _load_model_from_mlflow():
-    global _model, _model_version, _model_run_id
+    raise RuntimeError(f"No successful trained model found (FINISHED run with {MODEL_FORMAT} artifact).")
 
-    run_id = _best_latest_run_id()
-    _model_run_id = run_id
+def _cached_artifact(run_id: str, artifact_path: str, kind: str | None = None) -> str:
+    run_dir = os.path.join(MODEL_CACHE_DIR, kind or MODEL_FORMAT, run_id)
+    local_path = os.path.join(run_dir, artifact_path)
+    if os.path.exists(local_path):
+        return local_path
 
     # Download artifact from MLflow artifact store (MinIO)
     # Requires boto3 inside this API container and S3 env vars in deployment.
-    with tempfile.TemporaryDirectory() as td:
-        local_path = _client.download_artifacts(run_id, "model/model.joblib", dst_path=td)
-        _model = joblib.load(local_path)
+    # Download next to the final location and rename into place, so other
+    # processes sharing the cache never see a partial download.
+    os.makedirs(os.path.dirname(run_dir), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(run_dir), prefix=".download-")
+    try:
+        _get_client().download_artifacts(run_id, artifact_path, dst_path=staging)
+        try:
+            os.rename(staging, run_dir)
+        except OSError:
+            # another process finished the same download first
+            if not os.path.exists(local_path):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return local_path
+
+def _newest_cached_run():
+    root = os.path.join(MODEL_CACHE_DIR, MODEL_FORMAT)
+    if not os.path.isdir(root):
+        return None
+    runs = [
+        os.path.join(root, d) for d in os.listdir(root)
+        if not d.startswith(".")
+    ]
+    if not runs:
+        return None
+    return os.path.basename(max(runs, key=os.path.getmtime))
+
+def _disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(d, f))
+        for d, _, files in os.walk(path)
+        for f in files
+    )
+
+def _load(run_id: str, local_path: str) -> LoadedModel:
+    t0 = time.perf_counter()
+    try:
+        if MODEL_FORMAT == "compact":
+            model = CompactScorer.load(local_path)
+        else:
+            import joblib
+
+            model = joblib.load(local_path)
+    except Exception:
+        _model_loads.inc(("error",))
+        raise
+    _model_loads.inc(("ok",))
+
+    table = LookupTable.build(model) if COMPILED_MODEL else None
+    return LoadedModel(model, run_id, table, time.perf_counter() - t0, _disk_size(local_path))
+
+def _load_run(run_id: str) -> LoadedModel:
+    """Load a specific run, from the local cache when it is already there."""
+    local_path = os.path.join(MODEL_CACHE_DIR, MODEL_FORMAT, run_id, _default_artifact_path())
+    if not os.path.exists(local_path):
+        artifact_path = _artifact_path(_get_client().get_run(run_id))
+        if not artifact_path:
+            raise RuntimeError(f"Run {run_id} has no {MODEL_FORMAT} model artifact")
+        local_path = _cached_artifact(run_id, artifact_path)
+    return _load(run_id, local_path)
+
+def _load_latest() -> LoadedModel:
+    try:
+        run_id, artifact_path = _latest_run()
+    except Exception:
+        # MLflow unreachable: fall back to the newest run already on disk
+        run_id = _newest_cached_run()
+        if run_id is None:
+            raise
+        log.warning("MLflow unavailable, loading cached model run %s", run_id)
+        return _load_run(run_id)
+
+    return _load(run_id, _cached_artifact(run_id, artifact_path))
+
+def _get_state() -> LoadedModel:
+    global _state
+    state = _state
+    if state is None:
+        with _load_lock:
+            if _state is None:
+                _state = _load_latest()
+            state = _state
+    return state
+
+def refresh_model() -> bool:
+    """
+    Load the newest run if it differs from the one being served.
+    Download and load happen before the swap, off the request path.
+    """
+    global _state
+    run_id, artifact_path = _latest_run()
+    current = _state
+    if current is not None and current.run_id == run_id:
+        return False
+
+    new_state = _load(run_id, _cached_artifact(run_id, artifact_path))
+    with _load_lock:
+        _state = new_state
+    _drop_unserved()
+
+    log.info("Model swapped: %s -> %s", current.run_id if current else None, run_id)
+    return True
+
+def _refresh_loop():
+    while not _stop_refresher.wait(MODEL_REFRESH_SECONDS):
+        try:
+            refresh_model()
+        except Exception:
+            log.exception("Model refresh failed; keeping current model")
+
+def start_refresher():
+    global _refresher
+    if MODEL_REFRESH_SECONDS <= 0 or _refresher is not None:
+        return
+    _stop_refresher.clear()
+    _refresher = threading.Thread(target=_refresh_loop, name="model-refresher", daemon=True)
+    _refresher.start()
 
-    _model_version = run_id
+def stop_refresher():
+    global _refresher
+    _stop_refresher.set()
+    _refresher = None
+
+def is_loaded() -> bool:
+    return _state is not None
+
+def warm_up() -> LoadedModel:
+    """Load the model and run one dummy prediction so the first user doesn't pay for it."""
+    from apps.api.ml.lookup import FEATURES, OPTIONS
+
+    t0 = time.perf_counter()
+    state = _get_state()
+    predict_meal({f: opts[0] for f, opts in zip(FEATURES, OPTIONS)}, state=state)
+    # preload canary versions too, so their first users don't wait
+    for version, _ in _traffic or []:
+        if version not in (LATEST, state.run_id):
+            try:
+                _pool.get(version)
+            except Exception:
+                log.exception("Could not preload model %s", version)
+    _warm_up["seconds"] = time.perf_counter() - t0
+    _warm_up["error"] = None
+    return state
+
+def _warm_up_loop():
+    delay = 1.0
+    while not _stop_refresher.is_set():
+        try:
+            state = warm_up()
+            log.info("Model %s warm in %.2fs", state.version, _warm_up["seconds"])
+            return
+        except Exception as e:
+            _warm_up["error"] = str(e)
+            log.exception("Model warm-up failed; retrying in %.0fs", delay)
+        if _stop_refresher.wait(delay):
+            return
+        delay = min(delay * 2, 60.0)
+
+def start_warm_up():
+    """Warm up in the background, retrying until a model loads; /ready reports progress."""
+    if not EAGER_MODEL_LOAD:
+        return
+    threading.Thread(target=_warm_up_loop, name="model-warm-up", daemon=True).start()
+
+def readiness() -> dict:
+    state = _state
+    if state is None:
+        return {
+            "ready": not EAGER_MODEL_LOAD,
+            "model_version": "unloaded",
+            "error": _warm_up["error"],
+        }
+    return {
+        "ready": True,
+        "model_version": state.version,
+        "load_seconds": round(state.load_seconds, 4),
+        "warm_up_seconds": None if _warm_up["seconds"] is None else round(_warm_up["seconds"], 4),
+        "loaded_at": state.loaded_at,
+    }
+
+def current_model(user_id=None) -> LoadedModel:
+    """
+    Snapshot of the model serving this user; pass it on so one request uses
+    one version. Without MODEL_TRAFFIC (or a user) that is the latest run.
+    """
+    latest = _get_state()
+    if _traffic is None or user_id is None:
+        return latest
+
+    version = route(_traffic, user_id, MODEL_TRAFFIC_SALT)
+    if version in (LATEST, latest.run_id):
+        return latest
+
+    if _pool_failures.get(version, 0) > time.monotonic():
+        return latest
+    try:
+        return _pool.get(version)
+    except Exception:
+        log.exception("Model %s unavailable; serving latest instead", version)
+        _pool_failures[version] = time.monotonic() + POOL_RETRY_SECONDS
+        return latest
+
+def models_stats() -> dict:
+    with _latency_lock:
+        latency = {v: h.snapshot() for v, h in _latency.items()}
+    state = _state
+    return {
+        "latest": state.version if state else None,
+        "latest_bytes": state.nbytes if state else None,
+        "traffic": dict(_traffic) if _traffic else {LATEST: 1.0},
+        "pool": _pool.stats(),
+        "latency_ms": latency,
+    }
+
+def _observe_latency(version: str, ms: float):
+    hist = _latency.get(version)
+    if hist is None:
+        with _latency_lock:
+            hist = _latency.setdefault(version, LatencyHistogram())
+    hist.observe(ms)
+    _inference_seconds.observe((version,), ms)
+
+@REGISTRY.on_collect
+def _collect_model_metrics():
+    state = _state
+    _model_info.replace({(state.version,): 1} if state else {})
+    _model_load_seconds.replace({(state.version,): round(state.load_seconds, 6)} if state else {})
 
 def get_model():
-    global _model
-    if _model is None:
-        _load_model_from_mlflow()
-    return _model, _model_version
+    state = _get_state()
+    return state.model, state.version
 
 def get_model_version():
     _, v = get_model()
     return v
 
-def predict_meal(features: dict, top_k: int = 3):
-    model, _ = get_model()
-    df = pd.DataFrame([features])
-    pred = model.predict(df)[0]
+def _model_input(model, rows: list):
+    # The compact scorer takes answer dicts directly; sklearn wants a DataFrame
+    if isinstance(model, CompactScorer):
+        return rows
+    import pandas as pd
 
+    return pd.DataFrame(rows)
+
+def predict_proba(rows: list, state: LoadedModel | None = None):
+    """Class probabilities for many answer sets in one vectorized call."""
+    state = state or _get_state()
+    model = state.model
+    classes = [str(c) for c in model.classes_]
+
+    proba = np.empty((len(rows), len(classes)))
+    pending = list(range(len(rows)))
+    keys = None
+    if state.table is not None:
+        pending = []
+        for i, features in enumerate(rows):
+            try:
+                proba[i] = state.table.lookup(features)[1]
+            except KeyError:
+                # answer outside the quiz options: let the model handle it
+                pending.append(i)
+    elif _cache is not None:
+        pending = []
+        keys = [canonical_key(features) for features in rows]
+        for i, key in enumerate(keys):
+            hit = _cache.get(state.version, key)
+            if hit is None:
+                pending.append(i)
+            else:
+                proba[i] = hit
+
+    if pending:
+        proba[pending] = _score(state, [rows[i] for i in pending])
+        if keys is not None:
+            for i in pending:
+                _cache.put(state.version, keys[i], proba[i].copy())
+
+    return classes, proba
+
+def _score_direct(state: LoadedModel, rows: list) -> np.ndarray:
+    return state.model.predict_proba(_model_input(state.model, rows))
+
+def _score_batch(payloads: list) -> list:
+    # One predict_proba per model version present in the batch (normally one)
+    groups = {}
+    for i, (state, rows) in enumerate(payloads):
+        groups.setdefault(id(state), (state, []))[1].append(i)
+
+    results = [None] * len(payloads)
+    for state, members in groups.values():
+        rows = [row for i in members for row in payloads[i][1]]
+        _batch_size.observe(("coalesced",), len(rows))
+        proba = _score_direct(state, rows)
+        start = 0
+        for i in members:
+            n = len(payloads[i][1])
+            results[i] = proba[start:start + n]
+            start += n
+    return results
+
+_batcher = (
+    MicroBatcher(
+        _score_batch,
+        max_batch=INFERENCE_BATCH_MAX_SIZE,
+        max_wait_ms=INFERENCE_BATCH_MAX_WAIT_MS,
+        max_queue=INFERENCE_QUEUE_DEPTH,
+        name="inference-batcher",
+    )
+    if INFERENCE_BATCHING
+    else None
+)
+
+def _score(state: LoadedModel, rows: list) -> np.ndarray:
+    # Requests that are already batches go straight to the model
+    if _batcher is None or len(rows) >= INFERENCE_BATCH_MAX_SIZE:
+        return _score_direct(state, rows)
+    return _batcher.submit((state, rows))
+
+def batching_stats():
+    return _batcher.stats() if _batcher is not None else None
+
+def cache_stats():
+    return _cache.stats() if _cache is not None else None
+
+def _result(classes, p, top_k: int):
+    order = np.argsort(-p, kind="stable")[:max(top_k, 1)]
     return {
-        "recommended_meal": str(pred),
-        "top_k": int(top_k),
+        "recommended_meal": classes[order[0]],
+        "top_k": [{"meal": classes[i], "prob": round(float(p[i]), 4)} for i in order],
     }
+
+def predict_meals(rows: list, top_k: int = 3, state: LoadedModel | None = None):
+    if not rows:
+        return []
+    state = state or _get_state()
+    _batch_size.observe(("request",), len(rows))
+    t0 = time.perf_counter()
+    classes, proba = predict_proba(rows, state)
+    _observe_latency(state.version, (time.perf_counter() - t0) * 1000)
+    return [_result(classes, p, top_k) for p in proba]
+
+def predict_meal(features: dict, top_k: int = 3, state: LoadedModel | None = None):
+    return predict_meals([features], top_k, state)[0]
@@ -0,0 +1,124 @@
+import os
+import logging
+import threading
+import time
+
+from apps.api.ml.recommender import MODEL_NAME, _cached_artifact, _get_client
+
+log = logging.getLogger(__name__)
+
+# Serve the meal similarity recommender (mlops/train_recommender.py) in-process:
+# its catalog artifact is loaded once into a MealIndex, so a query is one
+# matrix-vector product instead of an mlflow.pyfunc round trip.
+#
+# Local catalog directory (e.g. artifacts/meal_catalog); when unset the newest
+# registered version of MODEL_NAME is downloaded from MLflow.
+MEAL_CATALOG_DIR = os.getenv("MEAL_CATALOG_DIR", "")
+SIMILAR_MAX_N = int(os.getenv("SIMILAR_MAX_N", "50"))
+# After a failed load, don't retry (and block requests on MLflow) for this long
+CATALOG_RETRY_SECONDS = 60
+# pyfunc.log_model copies artifacts under <artifact_path>/artifacts/<basename>
+ARTIFACTS_PATH = "model/artifacts"
+
+_catalog = None
+_catalog_version = None
+_catalog_lock = threading.Lock()
+_catalog_error = {"message": None, "retry_at": 0.0}
+
+
+def _latest_version():
+    versions = _get_client().search_model_versions(f"name='{MODEL_NAME}'")
+    if not versions:
+        raise RuntimeError(f"No registered versions of {MODEL_NAME}. Run mlops/train_recommender.py first.")
+    return max(versions, key=lambda v: int(v.version)).run_id
+
+
+def _load():
+    from apps.api.ml.meal_catalog import load_catalog
+    from apps.api.ml.meal_index import IVFIndex
+
+    if MEAL_CATALOG_DIR:
+        version, path = "local", MEAL_CATALOG_DIR
+    else:
+        version = _latest_version()
+        path = _cached_artifact(version, ARTIFACTS_PATH, kind="recommender")
+
+    if os.path.isdir(os.path.join(path, "meal_catalog")):
+        catalog_dir = os.path.join(path, "meal_catalog")
+    else:
+        catalog_dir = path
+    if not os.path.exists(os.path.join(catalog_dir, "meta.json")):
+        raise RuntimeError(f"No meal catalog in {path} (models logged before the catalog artifact need retraining)")
+
+    t0 = time.perf_counter()
+    catalog = load_catalog(catalog_dir)
+    ann_path = os.path.join(path, "ann_index.npz")
+    if os.path.exists(ann_path):
+        catalog.index.ann = IVFIndex.load(ann_path)
+        catalog.index.n_probe = int(os.getenv("ANN_PROBES", "8"))
+    # classifier labels and user input don't always match the catalog's casing
+    catalog.lower_rows = {name.lower(): row for name, row in catalog.index.row_of.items()}
+    log.info("Meal catalog %s loaded: %d meals in %.3fs", version, len(catalog), time.perf_counter() - t0)
+    return version, catalog
+
+
+def get_catalog():
+    global _catalog, _catalog_version
+    catalog = _catalog
+    if catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                if _catalog_error["retry_at"] > time.monotonic():
+                    raise RuntimeError(f"Meal catalog unavailable: {_catalog_error['message']}")
+                try:
+                    _catalog_version, _catalog = _load()
+                except Exception as e:
+                    _catalog_error["message"] = str(e)
+                    _catalog_error["retry_at"] = time.monotonic() + CATALOG_RETRY_SECONDS
+                    raise
+            catalog = _catalog
+    return catalog
+
+
+def catalog_version():
+    return _catalog_version
+
+
+def filter_meals(bounds: dict, limit: int = 50, offset: int = 0):
+    """(total matches, records) for meals within {feature: (lo, hi)} bounds."""
+    catalog = get_catalog()
+    rows = catalog.filter(bounds)
+    return len(rows), catalog.records(rows[offset:offset + limit])
+
+
+def similar_meals(names: list, top_n: int = 5, bounds: dict | None = None) -> list:
+    """
+    Top-N similar meals for each name, as catalog records with a "score";
+    None for names that are not in the catalog. With nutrition `bounds`,
+    only meals inside them are considered.
+    """
+    catalog = get_catalog()
+    candidates = catalog.filter(bounds) if bounds else None
+    top_n = max(1, min(top_n, SIMILAR_MAX_N))
+    rows = [
+        catalog.index.row_of.get(name, catalog.lower_rows.get(str(name).lower()))
+        for name in names
+    ]
+    found = [r for r in rows if r is not None]
+    if not found:
+        return [None] * len(names)
+
+    idx, scores = catalog.index.similar_rows(found, top_n, candidates=candidates)
+    hits = iter(zip(idx, scores))
+    out = []
+    for r in rows:
+        if r is None:
+            out.append(None)
+            continue
+        ids, sims = next(hits)
+        records = catalog.records(ids)
+        for rec, s in zip(records, sims):
+            rec["score"] = round(float(s), 4)
+        out.append(records)
+    return out
+
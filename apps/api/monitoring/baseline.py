@@ -1,12 +1,80 @@
-import pandas as pd
+import json
+import logging
+import os
+import threading
+import time
 
-BASELINE_PATH = "data/synth_meals.csv"
+log = logging.getLogger(__name__)
+
+# Used for models whose run has no baseline artifact (older runs, the local
+# joblib): category counts of the same training split train_classifier.py fits
+# on (its "data" field says which rows), regenerate with
+# `python mlops/export_baseline.py`. Must stay in sync with mlops/export_baseline.py.
+FALLBACK_BASELINE_PATH = os.getenv("FALLBACK_BASELINE_PATH", "data/baseline_frequencies.json")
+BASELINE_ARTIFACT_PATH = "baseline/frequencies.json"
+FORMAT_VERSION = 1
+BASELINE_RETRY_SECONDS = 60
 
 FEATURES = [
     "meal_time","spicy","diet","gluten_free","dairy_free",
     "cuisine","budget","prep_time","protein_pref","health_goal"
 ]
 
-def load_baseline():
-    df = pd.read_csv(BASELINE_PATH)
-    return {f: df[f] for f in FEATURES}
+_baselines = {}  # model version -> (baseline dict, source)
+_failures = {}  # model version -> monotonic time before which we don't retry the artifact
+_lock = threading.Lock()
+
+
+def _read(path: str) -> dict:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported baseline format in {path}: {baseline.get('format')}")
+    return baseline
+
+
+def _fetch_run_baseline(run_id: str) -> dict | None:
+    from apps.api.ml.recommender import _cached_artifact, _get_client
+
+    path = _get_client().get_run(run_id).data.tags.get("baseline_artifact")
+    if not path:
+        return None
+    return _read(_cached_artifact(run_id, path, kind="baseline"))
+
+
+def load_baseline(model_version: str | None = None) -> tuple[dict, str]:
+    """
+    Baseline category counts for `model_version` (an MLflow run id) as
+    ({"rows": n, "features": {feature: {category: count}}}, source).
+    Read once per version and kept in memory; source is "run" when it
+    came from the run's own artifact and "fallback" otherwise.
+    """
+    key = model_version or ""
+    cached = _baselines.get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        cached = _baselines.get(key)
+        if cached is not None:
+            return cached
+
+        baseline = None
+        if model_version and _failures.get(key, 0) <= time.monotonic():
+            try:
+                baseline = _fetch_run_baseline(model_version)
+            except Exception:
+                log.exception("Baseline artifact for %s unavailable; using fallback", model_version)
+                _failures[key] = time.monotonic() + BASELINE_RETRY_SECONDS
+
+        if baseline is not None:
+            cached = (baseline, "run")
+            _baselines[key] = cached
+        else:
+            # not cached under the version while the artifact might still appear
+            cached = _baselines.get("") or (_read(FALLBACK_BASELINE_PATH), "fallback")
+            _baselines[""] = cached
+            if model_version and key not in _failures:
+                # run has no baseline artifact at all: that won't change
+                _baselines[key] = cached
+        return cached
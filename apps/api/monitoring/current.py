@@ -1,34 +1,89 @@
-import pandas as pd
-from sqlalchemy import text
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
 
+from apps.api.db.models import QuizAnswer, QuizSession, Recommendation
+from apps.api.monitoring.drift_counts import HOUR, PREDICTED, hour_of
+
 FEATURES = [
     "meal_time","spicy","diet","gluten_free","dairy_free",
     "cuisine","budget","prep_time","protein_pref","health_goal"
 ]
 
+CURRENT_QUERY = """
+    SELECT session_id, feature_name, feature_value
+    FROM quiz_answers
+    ORDER BY session_id DESC
+    LIMIT :limit
+"""
+
 def load_current(db: Session, limit: int = 500):
-    query = text("""
-        SELECT session_id, feature_name, feature_value
-        FROM quiz_answers
-        ORDER BY session_id DESC
-        LIMIT :limit
-    """)
-
-    rows = db.execute(query, {"limit": limit}).fetchall()
+    """Category counts per feature over the latest `limit` answer rows (None if there are none)."""
+    rows = db.execute(text(CURRENT_QUERY), {"limit": limit}).fetchall()
     if not rows:
         return None
 
-    df = pd.DataFrame(rows, columns=["session_id","feature","value"])
+    counts = {}
+    for _, feature, value in rows:
+        if feature in FEATURES:
+            per_feature = counts.setdefault(feature, {})
+            per_feature[value] = per_feature.get(value, 0) + 1
+    return counts
+
+def _window(hours: int | None, sessions: int | None, now: datetime | None):
+    """(sessions, answers, recommendations) predicates selecting a window's sessions."""
+    if sessions is not None:
+        # ids at or above the N-th newest: a range scan on the session_id indexes
+        latest = select(QuizSession.id).order_by(QuizSession.id.desc()).limit(sessions).subquery()
+        lowest = select(func.min(latest.c.id)).scalar_subquery()
+        return QuizSession.id >= lowest, QuizAnswer.session_id >= lowest, Recommendation.session_id >= lowest
+    if hours is None:
+        raise ValueError("window_counts_sql needs hours or sessions")
 
-    pivot = (
-        df.pivot_table(
-            index="session_id",
-            columns="feature",
-            values="value",
-            aggfunc="first"
-        )
-        .reset_index(drop=True)
+    start = hour_of(now or datetime.now(timezone.utc)) - (hours - 1) * HOUR
+    ids = select(QuizSession.id).where(QuizSession.created_at >= start)
+    return (
+        QuizSession.created_at >= start,
+        # the session ids pick the answers; created_at only lets a partitioned
+        # quiz_answers (migration 0004) prune old months. It can be the database
+        # clock rather than the app's, hence the hour of slack
+        QuizAnswer.session_id.in_(ids) & (QuizAnswer.created_at >= start - HOUR),
+        Recommendation.session_id.in_(ids),
     )
 
-    return {f: pivot[f].dropna() for f in FEATURES if f in pivot}
+def window_counts_sql(conn, hours: int | None = None, sessions: int | None = None, now: datetime | None = None):
+    """
+    Category counts over a window, counted by the database: GROUP BY
+    feature_name, feature_value over the window's answers (and the
+    recommended meal over its recommendations), so a few dozen rows come
+    back however many sessions it holds.
+
+    - hours=H: sessions created in the current hour and the H-1 before it.
+    - sessions=N: the latest N sessions by quiz_sessions.id.
+
+    Same return value as drift_counts.window_counts ({feature: {value:
+    count}} with predicted_meal, sessions counted), without the rollup's
+    flush lag. Plain Core, so it runs on Postgres and SQLite alike.
+    """
+    in_sessions, in_answers, in_recommendations = _window(hours, sessions, now)
+    n = conn.execute(select(func.count()).select_from(QuizSession).where(in_sessions)).scalar()
+    if not n:
+        return {}, 0
+
+    meal = Recommendation.payload["recommended_meal"].as_string()
+    answers = conn.execute(
+        select(QuizAnswer.feature_name, QuizAnswer.feature_value, func.count())
+        .where(in_answers)
+        .group_by(QuizAnswer.feature_name, QuizAnswer.feature_value)
+    ).all()
+    meals = conn.execute(
+        select(meal, func.count()).where(in_recommendations, meal.is_not(None)).group_by(meal)
+    ).all()
+
+    counts = {}
+    for feature, value, c in answers:
+        counts.setdefault(feature, {})[value] = c
+    if meals:
+        counts[PREDICTED] = {value: c for value, c in meals}
+    return counts, n
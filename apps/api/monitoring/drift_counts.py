@@ -0,0 +1,307 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, literal, select
+
+from apps.api.db.models import DriftCount, QuizAnswer, QuizSession, Recommendation
+
+log = logging.getLogger(__name__)
+
+# Pseudo-features stored next to the quiz answers in drift_counts
+SESSIONS = "_sessions"  # sessions per hour (feature_value "")
+PREDICTED = "predicted_meal"  # recommended meal per session
+HOUR = timedelta(hours=1)
+
+
+def hour_of(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def count_sessions(sessions, counts: dict | None = None) -> dict:
+    """
+    Fold (created_at, answers, predicted_meal) tuples into
+    {(hour, feature, value): count}, the unit drift_counts is built from.
+    """
+    counts = {} if counts is None else counts
+    for created_at, answers, predicted in sessions:
+        hour = hour_of(created_at)
+        keys = [(hour, SESSIONS, "")] + [(hour, k, str(v)) for k, v in answers.items()]
+        if predicted is not None:
+            keys.append((hour, PREDICTED, str(predicted)))
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def add_counts(conn, counts: dict):
+    """Atomically increment drift_counts rows (upsert), so every replica can add into the same buckets."""
+    if not counts:
+        return
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    # fixed row order: concurrent flushes from replicas lock rows in the same order
+    rows = [
+        {"hour": hour, "feature_name": feature, "feature_value": value, "count": n}
+        for (hour, feature, value), n in sorted(counts.items())
+    ]
+    stmt = insert(DriftCount)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["hour", "feature_name", "feature_value"],
+        set_={"count": DriftCount.count + stmt.excluded["count"]},
+    )
+    conn.execute(stmt, rows)
+
+
+def _session_hour(conn):
+    if conn.dialect.name == "postgresql":
+        # UTC hours like hour_of() and migration 0005, whatever the session's TimeZone
+        utc = func.timezone("UTC", QuizSession.created_at)
+        return func.timezone("UTC", func.date_trunc("hour", utc))
+    # SQLAlchemy's SQLite DateTime storage format, so rows compare/merge with ORM-written hours
+    return func.strftime("%Y-%m-%d %H:00:00.000000", QuizSession.created_at)
+
+
+def rebuild(conn, start: datetime, end: datetime):
+    """
+    Recount drift_counts for hours in [start, end) from quiz_answers and
+    recommendations (backfill, or repair after a crash lost unflushed
+    counters). Only rebuild hours nothing is still writing to: increments
+    flushed while this runs would be overwritten.
+    """
+    start, end = hour_of(start), hour_of(end)
+    hour = _session_hour(conn)
+    in_range = (QuizSession.created_at >= start) & (QuizSession.created_at < end)
+    conn.execute(delete(DriftCount).where(DriftCount.hour >= start, DriftCount.hour < end))
+
+    queries = [
+        select(hour, literal(SESSIONS), literal(""), func.count())
+        .where(in_range)
+        .group_by(hour),
+        select(hour, QuizAnswer.feature_name, QuizAnswer.feature_value, func.count())
+        .join(QuizSession, QuizSession.id == QuizAnswer.session_id)
+        .where(in_range)
+        .group_by(hour, QuizAnswer.feature_name, QuizAnswer.feature_value),
+        select(hour, literal(PREDICTED), Recommendation.payload["recommended_meal"].as_string(), func.count())
+        .join(QuizSession, QuizSession.id == Recommendation.session_id)
+        .where(in_range)
+        .group_by(hour, Recommendation.payload["recommended_meal"].as_string()),
+    ]
+    counts = {}
+    for query in queries:
+        for h, feature, value, n in conn.execute(query):
+            if value is not None:
+                h = h if isinstance(h, datetime) else datetime.fromisoformat(h)
+                counts[(hour_of(h), feature, value)] = n
+    add_counts(conn, counts)
+    return len(counts)
+
+
+def _fold(rows, out: dict) -> int:
+    sessions = 0
+    for feature, value, n in rows:
+        if feature == SESSIONS:
+            sessions += n
+        else:
+            per_feature = out.setdefault(feature, {})
+            per_feature[value] = per_feature.get(value, 0) + n
+    return sessions
+
+
+def _bucket_counts(conn, start: datetime):
+    return conn.execute(
+        select(DriftCount.feature_name, DriftCount.feature_value, func.sum(DriftCount.count))
+        .where(DriftCount.hour >= start)
+        .group_by(DriftCount.feature_name, DriftCount.feature_value)
+    ).all()
+
+
+def _latest_sessions_in_hour(conn, hour: datetime, n: int, out: dict) -> int:
+    latest = (
+        select(QuizSession.id)
+        .where(QuizSession.created_at >= hour, QuizSession.created_at < hour + HOUR)
+        .order_by(QuizSession.created_at.desc(), QuizSession.id.desc())
+        .limit(n)
+    )
+    ids = latest.scalar_subquery()
+    answers = conn.execute(
+        select(QuizAnswer.feature_name, QuizAnswer.feature_value, func.count())
+        .where(QuizAnswer.session_id.in_(ids))
+        .group_by(QuizAnswer.feature_name, QuizAnswer.feature_value)
+    ).all()
+    meals = conn.execute(
+        select(literal(PREDICTED), Recommendation.payload["recommended_meal"].as_string(), func.count())
+        .where(Recommendation.session_id.in_(ids))
+        .group_by(Recommendation.payload["recommended_meal"].as_string())
+    ).all()
+    _fold(answers + [m for m in meals if m[1] is not None], out)
+    return conn.execute(select(func.count()).select_from(latest.subquery())).scalar()
+
+
+def window_counts(conn, hours: int | None = None, sessions: int | None = None, now: datetime | None = None):
+    """
+    Category counts over a window, from drift_counts:
+
+    - hours=H: the current hour bucket and the H-1 before it.
+    - sessions=N: the latest N sessions. Whole hour buckets back to the
+      one where the N-th session falls, then that boundary hour's newest
+      sessions counted exactly from quiz_answers (at most an hour of rows).
+
+    Returns ({feature: {value: count}}, sessions counted), including the
+    predicted_meal pseudo-feature. Not an exact count of the database:
+    it lags by up to DRIFT_COUNTS_FLUSH_SECONDS (the replicas' unflushed
+    counters), and sessions counted by a process that died before flushing
+    stay missing until someone runs rebuild() over those hours.
+    """
+    out = {}
+    if hours is not None:
+        start = hour_of(now or datetime.now(timezone.utc)) - (hours - 1) * HOUR
+        return out, _fold(_bucket_counts(conn, start), out)
+
+    if sessions is None:
+        raise ValueError("window_counts needs hours or sessions")
+
+    # walk hour buckets newest first until they hold N sessions
+    per_hour = conn.execute(
+        select(DriftCount.hour, DriftCount.count)
+        .where(DriftCount.feature_name == SESSIONS)
+        .order_by(DriftCount.hour.desc())
+    )
+    seen, boundary, remainder = 0, None, 0
+    for hour, n in per_hour:
+        if seen + n == sessions:
+            # N ends exactly on a bucket boundary
+            return out, _fold(_bucket_counts(conn, hour_of(hour)), out)
+        if seen + n > sessions:
+            boundary, remainder = hour_of(hour), sessions - seen
+            break
+        seen += n
+        oldest = hour_of(hour)
+    else:
+        # fewer than N sessions in total: everything
+        if not seen:
+            return out, 0
+        return out, _fold(_bucket_counts(conn, oldest), out)
+
+    counted = _fold(_bucket_counts(conn, boundary + HOUR), out)
+    return out, counted + _latest_sessions_in_hour(conn, boundary, remainder, out)
+
+
+class DriftCounter:
+    """
+    In-process drift_counts increments: the request path adds to a dict,
+    a daemon thread upserts the accumulated counts every `flush_seconds`
+    in one transaction. A failed flush merges its counts back for the next
+    attempt; counts not yet flushed when the process dies are lost (use
+    rebuild() on the affected hours).
+    """
+
+    def __init__(self, engine, flush_seconds: float = 10.0):
+        self.engine = engine
+        self.flush_seconds = flush_seconds
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.failures = 0
+        self.sessions = 0
+        self.last_error = None
+
+    def record(self, sessions: list):
+        with self._lock:
+            count_sessions(sessions, self._counts)
+            self.sessions += len(sessions)
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        if not counts:
+            return
+        try:
+            with self.engine.begin() as conn:
+                add_counts(conn, counts)
+            self.flushes += 1
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            log.exception("Drift counter flush of %d buckets failed", len(counts))
+            with self._lock:
+                for key, n in counts.items():
+                    self._counts[key] = self._counts.get(key, 0) + n
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="drift-counter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(10)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._counts)
+        return {
+            "flush_seconds": self.flush_seconds,
+            "pending_buckets": pending,
+            "sessions": self.sessions,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+_counter = None
+
+
+def record_sessions(sessions):
+    """(created_at, answers, predicted_meal) for sessions just committed; no-op when counting is off."""
+    if _counter is not None:
+        _counter.record(sessions)
+
+
+def start_counter():
+    global _counter
+    from apps.api.core.settings import settings
+    from apps.api.db.session import engine
+
+    if settings.DRIFT_COUNTS_FLUSH_SECONDS <= 0 or _counter is not None:
+        return
+    counter = DriftCounter(engine, settings.DRIFT_COUNTS_FLUSH_SECONDS)
+    counter.start()
+    _counter = counter
+
+
+def stop_counter():
+    global _counter
+    if _counter is not None:
+        _counter.stop()
+        _counter = None
+
+
+def counter_stats():
+    return _counter.stats() if _counter is not None else None
+
+
+if __name__ == "__main__":
+    # repair after a crash lost unflushed counters: recount the last HOURS
+    # complete hours (the current one is still being written to)
+    #   python -m apps.api.monitoring.drift_counts 24
+    import sys
+    from apps.api.db.session import engine
+
+    end = hour_of(datetime.now(timezone.utc))
+    with engine.begin() as conn:
+        n = rebuild(conn, end - int(sys.argv[1]) * HOUR, end)
+    print(f"Rebuilt {n} drift_counts rows")
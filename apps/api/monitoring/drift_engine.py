@@ -0,0 +1,148 @@
+import math
+
+import numpy as np
+
+from apps.api.monitoring.drift_utils import EPS, PSI_DRIFT, PSI_WARNING
+
+# math.erfc per element: only the odd-df cells of a (windows x features)
+# array, and it keeps scipy out of API startup
+_erfc = np.vectorize(math.erfc, otypes=[float])
+
+
+def align(baseline: dict, windows: list, features=None):
+    """
+    Encode {feature: {category: count}} maps into aligned count arrays:
+    B (features x categories) for the baseline and W (windows x features x
+    categories), categories being the union of everything seen per feature,
+    zero-padded to the widest feature. Features default to those in the
+    baseline and in at least one window.
+    """
+    if features is None:
+        seen = set().union(*windows) if windows else set()
+        features = [f for f in baseline if f in seen]
+    categories = [
+        sorted(set(baseline.get(f, ())).union(*(w.get(f, ()) for w in windows)))
+        for f in features
+    ]
+    width = max((len(c) for c in categories), default=0)
+    B = np.zeros((len(features), width))
+    W = np.zeros((len(windows), len(features), width))
+    for i, (f, cats) in enumerate(zip(features, categories)):
+        index = {c: j for j, c in enumerate(cats)}
+        counts = baseline.get(f)
+        if counts:
+            B[i, [index[c] for c in counts]] = list(counts.values())
+        for k, window in enumerate(windows):
+            counts = window.get(f)
+            if counts:
+                W[k, i, [index[c] for c in counts]] = list(counts.values())
+    return features, categories, B, W
+
+
+def chi2_sf(x, df):
+    """
+    Chi-square survival function for integer degrees of freedom, in closed
+    form: Q(df/2, x/2) as a finite series (plus erfc for odd df), so no
+    scipy is needed. Vectorized over matching x / df arrays; df < 1 gives NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    df = np.asarray(df, dtype=int)
+    y = np.maximum(x, 0) / 2
+    odd = df % 2 == 1
+    n_terms = np.where(odd, (df - 1) // 2, df // 2)
+
+    # even df: e^-y * sum_{i<df/2} y^i / i!
+    # odd df:  erfc(sqrt y) + e^-y * sum_{i<(df-1)/2} y^(i+1/2) / Gamma(i+3/2)
+    term = np.where(odd, np.exp(-y) * np.sqrt(y) / math.gamma(1.5), np.exp(-y))
+    total = np.zeros_like(y)
+    total[odd] = _erfc(np.sqrt(y[odd]))
+    for i in range(int(n_terms.max(initial=0))):
+        total = total + np.where(i < n_terms, term, 0.0)
+        term = term * y / np.where(odd, i + 1.5, i + 1)
+    return np.where(df >= 1, np.minimum(total, 1.0), np.nan)
+
+
+def drift_metrics(B, W) -> dict:
+    """
+    PSI, Jensen-Shannon divergence (base 2, 0..1) and chi-square
+    goodness-of-fit p-value of every window against the baseline, for all
+    features at once: each is a (windows x features) array. A category
+    counts when either side has seen it; like categorical_psi, a category
+    missing on one side is taken as probability EPS there. Features with an
+    empty window are NaN.
+    """
+    B = np.asarray(B, dtype=float)
+    W = np.asarray(W, dtype=float)
+    in_base = B > 0
+    in_window = W > 0
+    n = W.sum(-1)
+
+    # e / a: probabilities with EPS for unseen categories. In padding (and
+    # any category neither side has) e == a == EPS, so PSI terms vanish there
+    p = B / B.sum(-1, keepdims=True)
+    q = np.divide(W, n[..., None], out=np.zeros_like(W), where=n[..., None] > 0)
+    e = np.where(in_base, p, EPS)
+    a = np.where(in_window, q, EPS)
+    log_e = np.log(e)
+    log_a = np.log(a)
+    psi = ((a - e) * (log_a - log_e)).sum(-1)
+
+    # p (q) is 0 wherever log_e (log_a) is the EPS stand-in, so those terms are 0
+    m = (p + q) / 2
+    log_m = np.log(np.where(m > 0, m, 1.0))
+    js = ((p * (log_e - log_m)).sum(-1) + (q * (log_a - log_m)).sum(-1)) / (2 * np.log(2))
+
+    # sum (O - E)^2 / E over seen categories = sum O^2 / E - 2n + sum E, with
+    # sum E = n * (1 + EPS * categories only the window has)
+    new = (in_window & ~in_base).sum(-1)
+    stat = (W * W / (n[..., None] * e + (n[..., None] == 0))).sum(-1) - n + n * EPS * new
+    chi2_p = chi2_sf(stat, in_base.sum(-1) + new - 1)
+
+    empty = n == 0
+    return {
+        "psi": np.where(empty, np.nan, psi),
+        "js": np.where(empty, np.nan, js),
+        "chi2_p": np.where(empty, np.nan, chi2_p),
+        "n": n,
+    }
+
+
+def statuses(psi, warning: float = PSI_WARNING, drift: float = PSI_DRIFT):
+    """psi_status over an array: the default policy, with overridable thresholds."""
+    psi = np.asarray(psi)
+    return np.where(np.isnan(psi), "no_data", np.where(psi < warning, "stable", np.where(psi < drift, "warning", "drift")))
+
+
+def _num(x, digits=4):
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def evaluate(baseline: dict, windows: list, label: str | None = None, warning: float = PSI_WARNING,
+             drift: float = PSI_DRIFT) -> list:
+    """
+    Drift report per window: {"overall_status", "features": {f: {...}},
+    "prediction": {...} | None}. `label` names the pseudo-feature holding
+    the predicted-label counts; it is reported under "prediction" and kept
+    out of overall_status, which covers the input features.
+    """
+    features, _, B, W = align(baseline, windows)
+    metrics = drift_metrics(B, W)
+    status = statuses(metrics["psi"], warning, drift)
+
+    reports = []
+    for k in range(len(windows)):
+        results = {
+            f: {
+                "psi": _num(metrics["psi"][k, i]),
+                "js": _num(metrics["js"][k, i]),
+                "chi2_p": _num(metrics["chi2_p"][k, i], 6),
+                "n": int(metrics["n"][k, i]),
+                "status": str(status[k, i]),
+            }
+            for i, f in enumerate(features)
+        }
+        prediction = results.pop(label, None) if label else None
+        found = {r["status"] for r in results.values()}
+        overall = next((s for s in ("drift", "warning", "stable") if s in found), "no_data")
+        reports.append({"overall_status": overall, "features": results, "prediction": prediction})
+    return reports
@@ -1,9 +1,15 @@
-import pandas as pd
+from typing import TYPE_CHECKING
 import numpy as np
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 EPS = 1e-6
+# psi_status thresholds (the default drift policy)
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
 
-def categorical_psi(expected: pd.Series, actual: pd.Series) -> float:
+def categorical_psi(expected: "pd.Series", actual: "pd.Series") -> float:
     """
     PSI for categorical variables.
     expected: baseline distribution
@@ -23,9 +29,26 @@ def categorical_psi(expected: pd.Series, actual: pd.Series) -> float:
     return float(psi)
 
 
+def psi_from_frequencies(expected: dict, actual: dict) -> float:
+    """
+    categorical_psi from precomputed {category: count} maps, so the baseline
+    never has to be materialized row by row.
+    """
+    exp_total = sum(expected.values()) or 1
+    act_total = sum(actual.values()) or 1
+
+    psi = 0.0
+    for c in set(expected).union(actual):
+        e = expected.get(c, 0) / exp_total or EPS
+        a = actual.get(c, 0) / act_total or EPS
+        psi += (a - e) * np.log(a / e)
+
+    return float(psi)
+
+
 def psi_status(psi: float) -> str:
-    if psi < 0.1:
+    if psi < PSI_WARNING:
         return "stable"
-    if psi < 0.25:
+    if psi < PSI_DRIFT:
         return "warning"
     return "drift"
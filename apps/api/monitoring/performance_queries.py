@@ -1,5 +1,7 @@
 from sqlalchemy import text
 
+# The full join /monitoring/performance used to run per request; it now reads
+# performance_rollups (performance_rollup.py). Kept for benchmarks/seed_and_explain.
 BASE_QUERY = """
 SELECT
     qs.model_version,
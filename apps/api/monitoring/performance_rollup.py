@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from apps.api.db.models import PerformanceRollup, QuizSession, Recommendation, RollupState, UserFeedback
+from apps.api.monitoring.confidence import confidence_bucket
+
+log = logging.getLogger(__name__)
+
+STATE = "performance"  # rollup_state row holding the user_feedback.id high-water mark
+NO_CONFIDENCE = "unknown"  # recommendations without top_k (e.g. AI source)
+
+
+def _day(ts: datetime) -> date:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).date()
+
+
+def _insert(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def add_rollup(conn, counts: dict):
+    """Increment performance_rollups rows by {(day, model_version, bucket): (samples, accepted)} (upsert)."""
+    if not counts:
+        return
+    rows = [
+        {"day": day, "model_version": model, "confidence_bucket": bucket, "samples": n, "accepted": a}
+        for (day, model, bucket), (n, a) in sorted(counts.items())
+    ]
+    stmt = _insert(conn)(PerformanceRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "model_version", "confidence_bucket"],
+        set_={
+            "samples": PerformanceRollup.samples + stmt.excluded["samples"],
+            "accepted": PerformanceRollup.accepted + stmt.excluded["accepted"],
+        },
+    )
+    conn.execute(stmt, rows)
+
+
+def high_water(conn) -> int:
+    return conn.execute(select(RollupState.high_water).where(RollupState.name == STATE)).scalar() or 0
+
+
+def _lock_state(conn) -> int:
+    """The high-water mark, row-locked until commit so concurrent refreshes (replicas, cron) take turns."""
+    conn.execute(_insert(conn)(RollupState).values(name=STATE, high_water=0).on_conflict_do_nothing())
+    return conn.execute(
+        select(RollupState.high_water).where(RollupState.name == STATE).with_for_update()
+    ).scalar()
+
+
+def refresh(conn, settle_seconds: float = 5.0, batch: int = 10_000) -> int:
+    """
+    Fold feedback past the high-water mark (user_feedback.id) into
+    performance_rollups, `batch` feedback rows at a time, and advance the
+    mark in the same transaction: each feedback row is counted exactly once.
+    Call inside a transaction (engine.begin()); returns the feedback rows folded.
+
+    Only feedback older than `settle_seconds` is taken, and the mark stops
+    before the first newer row: ids are assigned at insert, so a slower
+    transaction can still commit an id below one that is already visible,
+    and the mark must not move past it. created_at is the database's now(),
+    the start of the inserting transaction, so this only holds while
+    settle_seconds is well over (2x) the longest feedback transaction; a
+    row committed later than that below the mark is never counted.
+    """
+    mark = _lock_state(conn)
+    settled = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    ready = [UserFeedback.id > mark, UserFeedback.created_at <= settled]
+    stop = conn.execute(
+        select(func.min(UserFeedback.id)).where(UserFeedback.id > mark, UserFeedback.created_at > settled)
+    ).scalar()
+    if stop is not None:
+        ready.append(UserFeedback.id < stop)
+    ids = select(UserFeedback.id).where(*ready).order_by(UserFeedback.id).limit(batch).subquery()
+    upper, n = conn.execute(select(func.max(ids.c.id), func.count())).one()
+    if not n:
+        return 0
+
+    # same rows BASE_QUERY joined, the confidence pulled out of the payload by the database
+    prob = Recommendation.payload[("top_k", 0, "prob")].as_float()
+    rows = conn.execute(
+        select(QuizSession.created_at, QuizSession.model_version, prob, UserFeedback.accepted)
+        .join(QuizSession, QuizSession.id == UserFeedback.session_id)
+        .join(Recommendation, Recommendation.session_id == UserFeedback.session_id)
+        .where(*ready, UserFeedback.id <= upper)
+    )
+    counts = {}
+    for created_at, model, p, accepted in rows:
+        key = (_day(created_at), model or "", NO_CONFIDENCE if p is None else confidence_bucket(p))
+        samples, total = counts.get(key, (0, 0))
+        counts[key] = (samples + 1, total + (accepted or 0))
+    add_rollup(conn, counts)
+    conn.execute(RollupState.__table__.update().where(RollupState.name == STATE).values(high_water=upper))
+    return n
+
+
+def refresh_all(engine, settle_seconds: float = 5.0, batch: int = 10_000) -> int:
+    """refresh() until caught up, one transaction per batch."""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            n = refresh(conn, settle_seconds, batch)
+        total += n
+        if n < batch:
+            return total
+
+
+def _rate(samples: int, accepted: int):
+    return round(accepted / samples, 4) if samples else None
+
+
+def _group(rows, key: str, index: int) -> list:
+    groups = {}
+    for row in rows:
+        samples, accepted = groups.get(row[index], (0, 0))
+        groups[row[index]] = (samples + row[3], accepted + row[4])
+    return [
+        {key: k, "acceptance_rate": _rate(n, a), "samples": n}
+        for k, (n, a) in sorted(groups.items(), key=lambda kv: str(kv[0]))
+    ]
+
+
+def read_rollup(conn, start: date | None = None, end: date | None = None, model_version: str | None = None):
+    """
+    /monitoring/performance from performance_rollups alone: overall, per
+    confidence bucket, per day and per model version, for days in
+    [start, end] and optionally one model version.
+    """
+    query = select(
+        PerformanceRollup.day, PerformanceRollup.model_version, PerformanceRollup.confidence_bucket,
+        PerformanceRollup.samples, PerformanceRollup.accepted,
+    )
+    if start is not None:
+        query = query.where(PerformanceRollup.day >= start)
+    if end is not None:
+        query = query.where(PerformanceRollup.day <= end)
+    if model_version is not None:
+        query = query.where(PerformanceRollup.model_version == model_version)
+    rows = [(d.isoformat(), m or None, b, n, a) for d, m, b, n, a in conn.execute(query)]
+    if not rows:
+        return None
+
+    samples = sum(r[3] for r in rows)
+    return {
+        "overall": {"acceptance_rate": _rate(samples, sum(r[4] for r in rows)), "samples": samples},
+        "by_confidence_bucket": _group(rows, "bucket", 2),
+        "by_day": _group(rows, "day", 0),
+        "by_model_version": _group(rows, "model_version", 1),
+    }
+
+
+class RollupJob:
+    """
+    Background refresh of performance_rollups: every `interval` seconds, and
+    `settle_seconds` after feedback arrives (notify()), so new feedback shows
+    up within seconds without a refresh per request.
+    """
+
+    def __init__(self, engine, interval: float = 60.0, settle_seconds: float = 5.0):
+        self.engine = engine
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.folded = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_run_ms = None
+
+    def notify(self):
+        self._wake.set()
+
+    def run_once(self):
+        t0 = time.perf_counter()
+        try:
+            self.folded += refresh_all(self.engine, self.settle_seconds)
+            self.runs += 1
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            log.exception("Performance rollup refresh failed")
+        self.last_run_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._wake.wait(self.interval):
+                self._wake.clear()
+                # let the new feedback settle (and more of it batch up) first
+                if self._stop.wait(self.settle_seconds):
+                    return
+            self.run_once()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="performance-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(10)
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "settle_seconds": self.settle_seconds,
+            "runs": self.runs,
+            "feedback_folded": self.folded,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_run_ms": self.last_run_ms,
+        }
+
+
+_job = None
+
+
+def notify_feedback():
+    """Feedback was just committed: refresh soon. No-op when the job is off."""
+    if _job is not None:
+        _job.notify()
+
+
+def start_rollup_job():
+    global _job
+    from apps.api.core.settings import settings
+    from apps.api.db.session import engine
+
+    if settings.PERFORMANCE_ROLLUP_SECONDS <= 0 or _job is not None:
+        return
+    job = RollupJob(engine, settings.PERFORMANCE_ROLLUP_SECONDS, settings.PERFORMANCE_ROLLUP_SETTLE_SECONDS)
+    job.start()
+    _job = job
+
+
+def stop_rollup_job():
+    global _job
+    if _job is not None:
+        _job.stop()
+        _job = None
+
+
+def rollup_job_stats():
+    return _job.stats() if _job is not None else None
+
+
+if __name__ == "__main__":
+    # periodic job for deployments running the API with PERFORMANCE_ROLLUP_SECONDS=0:
+    #   python -m apps.api.monitoring.performance_rollup
+    from apps.api.core.settings import settings
+    from apps.api.db.session import engine
+
+    n = refresh_all(engine, settings.PERFORMANCE_ROLLUP_SETTLE_SECONDS)
+    print(f"Folded {n} feedback rows")
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from apps.api.auth.dependencies import get_current_user, get_db
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal, get_db
 from apps.api.monitoring.performance_service import compute_performance
-from apps.api.db.models import User
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 @router.get("/performance")
 def performance(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
+    start: date | None = None,
+    end: date | None = None,
+    model_version: str | None = None,
 ):
-    return compute_performance(db)
+    """Acceptance by confidence bucket / day / model for days in [start, end] (inclusive)."""
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+    return compute_performance(db, start, end, model_version)
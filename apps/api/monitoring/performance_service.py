@@ -1,60 +1,19 @@
-import pandas as pd
-from sqlalchemy.orm import Session
-from apps.api.monitoring.performance_queries import BASE_QUERY
-from apps.api.monitoring.confidence import confidence_bucket
-
-def compute_performance(db: Session):
-    rows = db.execute(BASE_QUERY).fetchall()
-    if not rows:
-        return {"status": "no_data"}
-
-    df = pd.DataFrame(rows, columns=["model_version","payload","accepted","day"])
-
-    # Extract top-1 confidence
-    df["confidence"] = df["payload"].apply(
-        lambda p: float(p["top_k"][0]["prob"]) if p and "top_k" in p else None
-    )
-
-    df["bucket"] = df["confidence"].apply(confidence_bucket)
+from datetime import date
 
-    overall = {
-        "acceptance_rate": round(df["accepted"].mean(), 4),
-        "samples": len(df),
-    }
-
-    by_bucket = (
-        df.groupby("bucket")
-        .agg(
-            acceptance_rate=("accepted", "mean"),
-            samples=("accepted", "count"),
-        )
-        .reset_index()
-        .to_dict(orient="records")
-    )
-
-    by_day = (
-        df.groupby("day")
-        .agg(
-            acceptance_rate=("accepted", "mean"),
-            samples=("accepted", "count"),
-        )
-        .reset_index()
-        .to_dict(orient="records")
-    )
-
-    by_model = (
-        df.groupby("model_version")
-        .agg(
-            acceptance_rate=("accepted", "mean"),
-            samples=("accepted", "count"),
-        )
-        .reset_index()
-        .to_dict(orient="records")
-    )
-
-    return {
-        "overall": overall,
-        "by_confidence_bucket": by_bucket,
-        "by_day": by_day,
-        "by_model_version": by_model,
-    }
+from sqlalchemy.orm import Session
+from apps.api.monitoring.performance_rollup import high_water, read_rollup, rollup_job_stats
+
+def compute_performance(db: Session, start: date | None = None, end: date | None = None,
+                        model_version: str | None = None):
+    """
+    Acceptance rate overall and per confidence bucket / day / model version,
+    read from performance_rollups only (days in [start, end], optionally one
+    model version). Feedback reaches the rollup within a refresh of the
+    rollup job (PERFORMANCE_ROLLUP_SECONDS, or sooner after new feedback).
+    """
+    conn = db.connection()
+    result = read_rollup(conn, start, end, model_version)
+    rollup = {"high_water": high_water(conn), "job": rollup_job_stats()}
+    if result is None:
+        return {"status": "no_data", "rollup": rollup}
+    return {**result, "rollup": rollup}
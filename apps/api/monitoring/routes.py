@@ -1,15 +1,61 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from apps.api.auth.dependencies import get_current_user, get_db
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import auth_cache_stats, get_current_principal, get_db
+from apps.api.auth.security import hashing_stats
 from apps.api.monitoring.service import compute_drift
-from apps.api.db.models import User
+from apps.api.ml.recommender import batching_stats, cache_stats, models_stats
+from apps.api.db.instrumentation import db_stats
+from apps.api.db.write_behind import writer_stats
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 @router.get("/drift")
 def drift(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
     sample_size: int = 500,
+    window_hours: int | None = Query(None, ge=1, le=24 * 366),
+    window_sessions: int | None = Query(None, ge=1),
+    window: list[str] | None = Query(None, description="several windows at once, e.g. 24h, 7d, 500s"),
 ):
-    return compute_drift(db, sample_size)
+    try:
+        return compute_drift(db, sample_size, window_hours, window_sessions, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/models")
+def models(user: Principal = Depends(get_current_principal)):
+    """Resident model versions, traffic split and per-version inference latency."""
+    return models_stats()
+
+
+@router.get("/inference")
+def inference(user: Principal = Depends(get_current_principal)):
+    """Micro-batching dispatcher counters (None = disabled)."""
+    return {"batching": batching_stats()}
+
+
+@router.get("/caches")
+def caches(user: Principal = Depends(get_current_principal)):
+    """Hit/miss/eviction counters for in-process caches (None = disabled)."""
+    return {"prediction": cache_stats(), "auth": auth_cache_stats()}
+
+
+@router.get("/password_hashing")
+def password_hashing(user: Principal = Depends(get_current_principal)):
+    """Hashing pool occupancy, 503 rejections and hash latency (queue wait included)."""
+    return hashing_stats()
+
+
+@router.get("/write_behind")
+def write_behind(user: Principal = Depends(get_current_principal)):
+    """Write-behind queue depth, spill size and flush latency (None = disabled)."""
+    return writer_stats()
+
+
+@router.get("/db")
+def db_metrics(user: Principal = Depends(get_current_principal), top: int = 20):
+    """Connection pool usage and checkout wait, plus the `top` statements by total time."""
+    return db_stats(top)
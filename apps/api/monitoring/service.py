@@ -1,36 +1,78 @@
 from sqlalchemy.orm import Session
+from apps.api.core.settings import settings
+from apps.api.ml.recommender import current_model
 from apps.api.monitoring.baseline import load_baseline
-from apps.api.monitoring.current import load_current
-from apps.api.monitoring.drift_utils import categorical_psi, psi_status
+from apps.api.monitoring.current import load_current, window_counts_sql
+from apps.api.monitoring.drift_counts import PREDICTED, counter_stats, window_counts
+from apps.api.monitoring.drift_engine import evaluate
 
-def compute_drift(db: Session, sample_size: int = 500):
-    baseline = load_baseline()
-    current = load_current(db, sample_size)
+def parse_window(spec: str) -> dict:
+    """"24h" / "7d" -> hour buckets, "500s" -> latest sessions."""
+    n, unit = spec[:-1], spec[-1:]
+    if not n.isdigit() or int(n) < 1 or unit not in ("h", "d", "s"):
+        raise ValueError(f"Bad drift window {spec!r}: use e.g. 24h, 7d or 500s")
+    n = int(n)
+    return {"hours": n} if unit == "h" else {"hours": 24 * n} if unit == "d" else {"sessions": n}
 
-    if not current:
-        return {"status": "no_data"}
+def compute_drift(db: Session, sample_size: int = 500, window_hours: int | None = None,
+                  window_sessions: int | None = None, windows: list | None = None):
+    """
+    Drift of recent answers (and of the predicted meal) against the serving
+    model's training baseline: PSI, Jensen-Shannon and chi-square p per
+    feature, status from the PSI thresholds.
 
-    results = {}
-    overall = "stable"
+    With DRIFT_SOURCE=rollup (default) the window is the last
+    `window_sessions` sessions or the last `window_hours` hour buckets
+    (default 24 h), read from drift_counts; `windows` (["24h", "7d",
+    "500s"]) evaluates several in one pass. DRIFT_SOURCE=sql takes the
+    same windows but counts them with GROUP BY over quiz_answers. With
+    DRIFT_SOURCE=rows it is the latest `sample_size` answer rows.
+    """
+    # compare against the training distribution of the model serving now
+    try:
+        model_version = current_model().version
+    except Exception:
+        model_version = None  # no model loadable: drift still works off the fallback
+    baseline, baseline_source = load_baseline(model_version)
+    header = {"model_version": model_version, "baseline": baseline_source}
 
-    for feature, base_series in baseline.items():
-        if feature not in current:
-            continue
+    if settings.DRIFT_SOURCE == "rows":
+        current = load_current(db, sample_size)
+        if not current:
+            return {"status": "no_data"}
+        report, = evaluate(baseline["features"], [current], label=PREDICTED)
+        return {**_fields(report), **header, "window": {"rows": sample_size}}
 
-        psi = categorical_psi(base_series, current[feature])
-        status = psi_status(psi)
+    if windows:
+        specs = {spec: parse_window(spec) for spec in windows}
+    else:
+        spec = {"sessions": window_sessions} if window_sessions is not None else {"hours": window_hours or 24}
+        specs = {None: spec}
 
-        if status == "drift":
-            overall = "drift"
-        elif status == "warning" and overall != "drift":
-            overall = "warning"
+    conn = db.connection()
+    count = window_counts_sql if settings.DRIFT_SOURCE == "sql" else window_counts
+    counted = {}
+    for name, spec in specs.items():
+        counted[name] = count(conn, **spec)
 
-        results[feature] = {
-            "psi": round(psi, 4),
-            "status": status,
-        }
+    reports = evaluate(baseline["features"], [c for c, _ in counted.values()], label=PREDICTED)
+    out = {}
+    for (name, spec), (_, sessions), report in zip(specs.items(), counted.values(), reports):
+        out[name] = (
+            {"status": "no_data", "window": spec} if not sessions
+            else {**_fields(report), "window": {**spec, "sessions_counted": sessions}}
+        )
 
+    if count is window_counts:
+        header["counter"] = counter_stats()  # this replica's not-yet-flushed counts
+    if not windows:
+        result = out[None]
+        return result if result.get("status") == "no_data" else {**result, **header}
+    return {**header, "windows": out}
+
+def _fields(report: dict) -> dict:
     return {
-        "overall_status": overall,
-        "features": results,
+        "overall_status": report["overall_status"],
+        "features": report["features"],
+        "prediction": report["prediction"],
     }
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal_async, get_async_db
+from apps.api.db.models import (
+    QuizSession,
+    QuizAnswer,
+    Recommendation,
+    UserFeedback
+)
+from apps.api.db.write_behind import get_writer
+from apps.api.ml.batching import InferenceOverloaded
+from apps.api.ml.recommender import predict_meal, current_model
+from apps.api.monitoring.drift_counts import record_sessions
+from apps.api.monitoring.performance_rollup import notify_feedback
+from apps.api.quiz.routes import _answer_errors, _session_lost, _session_not_stored
+
+# ASYNC_DB=1 variants of the hot quiz endpoints. main.py mounts this router
+# ahead of quiz.routes, so these handlers shadow the sync ones. While a
+# request waits on the database it holds no threadpool slot; only the model
+# call (CPU work, and possibly a first-time model load) runs in the pool.
+router = APIRouter(prefix="/quiz", tags=["quiz"])
+
+
+def _predict(answers: dict, user_id: int):
+    model = current_model(user_id=user_id)
+    prediction = predict_meal(features=answers, top_k=3, state=model)
+    return model.version, prediction
+
+
+@router.post("/submit")
+async def submit_quiz(
+    answers: dict,
+    user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Async /quiz/submit: same flow and response as quiz.routes.submit_quiz."""
+    errors = _answer_errors(answers)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
+
+    answers = {k: str(v) for k, v in answers.items()}
+
+    # Score first (off the event loop); the DB writes below are all awaited
+    try:
+        model_version, prediction = await run_in_threadpool(_predict, answers, user.id)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"ML prediction failed: {str(e)}",
+        )
+
+    writer = get_writer()
+    session_id = None
+    if writer:
+        # id allocation may need a DB round trip now and then: keep it off the loop
+        session_id = await run_in_threadpool(writer.record_quiz, user.id, model_version, answers, prediction)
+
+    if session_id is None:
+        created_at = datetime.now(timezone.utc)
+        session = QuizSession(
+            # with the writer on, ids come from its allocator so the two never collide
+            id=await run_in_threadpool(writer.ids.next) if writer else None,
+            user_id=user.id,
+            mode="ml",
+            model_version=model_version,
+            created_at=created_at,
+        )
+        db.add(session)
+        await db.flush()  # session.id becomes available
+        session_id = session.id
+
+        db.add_all([
+            QuizAnswer(session_id=session_id, feature_name=k, feature_value=v)
+            for k, v in answers.items()
+        ])
+        db.add(
+            Recommendation(
+                session_id=session_id,
+                source="ml",
+                payload=prediction,
+            )
+        )
+        await db.commit()
+        record_sessions([(created_at, answers, prediction["recommended_meal"])])
+
+    return {
+        "session_id": session_id,
+        "model_version": model_version,
+        "result": prediction,
+    }
+
+
+@router.post("/feedback")
+async def feedback(
+    payload: dict,
+    user: Principal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    session_id = int(payload["session_id"])
+    writer = get_writer()
+    if writer:
+        if not await run_in_threadpool(writer.wait_flushed, session_id):
+            raise HTTPException(status_code=503, detail="Session not stored yet", headers={"Retry-After": "5"})
+        if writer.is_dead_lettered(session_id):
+            raise _session_lost(session_id)
+    db.add(UserFeedback(
+        session_id=session_id,
+        chosen_meal=str(payload["chosen_meal"]),
+        accepted=1 if payload.get("accepted") else 0
+    ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise _session_not_stored(writer)
+    notify_feedback()
+    return {"status": "ok"}
@@ -1,22 +1,48 @@
+import os
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from apps.api.auth.dependencies import get_current_user, get_db
+from apps.api.auth.cache import Principal
+from apps.api.auth.dependencies import get_current_principal, get_db
 from apps.api.db.models import (
     QuizSession,
     QuizAnswer,
     Recommendation,
-    User,
     UserFeedback
 )
+from apps.api.db.write_behind import get_writer
 from apps.api.quiz.questions import QUESTIONS
-from apps.api.ml.recommender import predict_meal, get_model_version
+from apps.api.ml.batching import InferenceOverloaded
+from apps.api.ml.recommender import predict_meal, predict_meals, current_model
+from apps.api.monitoring.drift_counts import record_sessions
+from apps.api.monitoring.performance_rollup import notify_feedback
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
+# Upper bound on answer sets per /quiz/submit_batch request
+MAX_BATCH_SIZE = int(os.getenv("QUIZ_MAX_BATCH_SIZE", "500"))
+
+
+def _answer_errors(answers: dict) -> list:
+    expected_features = {q["id"] for q in QUESTIONS}
+    received_features = set(answers.keys())
+
+    missing = expected_features - received_features
+    extra = received_features - expected_features
+
+    errors = []
+    if missing:
+        errors.append(f"Missing quiz answers for: {sorted(missing)}")
+    if extra:
+        errors.append(f"Unknown quiz fields: {sorted(extra)}")
+    return errors
+
 
 @router.get("/questions")
-def get_questions(user: User = Depends(get_current_user)):
+def get_questions(user: Principal = Depends(get_current_principal)):
     """
     Return quiz questions.
     Protected endpoint.
@@ -27,7 +53,7 @@ def get_questions(user: User = Depends(get_current_user)):
 @router.post("/submit")
 def submit_quiz(
     answers: dict,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -35,95 +61,216 @@ def submit_quiz(
 
     Flow:
     1) Validate answers
-    2) Create quiz session (store model version)
-    3) Persist raw answers (for audit + drift)
-    4) Call ML model
+    2) Pin model version and call ML model
+    3) Create quiz session (store model version)
+    4) Persist raw answers (for audit + drift)
     5) Persist recommendation
     6) Return result to UI
+
+    With WRITE_BEHIND=1, 3-5 are handed to the background writer and the
+    response does not wait for the database.
     """
 
     # 1. Validate input strictly (NO silent bugs)
-    expected_features = {q["id"] for q in QUESTIONS}
-    received_features = set(answers.keys())
-
-    missing = expected_features - received_features
-    extra = received_features - expected_features
+    errors = _answer_errors(answers)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
 
-    if missing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing quiz answers for: {sorted(missing)}",
-        )
+    # Ensure all values are strings (ML pipeline expects categorical strings)
+    answers = {k: str(v) for k, v in answers.items()}
 
-    if extra:
+    # 2. Load model version (lazy-loaded, safe; pinned for this request) and score
+    model = current_model(user_id=user.id)
+    model_version = model.version
+    try:
+        prediction = predict_meal(features=answers, top_k=3, state=model)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
         raise HTTPException(
-            status_code=400,
-            detail=f"Unknown quiz fields: {sorted(extra)}",
+            status_code=500,
+            detail=f"ML prediction failed: {str(e)}",
         )
 
-    # Ensure all values are strings (ML pipeline expects categorical strings)
-    answers = {k: str(v) for k, v in answers.items()}
+    writer = get_writer()
+    session_id = writer.record_quiz(user.id, model_version, answers, prediction) if writer else None
 
-    # 2. Load model version (lazy-loaded, safe)
-    model_version = get_model_version()
+    if session_id is None:
+        # 3. Create quiz session (timestamped here: drift counters bucket by it;
+        # with the writer on, its id comes from the writer's allocator so the two never collide)
+        created_at = datetime.now(timezone.utc)
+        session = QuizSession(
+            id=writer.ids.next() if writer else None,
+            user_id=user.id,
+            mode="ml",
+            model_version=model_version,
+            created_at=created_at,
+        )
+        db.add(session)
+        db.flush()  # session.id becomes available
+        session_id = session.id
 
-    # 3. Create quiz session
-    session = QuizSession(
-        user_id=user.id,
-        mode="ml",
-        model_version=model_version,
-    )
-    db.add(session)
-    db.flush()  # session.id becomes available
+        # 4. Persist raw quiz answers (flywheel + drift-ready)
+        for feature_name, feature_value in answers.items():
+            db.add(
+                QuizAnswer(
+                    session_id=session_id,
+                    feature_name=feature_name,
+                    feature_value=feature_value,
+                )
+            )
 
-    # 4. Persist raw quiz answers (flywheel + drift-ready)
-    for feature_name, feature_value in answers.items():
+        # 5. Persist recommendation
         db.add(
-            QuizAnswer(
-                session_id=session.id,
-                feature_name=feature_name,
-                feature_value=feature_value,
+            Recommendation(
+                session_id=session_id,
+                source="ml",
+                payload=prediction,
             )
         )
 
-    # 5. Run ML model (classifier)
+        # Commit everything atomically
+        db.commit()
+        record_sessions([(created_at, answers, prediction["recommended_meal"])])
+
+    # 6. Return response to UI
+    return {
+        "session_id": session_id,
+        "model_version": model_version,
+        "result": prediction,
+    }
+
+
+@router.post("/submit_batch")
+def submit_quiz_batch(
+    items: list[dict],
+    top_k: int = 3,
+    user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Submit many answer sets at once (at most QUIZ_MAX_BATCH_SIZE, default 500).
+
+    All items are validated before anything is scored; one invalid item
+    rejects the whole batch. Items are scored with a single vectorized
+    predict_proba call and sessions, answers and recommendations are
+    bulk-inserted in one transaction. Results come back in request order.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(items)} items (max {MAX_BATCH_SIZE})",
+        )
+
+    # 1. Validate all items together
+    invalid = [
+        {"index": i, "errors": errors}
+        for i, answers in enumerate(items)
+        if (errors := _answer_errors(answers))
+    ]
+    if invalid:
+        raise HTTPException(status_code=400, detail=invalid)
+
+    items = [{k: str(v) for k, v in answers.items()} for answers in items]
+
+    # 2. Score everything in one call
+    model = current_model(user_id=user.id)
+    model_version = model.version
     try:
-        prediction = predict_meal(features=answers, top_k=3)
+        predictions = predict_meals(items, top_k=top_k, state=model)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"ML prediction failed: {str(e)}",
         )
 
+    # 3. Bulk-insert sessions, answers and recommendations
+    created_at = datetime.now(timezone.utc)
+    sessions = [
+        {"user_id": user.id, "mode": "ml", "model_version": model_version, "created_at": created_at}
+        for _ in items
+    ]
+    writer = get_writer()
+    if writer:
+        # the write-behind writer hands out ids ahead of its inserts: take ours from it too
+        for row, sid in zip(sessions, writer.ids.take(len(sessions))):
+            row["id"] = sid
+    session_ids = db.scalars(
+        insert(QuizSession).returning(QuizSession.id, sort_by_parameter_order=True),
+        sessions,
+    ).all()
 
-    # 6. Persist recommendation
-    db.add(
-        Recommendation(
-            session_id=session.id,
-            source="ml",
-            payload=prediction,
-        )
+    db.execute(
+        insert(QuizAnswer),
+        [
+            {"session_id": sid, "feature_name": k, "feature_value": v}
+            for sid, answers in zip(session_ids, items)
+            for k, v in answers.items()
+        ],
+    )
+    db.execute(
+        insert(Recommendation),
+        [
+            {"session_id": sid, "source": "ml", "payload": prediction}
+            for sid, prediction in zip(session_ids, predictions)
+        ],
     )
 
-    # 7. Commit everything atomically
+    # 4. Commit everything atomically
     db.commit()
+    record_sessions([
+        (created_at, answers, prediction["recommended_meal"])
+        for answers, prediction in zip(items, predictions)
+    ])
 
-    # 8. Return response to UI
     return {
-        "session_id": session.id,
         "model_version": model_version,
-        "result": prediction,
+        "results": [
+            {"session_id": sid, "result": prediction}
+            for sid, prediction in zip(session_ids, predictions)
+        ],
     }
 
 
 
+def _session_lost(session_id: int) -> HTTPException:
+    return HTTPException(status_code=409, detail=f"Session {session_id} could not be stored")
+
+
+def _session_not_stored(writer) -> HTTPException:
+    """Feedback for a session the database does not have (FK violation)."""
+    if writer:
+        # may still be queued in another worker's write-behind writer
+        return HTTPException(status_code=503, detail="Session not stored yet", headers={"Retry-After": "5"})
+    return HTTPException(status_code=409, detail="Unknown session")
+
+
 @router.post("/feedback")
-def feedback(payload: dict, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def feedback(payload: dict, user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     # payload: { "session_id": 123, "chosen_meal": "...", "accepted": true/false }
+    session_id = int(payload["session_id"])
+    writer = get_writer()
+    if writer:
+        # the session may still be queued for write-behind
+        if not writer.wait_flushed(session_id):
+            # inserting now would violate the session FK
+            raise HTTPException(status_code=503, detail="Session not stored yet", headers={"Retry-After": "5"})
+        if writer.is_dead_lettered(session_id):
+            raise _session_lost(session_id)
     db.add(UserFeedback(
-        session_id=int(payload["session_id"]),
+        session_id=session_id,
         chosen_meal=str(payload["chosen_meal"]),
         accepted=1 if payload.get("accepted") else 0
     ))
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise _session_not_stored(writer)
+    notify_feedback()
     return {"status": "ok"}
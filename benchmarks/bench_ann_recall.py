@@ -0,0 +1,59 @@
+"""
+Recall@k vs latency of the IVF approximate index against exact MealIndex search.
+
+Run from the repo root:
+    python -m benchmarks.bench_ann_recall [--sizes 100000 1000000] [--k 10]
+        [--probes 1 2 4 8 16 32] [--lists 0] [--queries 200]
+
+--lists 0 uses sqrt(n_meals) cells. n_probe == n_lists is exact search.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_meal_similarity import synthetic_catalog
+from mlops.ann_index import IVFIndex
+from mlops.meal_index import MealIndex
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--lists", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        names, X = synthetic_catalog(n)
+        index = MealIndex.from_features(names, X, X.mean(axis=0), X.std(axis=0))
+        rows = np.random.default_rng(1).integers(0, n, args.queries)
+
+        t0 = time.perf_counter()
+        exact_idx, _ = index.similar_rows(rows, args.k, exact=True)
+        exact_ms = (time.perf_counter() - t0) * 1000 / len(rows)
+
+        t0 = time.perf_counter()
+        ann = IVFIndex.build(index.unit, n_lists=args.lists)
+        build_s = time.perf_counter() - t0
+
+        print(f"\n{n} meals, {ann.n_lists} lists (built in {build_s:.1f}s), exact: {exact_ms:.3f} ms/query")
+        print(f"{'n_probe':>8} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+        for n_probe in args.probes:
+            if n_probe > ann.n_lists:
+                continue
+            t0 = time.perf_counter()
+            approx, _ = ann.search(index.unit, rows, args.k, n_probe, exclude_self=True)
+            ann_ms = (time.perf_counter() - t0) * 1000 / len(rows)
+
+            recall = np.mean([
+                len(set(a.tolist()) & set(e.tolist())) / len(e)
+                for a, e in zip(approx, exact_idx)
+            ])
+            print(f"{n_probe:>8} {recall:>10.3f} {ann_ms:>9.3f} {exact_ms / ann_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
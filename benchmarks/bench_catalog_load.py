@@ -0,0 +1,99 @@
+"""
+Meal catalog load time and memory: full CSV (old) vs memory-mapped catalog.
+
+Run from the repo root:
+    python -m benchmarks.bench_catalog_load [--sizes 100000 1000000]
+
+Writes a synthetic catalog with the same ~56 columns as artifacts/meals.csv
+to a temp dir in both formats, then loads each in a fresh interpreter and
+reports wall time and RSS split into anonymous (private to the process)
+and file-backed (shared between workers through the page cache) memory.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_meal_similarity import synthetic_catalog
+from mlops.meal_catalog import FEATURES, save_catalog
+
+LOADER = r"""
+import json, sys, time
+t0 = time.perf_counter()
+if sys.argv[1] == "csv":
+    import joblib, pandas as pd
+    from mlops.meal_index import MealIndex
+    df = pd.read_csv(sys.argv[2])
+    index = MealIndex.from_scaler(df["meal_name"], df[%r].to_numpy(), joblib.load(sys.argv[3]))
+else:
+    from mlops.meal_catalog import load_catalog
+    index = load_catalog(sys.argv[2]).index
+index.similar([index.names[0]], 5)  # touch the data once
+elapsed = time.perf_counter() - t0
+status = dict(
+    line.split(":", 1) for line in open("/proc/self/status") if line.startswith(("RssAnon", "RssFile"))
+)
+print(json.dumps({"seconds": elapsed, **{k: int(v.split()[0]) // 1024 for k, v in status.items()}}))
+""" % (FEATURES,)
+
+
+def wide_frame(n: int) -> pd.DataFrame:
+    names, X = synthetic_catalog(n)
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(X, columns=FEATURES)
+    df["meal_name"] = names
+    for col in ["meal_type", "diet_type", "cooking_method", "Workout_Type", "Name of Exercise", "Benefit"]:
+        df[col] = rng.choice(["a", "bb", "ccc", "dddd"], n)
+    # pad with numeric workout / BPM style columns up to ~56 like the real CSV
+    for i in range(56 - len(df.columns)):
+        df[f"extra_{i}"] = rng.random(n)
+    return df
+
+
+def run(*args) -> dict:
+    out = subprocess.run([sys.executable, "-c", LOADER, *args], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    import joblib
+    from sklearn.preprocessing import StandardScaler
+
+    print(f"{'meals':>9} {'format':>8} {'disk MB':>8} {'load s':>7} {'anon MB':>8} {'file MB':>8}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as td:
+            df = wide_frame(n)
+            scaler = StandardScaler().fit(df[FEATURES])
+            csv_path = os.path.join(td, "meals.csv")
+            scaler_path = os.path.join(td, "scaler.pkl")
+            catalog_dir = os.path.join(td, "catalog")
+            df.to_csv(csv_path, index=False)
+            joblib.dump(scaler, scaler_path)
+            save_catalog(df, scaler, catalog_dir)
+
+            sizes = {
+                "csv": os.path.getsize(csv_path),
+                "catalog": sum(os.path.getsize(os.path.join(catalog_dir, f)) for f in os.listdir(catalog_dir)),
+            }
+            results = {
+                "csv": run("csv", csv_path, scaler_path),
+                "catalog": run("catalog", catalog_dir),
+            }
+            for fmt, r in results.items():
+                print(
+                    f"{n:>9} {fmt:>8} {sizes[fmt] / 1e6:>8.1f} {r['seconds']:>7.2f} "
+                    f"{r['RssAnon']:>8} {r['RssFile']:>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
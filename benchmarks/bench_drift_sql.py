@@ -0,0 +1,68 @@
+"""
+Drift window counting: shipping answer rows to Python (DRIFT_SOURCE=rows,
+load_current) vs GROUP BY in the database (DRIFT_SOURCE=sql,
+window_counts_sql), over growing session windows.
+
+Run from the repo root against a scratch database at `alembic upgrade head`:
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_drift_sql
+        [--sessions 1000000] [--windows 500 10000 100000 1000000] [--no-seed]
+
+Seeding reuses benchmarks.seed_and_explain (10 answers per session, so the
+default is 10M quiz_answers rows). "rows" fetches the window's 10 x N answer
+rows and counts them in Python, as load_current does; "sql" returns one row
+per (feature, category) plus the predicted meals.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, func, select
+
+from apps.api.core.settings import settings
+from apps.api.db.models import QuizAnswer
+from apps.api.ml.lookup import FEATURES
+from apps.api.monitoring.current import load_current, window_counts_sql
+from benchmarks.seed_and_explain import seed_postgres, seed_python
+
+
+def timed(fn, repeat: int = 3):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        ms = (time.perf_counter() - t0) * 1000
+        best = ms if best is None else min(best, ms)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[500, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if not args.no_seed:
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            seed = seed_postgres if engine.dialect.name == "postgresql" else seed_python
+            seed(conn, args.sessions, args.days, 0.3)
+        print(f"Seeded {args.sessions} sessions in {time.perf_counter() - t0:.1f}s")
+
+    with engine.connect() as conn:
+        answers = conn.execute(select(func.count()).select_from(QuizAnswer)).scalar()
+        print(f"{engine.dialect.name}: {answers:,} quiz_answers rows")
+        print(f"\n{'window':>10} {'rows ms':>9} {'rows fetched':>13} {'sql ms':>8} {'rows back':>10} {'speedup':>8}")
+        for n in args.windows:
+            t_rows, current = timed(lambda: load_current(conn, n * len(FEATURES)))
+            t_sql, (counts, _) = timed(lambda: window_counts_sql(conn, sessions=n))
+            # same sessions, same answer counts (the SQL side also has predicted_meal)
+            assert all(counts.get(f) == c for f, c in (current or {}).items()), "sql counts differ from rows"
+            back = sum(len(v) for v in counts.values())
+            print(f"{n:>10,} {t_rows:>9.1f} {n * len(FEATURES):>13,} {t_sql:>8.1f} {back:>10} {t_rows / t_sql:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
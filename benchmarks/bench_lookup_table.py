@@ -0,0 +1,61 @@
+"""
+Compiled lookup table vs live sklearn pipeline for classifier inference.
+
+Run from the repo root:
+    python -m benchmarks.bench_lookup_table [--model artifacts/model.joblib] [-n 2000]
+"""
+import argparse
+import random
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from apps.api.ml.lookup import OPTIONS, FEATURES, SPACE_SIZE, LookupTable, check_consistency
+
+
+def random_answers(rng: random.Random) -> dict:
+    return {name: rng.choice(opts) for name, opts in zip(FEATURES, OPTIONS)}
+
+
+def latency_us(fn, inputs) -> np.ndarray:
+    out = np.empty(len(inputs))
+    for i, x in enumerate(inputs):
+        t0 = time.perf_counter()
+        fn(x)
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def report(name: str, lat: np.ndarray):
+    print(
+        f"{name:<10} p50={np.percentile(lat, 50):9.2f}us  "
+        f"p99={np.percentile(lat, 99):9.2f}us  mean={lat.mean():9.2f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="artifacts/model.joblib")
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+
+    t0 = time.perf_counter()
+    table = LookupTable.build(model)
+    build_s = time.perf_counter() - t0
+    print(f"built table: {SPACE_SIZE} rows, {table.nbytes / 1024:.0f} KiB in {build_s:.2f}s")
+
+    print("consistency:", check_consistency(table, model))
+
+    rng = random.Random(42)
+    inputs = [random_answers(rng) for _ in range(args.n)]
+
+    report("pipeline", latency_us(lambda f: model.predict(pd.DataFrame([f]))[0], inputs))
+    report("table", latency_us(table.predict, inputs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-call full cosine matrix (old MealRecommender.predict) vs the precomputed
+MealIndex, on synthetic meal catalogs.
+
+Run from the repo root:
+    python -m benchmarks.bench_meal_similarity [--sizes 10000 100000 1000000]
+        [--queries 50] [--batch 100] [--old-max 10000]
+
+The old path materializes an N x N matrix per request, so it is only run
+up to --old-max meals; beyond that the matrix size is reported instead.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mlops.meal_index import MealIndex
+
+FEATURES = ["Calories", "Proteins", "Carbs", "Fats"]
+
+
+def synthetic_catalog(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.normal(1800, 450, n),  # Calories
+        rng.normal(90, 30, n),     # Proteins
+        rng.normal(220, 60, n),    # Carbs
+        rng.normal(65, 20, n),     # Fats
+    ]).clip(min=0)
+    names = [f"meal {i}" for i in range(n)]
+    return names, X
+
+
+def old_predict(scaler, X, row: int, top_n: int):
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    sim = cosine_similarity(scaler.transform(X))
+    scores = sorted(enumerate(sim[row]), key=lambda x: x[1], reverse=True)
+    return [i for i, _ in scores[1: top_n + 1]]
+
+
+def ms(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--old-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from sklearn.preprocessing import StandardScaler
+
+    print(f"{'meals':>9} {'build ms':>9} {'old ms/q':>10} {'index ms/q':>11} {'batch ms/q':>11}")
+    for n in args.sizes:
+        names, X = synthetic_catalog(n)
+        scaler = StandardScaler().fit(X)
+        rng = np.random.default_rng(1)
+        rows = rng.integers(0, n, args.queries)
+
+        t0 = time.perf_counter()
+        index = MealIndex.from_scaler(names, X, scaler)
+        build = (time.perf_counter() - t0) * 1000
+
+        if n <= args.old_max:
+            old = f"{ms(lambda: old_predict(scaler, X, int(rows[0]), args.top_n), 1):10.1f}"
+        else:
+            old = f"{'N/A':>10}"
+
+        single = ms(lambda: [index.similar([names[r]], args.top_n) for r in rows], 1) / len(rows)
+        batch_names = [names[r] for r in rng.integers(0, n, args.batch)]
+        batch = ms(lambda: index.similar(batch_names, args.top_n), 1) / args.batch
+
+        print(f"{n:>9} {build:>9.1f} {old} {single:>11.3f} {batch:>11.3f}")
+        if n > args.old_max:
+            print(f"{'':>9} (old path skipped: N x N float64 matrix = {n * n * 8 / 1e9:.0f} GB)")
+
+
+if __name__ == "__main__":
+    main()
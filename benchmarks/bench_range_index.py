@@ -0,0 +1,84 @@
+"""
+Nutrition range queries: RangeIndex vs a full boolean-mask scan, and
+filtered similarity vs similarity over the whole catalog.
+
+Run from the repo root:
+    python -m benchmarks.bench_range_index [--sizes 100000 1000000 3000000]
+        [--queries 50]
+
+Filters are "under X kcal with >= Y g protein" at a few selectivities.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_meal_similarity import synthetic_catalog
+from mlops.meal_catalog import FEATURES
+from mlops.meal_index import MealIndex
+from mlops.range_index import RangeIndex
+
+# (max kcal, min protein g): from broad to very selective on the synthetic data
+FILTERS = [(2400, 60), (1500, 110), (900, 150)]
+
+
+def scan(X, max_kcal, min_protein):
+    return np.flatnonzero((X[:, 0] <= max_kcal) & (X[:, 1] >= min_protein))
+
+
+def ms(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        names, X = synthetic_catalog(n)
+        X = X.astype(np.float32)
+        t0 = time.perf_counter()
+        ranges = RangeIndex.build(FEATURES, X)
+        build_s = time.perf_counter() - t0
+        index = MealIndex.from_features(names, X, X.mean(axis=0), X.std(axis=0))
+        rows = np.random.default_rng(1).integers(0, n, args.queries)
+
+        print(f"\n{n} meals (index built in {build_s:.2f}s, {(ranges.order.nbytes + ranges.values.nbytes) / 1e6:.0f} MB)")
+        print(f"{'filter':>14} {'matches':>9} {'scan ms':>8} {'index ms':>9} "
+              f"{'sim+post ms':>12} {'sim filtered ms':>16}")
+        for max_kcal, min_protein in FILTERS:
+            bounds = {"Calories": (None, max_kcal), "Proteins": (min_protein, None)}
+            got = ranges.query(X, bounds)
+            assert np.array_equal(got, scan(X, max_kcal, min_protein))
+
+            scan_ms = ms(lambda: scan(X, max_kcal, min_protein), 5)
+            index_ms = ms(lambda: ranges.query(X, bounds), 5)
+
+            # old way: full similarity then post-filter (needs a deep top-k to
+            # keep top_n after filtering; here the full row, i.e. exact)
+            def sim_then_filter():
+                keep = np.zeros(n, dtype=bool)
+                keep[scan(X, max_kcal, min_protein)] = True
+                for r in rows:
+                    sims = index.unit @ index.unit[r]
+                    sims[~keep] = -np.inf
+                    sims[r] = -np.inf
+                    np.argpartition(-sims, args.top_n)[:args.top_n]
+
+            post_ms = ms(sim_then_filter, 1) / len(rows)
+            filtered_ms = ms(
+                lambda: index.similar_rows(rows, args.top_n, candidates=ranges.query(X, bounds)), 1
+            ) / len(rows)
+            label = f"<={max_kcal}kcal >={min_protein}g"
+            print(f"{label:>14} {len(got):>9} {scan_ms:>8.2f} {index_ms:>9.2f} "
+                  f"{post_ms:>12.2f} {filtered_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Import-time profile of the API entry point, to catch startup regressions.
+
+Run from the repo root:
+    python -m benchmarks.import_profile [--module apps.api.main] [--top 15] [--max-ms 1500]
+
+Uses `python -X importtime` in a fresh interpreter and prints the total
+import time, the slowest packages (self time), and whether any
+of the heavy serving dependencies got pulled in at import. With --max-ms
+the exit status is 1 when the total exceeds the budget.
+"""
+import argparse
+import subprocess
+import sys
+
+HEAVY = ["mlflow", "pandas", "sklearn", "scipy", "openai", "joblib"]
+
+
+def profile(module: str):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    # lines look like: "import time:   self [us] | cumulative | imported package"
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        # keep the indentation of the name: it encodes nesting depth
+        rows.append((name[1:].rstrip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="apps.api.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+
+    target = next(cum for name, _, cum in rows if name == args.module)
+    total_ms = target / 1000
+    loaded = {name.strip() for name, _, _ in rows}
+
+    # attribute self time to the top-level package that owns each module
+    by_package = {}
+    for name, self_us, _ in rows:
+        package = name.strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    print(f"import {args.module}: {total_ms:.1f} ms, {len(loaded)} modules")
+    print("slowest packages (self time summed over their modules):")
+    for package, us in sorted(by_package.items(), key=lambda r: -r[1])[: args.top]:
+        print(f"  {us / 1000:9.1f} ms  {package}")
+
+    heavy = [h for h in HEAVY if h in loaded]
+    print("heavy modules imported at startup:", ", ".join(heavy) if heavy else "none")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"FAIL: {total_ms:.1f} ms > budget {args.max_ms:.1f} ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
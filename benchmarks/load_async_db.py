@@ -0,0 +1,122 @@
+"""
+Threadpool (sync handlers) vs ASYNC_DB=1 (async handlers) under concurrent load.
+
+Run from the repo root:
+    python -m benchmarks.load_async_db [--database-url postgresql+psycopg2://...]
+        [--concurrency 10 50 200 500] [--seconds 10] [--model artifacts/model.joblib]
+
+Starts uvicorn once per mode on the same database (the async mode derives
+its asyncpg / aiosqlite URL from it), then drives /quiz/submit ->
+/quiz/feedback -> /me loops from N concurrent clients and reports
+throughput and tail latency. The model is loaded from a local joblib file
+so MLflow is not needed. Use Postgres for meaningful numbers: SQLite
+serializes writers, which dominates everything else.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from apps.api.ml.lookup import FEATURES, OPTIONS
+
+SERVER = r"""
+import sys, joblib, uvicorn
+from apps.api.ml import recommender
+recommender._state = recommender.LoadedModel(joblib.load(sys.argv[1]), "local")
+from apps.api.main import app
+uvicorn.run(app, port=int(sys.argv[2]), log_level="warning")
+"""
+
+
+def start_server(mode: str, port: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        ASYNC_DB="1" if mode == "async" else "0",
+        MEAL_CATALOG_DIR=os.environ.get("MEAL_CATALOG_DIR", "artifacts/meal_catalog"),
+    )
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, args.model, str(port)], env=env)
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def login(base: str) -> dict:
+    email, password = "loadtest@example.com", "loadtest"
+    httpx.post(f"{base}/auth/register", json={"email": email, "password": password})
+    token = httpx.post(f"{base}/auth/login", json={"email": email, "password": password}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def drive(base: str, headers: dict, concurrency: int, seconds: float):
+    latencies, errors = [], 0
+    stop = time.perf_counter() + seconds
+    answers = {f: opts[0] for f, opts in zip(FEATURES, OPTIONS)}
+
+    async def call(client, method, path, **kw):
+        nonlocal errors
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(method, path, **kw)
+            ok = r.status_code == 200
+        except httpx.HTTPError:
+            r, ok = None, False
+        latencies.append(time.perf_counter() - t0)
+        errors += not ok
+        return r if ok else None
+
+    async def worker(client):
+        while time.perf_counter() < stop:
+            r = await call(client, "POST", "/quiz/submit", json=answers)
+            if r is not None:
+                await call(client, "POST", "/quiz/feedback", json={
+                    "session_id": r.json()["session_id"], "chosen_meal": "load test", "accepted": True,
+                })
+            await call(client, "GET", "/me")
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=headers, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+
+    lat = np.asarray(latencies) * 1000
+    return len(lat) / seconds, np.percentile(lat, 50), np.percentile(lat, 99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--database-url", default=f"sqlite:///{os.path.join(tempfile.gettempdir(), 'what_to_eat_loadtest.db')}"
+    )
+    parser.add_argument("--model", default="artifacts/model.joblib")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in ("threadpool", "async"):
+        proc = start_server(mode, args.port, args)
+        try:
+            base = f"http://127.0.0.1:{args.port}"
+            headers = login(base)
+            for c in args.concurrency:
+                rps, p50, p99, errors = asyncio.run(drive(base, headers, c, args.seconds))
+                print(f"{mode:>10} {c:>8} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Throughput of per-request inference vs the micro-batching dispatcher.
+
+Run from the repo root:
+    python -m benchmarks.load_micro_batching [--model artifacts/model.joblib]
+        [--threads 1 8 32 64] [--seconds 5] [--max-batch 64] [--max-wait-ms 2]
+
+Each worker thread plays one /quiz/submit request thread: it scores one
+random answer set at a time, either calling the sklearn pipeline on a
+one-row DataFrame directly or going through MicroBatcher.
+"""
+import argparse
+import random
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from apps.api.ml.batching import MicroBatcher
+from apps.api.ml.lookup import FEATURES, OPTIONS
+
+
+def run(predict, threads: int, seconds: float):
+    latencies = [[] for _ in range(threads)]
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        rng = random.Random(i)
+        out = latencies[i]
+        while time.perf_counter() < stop:
+            row = {f: rng.choice(opts) for f, opts in zip(FEATURES, OPTIONS)}
+            t0 = time.perf_counter()
+            predict(row)
+            out.append(time.perf_counter() - t0)
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+
+    lat = np.concatenate([np.asarray(x) for x in latencies]) * 1000
+    return len(lat) / seconds, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="artifacts/model.joblib")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+
+    def direct(row):
+        return model.predict_proba(pd.DataFrame([row]))[0]
+
+    batcher = MicroBatcher(
+        lambda rows: list(model.predict_proba(pd.DataFrame(rows))),
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_queue=10_000,
+    )
+
+    print(f"{'threads':>7} {'mode':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for threads in args.threads:
+        for mode, fn in (("direct", direct), ("batched", batcher.submit)):
+            rps, p50, p99 = run(fn, threads, args.seconds)
+            print(f"{threads:>7} {mode:>8} {rps:>9.0f} {p50:>8.2f} {p99:>8.2f}")
+
+    print("dispatcher:", batcher.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Login storm against the API: throughput, 503 shedding, latency of other
+endpoints and peak server RSS, for a few hashing-pool configurations.
+
+Run from the repo root:
+    python -m benchmarks.load_password_hashing [--database-url sqlite:////tmp/bench_auth.db]
+        [--concurrency 64] [--seconds 10] [--configs 40:1000 2:16 4:32]
+
+Each config is PASSWORD_HASH_WORKERS:PASSWORD_HASH_MAX_QUEUE. 40:1000 is
+roughly the old behaviour (hashing on the 40-thread request threadpool,
+nothing rejected). For each config a fresh uvicorn server is started and
+N clients log in back to back while one more client polls /me; peak RSS
+is the server's VmHWM from /proc (Linux only).
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+SERVER = r"""
+import sys, uvicorn
+from apps.api.main import app
+uvicorn.run(app, port=int(sys.argv[1]), log_level="warning")
+"""
+
+EMAIL, PASSWORD = "hashbench@example.com", "correct horse battery staple"
+
+
+def start_server(port: int, workers: int, max_queue: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url,
+        PASSWORD_HASH_WORKERS=str(workers),
+        PASSWORD_HASH_MAX_QUEUE=str(max_queue),
+    )
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], env=env)
+    for _ in range(100):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def storm(base: str, concurrency: int, seconds: float):
+    codes, login_ms, me_ms = {}, [], []
+    deadline = time.perf_counter() + seconds
+    async with httpx.AsyncClient(base_url=base, timeout=120, limits=httpx.Limits(max_connections=concurrency + 1)) as client:
+        await client.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        token = (await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def login_loop():
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                r = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                codes[r.status_code] = codes.get(r.status_code, 0) + 1
+                if r.status_code == 200:
+                    login_ms.append((time.perf_counter() - t0) * 1000)
+                elif r.status_code == 503:
+                    await asyncio.sleep(0.05)
+
+        async def probe_loop():
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                await client.get("/me", headers=headers)
+                me_ms.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(0.02)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(probe_loop(), *(login_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return codes, login_ms, me_ms, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default="sqlite:////tmp/bench_auth.db")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--configs", nargs="+", default=["40:1000", "2:16", "4:32"])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'workers:queue':<14} {'logins/s':>9} {'503s':>6} {'login p50':>10} {'login p99':>10} {'/me p99':>9} {'peak RSS':>9}")
+    for config in args.configs:
+        workers, max_queue = (int(x) for x in config.split(":"))
+        proc = start_server(args.port, workers, max_queue, args)
+        try:
+            codes, login_ms, me_ms, elapsed = asyncio.run(
+                storm(f"http://127.0.0.1:{args.port}", args.concurrency, args.seconds)
+            )
+            rss = peak_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait()
+        ok = codes.get(200, 0)
+        p = lambda xs, q: f"{np.percentile(xs, q):.0f}ms" if xs else "-"
+        print(
+            f"{config:<14} {ok / elapsed:>9.1f} {codes.get(503, 0):>6} {p(login_ms, 50):>10} "
+            f"{p(login_ms, 99):>10} {p(me_ms, 99):>9} {f'{rss:.0f}MB' if rss else '-':>9}"
+        )
+        other = {k: v for k, v in codes.items() if k not in (200, 503)}
+        if other:
+            print(f"  other status codes: {other}")
+
+
+if __name__ == "__main__":
+    main()
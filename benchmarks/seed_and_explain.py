@@ -0,0 +1,191 @@
+"""
+Seed the quiz event tables with synthetic data and EXPLAIN the monitoring /
+export queries, with and without the migration 0002 indexes.
+
+Run from the repo root against a scratch database at `alembic upgrade head`:
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.seed_and_explain
+        [--sessions 1000000] [--days 180] [--feedback-rate 0.3] [--no-seed]
+
+On Postgres, seeding is server-side (INSERT ... SELECT generate_series) and
+plans come from EXPLAIN (ANALYZE, BUFFERS). On SQLite it inserts from Python
+and prints EXPLAIN QUERY PLAN plus wall time (the performance query uses
+Postgres casts and is skipped there).
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, text
+
+from apps.api.core.settings import settings
+from apps.api.db.models import QuizAnswer, QuizSession, Recommendation, User, UserFeedback
+from apps.api.ml.lookup import FEATURES, OPTIONS
+from apps.api.monitoring.current import CURRENT_QUERY
+from apps.api.monitoring.performance_queries import BASE_QUERY
+
+# mlops/export_feedback.py QUERY (that module connects at import time)
+EXPORT_QUERY = """
+SELECT
+    qa.session_id,
+    qa.feature_name,
+    qa.feature_value,
+    uf.chosen_meal AS label_meal,
+    uf.accepted
+FROM quiz_answers qa
+JOIN user_feedback uf
+    ON qa.session_id = uf.session_id
+"""
+
+QUERIES = {
+    "drift: latest answers": (CURRENT_QUERY, {"limit": 500}),
+    "performance: BASE_QUERY": (BASE_QUERY, {}),
+    "export_feedback": (EXPORT_QUERY, {}),
+    "answers of one session": ("SELECT * FROM quiz_answers WHERE session_id = :sid", {"sid": 12345}),
+    "sessions in last 7 days": (
+        "SELECT count(*) FROM quiz_sessions WHERE created_at >= :since",
+        {"since": datetime.now(timezone.utc) - timedelta(days=7)},
+    ),
+}
+
+# migration 0002
+INDEXES = [
+    ("ix_quiz_answers_session_id_feature_name", "quiz_answers", "session_id, feature_name"),
+    ("ix_recommendations_session_id", "recommendations", "session_id"),
+    ("ix_quiz_sessions_created_at", "quiz_sessions", "created_at"),
+]
+
+MEALS = ["Beef Burrito", "Keto Salmon Salad", "Margherita Pizza", "Spicy Chicken Bowl", "Vegan Buddha Bowl"]
+
+
+def seed_postgres(conn, n: int, days: int, feedback_rate: float):
+    conn.execute(text(
+        "INSERT INTO users (email, password_hash) VALUES ('seed@example.com', 'x') ON CONFLICT DO NOTHING"
+    ))
+    uid = conn.execute(text("SELECT id FROM users WHERE email = 'seed@example.com'")).scalar()
+    conn.execute(text("""
+        INSERT INTO quiz_sessions (user_id, mode, model_version, created_at)
+        SELECT :uid, 'ml', 'seed', now() - random() * make_interval(days => :days)
+        FROM generate_series(1, :n)
+    """), {"uid": uid, "n": n, "days": days})
+    features = ", ".join(f"('{f}', ARRAY{[str(o) for o in opts]})" for f, opts in zip(FEATURES, OPTIONS))
+    conn.execute(text(f"""
+        INSERT INTO quiz_answers (session_id, feature_name, feature_value, created_at)
+        SELECT s.id, f.name, f.opts[1 + floor(random() * array_length(f.opts, 1))::int], s.created_at
+        FROM quiz_sessions s
+        CROSS JOIN (VALUES {features}) AS f(name, opts)
+        WHERE s.model_version = 'seed'
+    """))
+    conn.execute(text("""
+        INSERT INTO recommendations (session_id, source, payload, created_at)
+        SELECT s.id, 'ml', json_build_object(
+            'recommended_meal', (ARRAY[:m0, :m1, :m2, :m3, :m4])[1 + floor(random() * 5)::int],
+            'top_k', json_build_array(json_build_object('meal', 'x', 'prob', random()))
+        ), s.created_at
+        FROM quiz_sessions s WHERE s.model_version = 'seed'
+    """), {f"m{i}": m for i, m in enumerate(MEALS)})
+    conn.execute(text("""
+        INSERT INTO user_feedback (session_id, chosen_meal, accepted, created_at)
+        SELECT s.id, 'x', (random() < 0.6)::int, s.created_at
+        FROM quiz_sessions s WHERE s.model_version = 'seed' AND random() < :rate
+    """), {"rate": feedback_rate})
+    conn.execute(text("ANALYZE"))
+
+
+def seed_python(conn, n: int, days: int, feedback_rate: float, batch: int = 20_000):
+    rng = random.Random(0)
+    uid = conn.execute(insert(User).returning(User.id), {"email": f"seed{time.time()}@example.com", "password_hash": "x"}).scalar()
+    now = datetime.now(timezone.utc)
+    next_id = (conn.execute(text("SELECT coalesce(max(id), 0) FROM quiz_sessions")).scalar() or 0) + 1
+    for start in range(0, n, batch):
+        ids = range(next_id + start, next_id + min(start + batch, n))
+        when = {i: now - timedelta(seconds=rng.random() * days * 86400) for i in ids}
+        conn.execute(insert(QuizSession), [
+            {"id": i, "user_id": uid, "mode": "ml", "model_version": "seed", "created_at": when[i]} for i in ids
+        ])
+        conn.execute(insert(QuizAnswer), [
+            {"session_id": i, "feature_name": f, "feature_value": rng.choice(opts), "created_at": when[i]}
+            for i in ids for f, opts in zip(FEATURES, OPTIONS)
+        ])
+        conn.execute(insert(Recommendation), [
+            {"session_id": i, "source": "ml", "created_at": when[i],
+             "payload": {"recommended_meal": rng.choice(MEALS), "top_k": [{"meal": "x", "prob": rng.random()}]}}
+            for i in ids
+        ])
+        conn.execute(insert(UserFeedback), [
+            {"session_id": i, "chosen_meal": "x", "accepted": int(rng.random() < 0.6), "created_at": when[i]}
+            for i in ids if rng.random() < feedback_rate
+        ])
+
+
+def explain(conn, sql: str, params: dict):
+    postgres = conn.dialect.name == "postgresql"
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if postgres else "EXPLAIN QUERY PLAN "
+    plan = conn.execute(text(prefix + sql), params).fetchall()
+    t0 = time.perf_counter()
+    conn.execute(text(sql), params).fetchall()
+    ms = (time.perf_counter() - t0) * 1000
+    lines = [row[0] if postgres else row[-1] for row in plan]
+    return ms, lines
+
+
+def set_indexes(conn, present: bool):
+    for name, table, columns in INDEXES:
+        if present:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+        else:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--feedback-rate", type=float, default=0.3)
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--plans", action="store_true", help="print full plans, not just timings")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    postgres = engine.dialect.name == "postgresql"
+
+    if not args.no_seed:
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            (seed_postgres if postgres else seed_python)(conn, args.sessions, args.days, args.feedback_rate)
+        print(f"Seeded {args.sessions} sessions in {time.perf_counter() - t0:.1f}s")
+
+    results = {}
+    for present in (False, True):
+        with engine.begin() as conn:
+            set_indexes(conn, present)
+            for name, (sql, params) in QUERIES.items():
+                if "::" in sql and not postgres:
+                    continue
+                results[name, present] = explain(conn, sql, params)
+
+    print(f"\n{'query':<28} {'no index ms':>12} {'indexed ms':>11} {'speedup':>8}")
+    for name in QUERIES:
+        if (name, True) not in results:
+            print(f"{name:<28} {'skipped (Postgres only)':>33}")
+            continue
+        before, after = results[name, False][0], results[name, True][0]
+        print(f"{name:<28} {before:>12.1f} {after:>11.1f} {before / max(after, 1e-3):>7.1f}x")
+
+    if args.plans:
+        for (name, present), (_, lines) in results.items():
+            print(f"\n== {name} ({'indexed' if present else 'no index'})")
+            print("\n".join(lines))
+    else:
+        print("\nIndexed plans (--plans for all):")
+        for (name, present), (_, lines) in results.items():
+            if present:
+                print(f"  {name}: {json.dumps(lines[:2])}")
+
+
+if __name__ == "__main__":
+    main()
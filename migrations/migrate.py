@@ -0,0 +1,50 @@
+"""
+Bring the database to head before the API starts (the k8s init container):
+    python -m migrations.migrate
+
+Databases built by the API's create_all() have tables but no
+alembic_version, so they are stamped first: 0001_initial when quiz_answers
+has no created_at yet (built before the migrations existed), otherwise
+0003_answers_created_at (create_all already added everything up to it).
+On Postgres an advisory lock keeps replicas starting together from
+migrating at the same time.
+"""
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+from apps.api.core.settings import settings
+
+LOCK_ID = 0x77746565  # arbitrary, shared by every replica
+
+
+def stamp_for(conn) -> str | None:
+    """Revision to stamp an unversioned create_all() database with (None: nothing to stamp)."""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables or "users" not in tables:
+        return None
+    columns = {c["name"] for c in inspector.get_columns("quiz_answers")}
+    return "0003_answers_created_at" if "created_at" in columns else "0001_initial"
+
+
+def main():
+    config = Config("alembic.ini")
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.connect() as lock:
+        if engine.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": LOCK_ID})
+        try:
+            with engine.connect() as conn:
+                revision = stamp_for(conn)
+            if revision:
+                print(f"Unversioned database built by create_all(): stamping {revision}")
+                command.stamp(config, revision)
+            command.upgrade(config, "head")
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": LOCK_ID})
+
+
+if __name__ == "__main__":
+    main()
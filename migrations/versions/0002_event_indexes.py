@@ -0,0 +1,46 @@
+"""indexes for the monitoring / export joins on quiz event tables
+
+- quiz_answers (session_id, feature_name): drift's ORDER BY session_id DESC
+  LIMIT, export_feedback's join to user_feedback, and per-session answers
+- recommendations (session_id): performance BASE_QUERY join
+- quiz_sessions (created_at): time-window scans (drift, performance by day)
+
+On Postgres the indexes are built CONCURRENTLY, so a live database keeps
+taking writes while they build.
+
+Revision ID: 0002_event_indexes
+Revises: 0001_initial
+Create Date: 2026-10-18 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_event_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_quiz_answers_session_id_feature_name", "quiz_answers", ["session_id", "feature_name"]),
+    ("ix_recommendations_session_id", "recommendations", ["session_id"]),
+    ("ix_quiz_sessions_created_at", "quiz_sessions", ["created_at"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
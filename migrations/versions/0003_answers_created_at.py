@@ -0,0 +1,44 @@
+"""quiz_answers.created_at (backfilled from the session)
+
+Gives answer rows their own timestamp so they can be time-partitioned
+(0004) and windowed without a join back to quiz_sessions.
+
+Revision ID: 0003_answers_created_at
+Revises: 0002_event_indexes
+Create Date: 2026-10-18 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_answers_created_at"
+down_revision: Union[str, Sequence[str], None] = "0002_event_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("quiz_answers") as batch:
+        batch.add_column(sa.Column("created_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE quiz_answers
+        SET created_at = (SELECT s.created_at FROM quiz_sessions s WHERE s.id = quiz_answers.session_id)
+    """)
+    with op.batch_alter_table("quiz_answers") as batch:
+        batch.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("quiz_answers") as batch:
+        batch.drop_column("created_at")
@@ -0,0 +1,109 @@
+"""optional: partition quiz_answers / recommendations by month (Postgres)
+
+Opt-in, because it rewrites both tables:
+
+    alembic -x partition_events=1 upgrade head
+
+Without the flag (or on SQLite) this revision is a no-op. To partition a
+database that already ran it as a no-op:
+
+    alembic downgrade 0003_answers_created_at
+    alembic -x partition_events=1 upgrade head
+
+Each table is swapped for a PARTITION BY RANGE (created_at) table with the
+same columns, indexes and id sequence; the primary key becomes
+(id, created_at) since Postgres requires the partition key in it. Monthly
+partitions cover the existing data plus MONTHS_AHEAD months; the API keeps
+creating future months at startup (apps/api/db/partitions.py). Old months
+can then be detached/dropped instead of DELETEd.
+
+Revision ID: 0004_partition_events
+Revises: 0003_answers_created_at
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import text
+
+from apps.api.db.partitions import PARTITIONED_TABLES, ensure_partitions, is_partitioned
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_partition_events"
+down_revision: Union[str, Sequence[str], None] = "0003_answers_created_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = {
+    "quiz_answers": [
+        ("session_id", "integer NOT NULL REFERENCES quiz_sessions (id)"),
+        ("feature_name", "varchar(100) NOT NULL"),
+        ("feature_value", "varchar(100) NOT NULL"),
+    ],
+    "recommendations": [
+        ("session_id", "integer NOT NULL REFERENCES quiz_sessions (id)"),
+        ("source", "varchar(20) NOT NULL"),
+        ("payload", "json NOT NULL"),
+    ],
+}
+INDEXES = {
+    "quiz_answers": [("ix_quiz_answers_session_id_feature_name", "session_id, feature_name")],
+    "recommendations": [("ix_recommendations_session_id", "session_id")],
+}
+
+
+def _enabled(conn) -> bool:
+    flag = context.get_x_argument(as_dictionary=True).get("partition_events", "")
+    return conn.dialect.name == "postgresql" and flag.lower() in ("1", "true", "yes")
+
+
+def _swap(conn, table: str, partitioned: bool):
+    old = f"{table}_old"
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    # index names are schema-wide: move the old ones out of the way
+    for name in [f"{table}_pkey"] + [name for name, _ in INDEXES[table]]:
+        conn.execute(text(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old"))
+
+    columns = ",\n".join(f"{name} {ddl}" for name, ddl in COLUMNS[table])
+    pk = "PRIMARY KEY (id, created_at)" if partitioned else "PRIMARY KEY (id)"
+    partition_by = "PARTITION BY RANGE (created_at)" if partitioned else ""
+    conn.execute(text(f"""
+        CREATE TABLE {table} (
+            id integer NOT NULL DEFAULT nextval('{table}_id_seq'),
+            {columns},
+            created_at timestamptz NOT NULL DEFAULT now(),
+            {pk}
+        ) {partition_by}
+    """))
+    for name, index_columns in INDEXES[table]:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({index_columns})"))
+
+    if partitioned:
+        first = conn.execute(text(f"SELECT min(created_at) FROM {old}")).scalar()
+        ensure_partitions(conn, start=first.date() if first else None)
+
+    names = ", ".join(["id"] + [name for name, _ in COLUMNS[table]] + ["created_at"])
+    conn.execute(text(f"INSERT INTO {table} ({names}) SELECT {names} FROM {old}"))
+    # keep the id sequence alive (and owned) when the old table is dropped
+    conn.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    conn.execute(text(f"DROP TABLE {old}"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    if not _enabled(conn):
+        return
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            _swap(conn, table, partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(conn, table):
+            _swap(conn, table, partitioned=False)
@@ -0,0 +1,86 @@
+"""drift_counts: hourly per-feature category counts for /monitoring/drift
+
+Backfilled from the existing quiz_answers / recommendations. Stop the API
+(or run with DRIFT_COUNTS_FLUSH_SECONDS=0) while this runs: counters
+flushed during the backfill would be overwritten.
+
+Revision ID: 0005_drift_counts
+Revises: 0004_partition_events
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Frozen copies of the tables as of this revision: the backfill must not
+# change when the application models do
+quiz_sessions = sa.table("quiz_sessions", sa.column("id"), sa.column("created_at", sa.DateTime(timezone=True)))
+quiz_answers = sa.table(
+    "quiz_answers", sa.column("session_id"), sa.column("feature_name"), sa.column("feature_value")
+)
+recommendations = sa.table("recommendations", sa.column("session_id"), sa.column("payload", sa.JSON))
+drift_counts = sa.table(
+    "drift_counts", sa.column("hour"), sa.column("feature_name"), sa.column("feature_value"), sa.column("count")
+)
+SESSIONS = "_sessions"
+PREDICTED = "predicted_meal"
+
+
+def _hour(conn):
+    """created_at truncated to the UTC hour, stored the way the application writes hours."""
+    if conn.dialect.name == "postgresql":
+        utc = sa.func.timezone("UTC", quiz_sessions.c.created_at)
+        return sa.func.timezone("UTC", sa.func.date_trunc("hour", utc))
+    return sa.func.strftime("%Y-%m-%d %H:00:00.000000", quiz_sessions.c.created_at)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_drift_counts"
+down_revision: Union[str, Sequence[str], None] = "0004_partition_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # an API with DB_AUTO_CREATE may have created it already
+    if not sa.inspect(conn).has_table("drift_counts"):
+        op.create_table(
+            "drift_counts",
+            sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("feature_name", sa.String(length=100), nullable=False),
+            sa.Column("feature_value", sa.String(length=100), nullable=False),
+            sa.Column("count", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("hour", "feature_name", "feature_value"),
+        )
+
+    hour = _hour(conn)
+    meal = recommendations.c.payload["recommended_meal"].as_string()
+    columns = ["hour", "feature_name", "feature_value", "count"]
+    op.execute(drift_counts.delete())
+    op.execute(drift_counts.insert().from_select(columns, (
+        sa.select(hour, sa.literal(SESSIONS), sa.literal(""), sa.func.count())
+        .where(quiz_sessions.c.created_at.is_not(None))
+        .group_by(hour)
+    )))
+    op.execute(drift_counts.insert().from_select(columns, (
+        sa.select(hour, quiz_answers.c.feature_name, quiz_answers.c.feature_value, sa.func.count())
+        .select_from(quiz_answers.join(quiz_sessions, quiz_sessions.c.id == quiz_answers.c.session_id))
+        .where(quiz_sessions.c.created_at.is_not(None))
+        .group_by(hour, quiz_answers.c.feature_name, quiz_answers.c.feature_value)
+    )))
+    op.execute(drift_counts.insert().from_select(columns, (
+        sa.select(hour, sa.literal(PREDICTED), meal, sa.func.count())
+        .select_from(recommendations.join(quiz_sessions, quiz_sessions.c.id == recommendations.c.session_id))
+        .where(quiz_sessions.c.created_at.is_not(None), meal.is_not(None))
+        .group_by(hour, meal)
+    )))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("drift_counts")
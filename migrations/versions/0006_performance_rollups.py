@@ -0,0 +1,101 @@
+"""performance_rollups: daily acceptance counts for /monitoring/performance
+
+Keyed by (day, model_version, confidence_bucket) and kept up to date from a
+user_feedback.id high-water mark in rollup_state. Backfilled here from the
+existing feedback, in batches.
+
+Revision ID: 0006_performance_rollups
+Revises: 0005_drift_counts
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Frozen copies of the tables as of this revision: the backfill must not
+# change when the application models do
+quiz_sessions = sa.table(
+    "quiz_sessions", sa.column("id"), sa.column("model_version"), sa.column("created_at", sa.DateTime(timezone=True))
+)
+recommendations = sa.table("recommendations", sa.column("session_id"), sa.column("payload", sa.JSON))
+user_feedback = sa.table("user_feedback", sa.column("id"), sa.column("session_id"), sa.column("accepted"))
+performance_rollups = sa.table(
+    "performance_rollups", sa.column("day"), sa.column("model_version"), sa.column("confidence_bucket"),
+    sa.column("samples"), sa.column("accepted"),
+)
+rollup_state = sa.table("rollup_state", sa.column("name"), sa.column("high_water"))
+
+
+def _day(conn):
+    if conn.dialect.name == "postgresql":
+        return sa.func.date(sa.func.timezone("UTC", quiz_sessions.c.created_at))
+    return sa.func.date(quiz_sessions.c.created_at)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_performance_rollups"
+down_revision: Union[str, Sequence[str], None] = "0005_drift_counts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # an API with DB_AUTO_CREATE may have created them already
+    inspector = sa.inspect(conn)
+    if not inspector.has_table("performance_rollups"):
+        op.create_table(
+            "performance_rollups",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("model_version", sa.String(length=100), nullable=False),
+            sa.Column("confidence_bucket", sa.String(length=20), nullable=False),
+            sa.Column("samples", sa.BigInteger(), nullable=False),
+            sa.Column("accepted", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("day", "model_version", "confidence_bucket"),
+        )
+    if not inspector.has_table("rollup_state"):
+        op.create_table(
+            "rollup_state",
+            sa.Column("name", sa.String(length=50), nullable=False),
+            sa.Column("high_water", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+    # all feedback so far in one INSERT ... SELECT (nothing writes feedback
+    # during a migration), then the high-water mark past it
+    day = _day(conn)
+    model = sa.func.coalesce(quiz_sessions.c.model_version, "")
+    prob = recommendations.c.payload[("top_k", 0, "prob")].as_float()
+    bucket = sa.case(
+        (prob.is_(None), "unknown"),
+        (prob >= 0.9, "0.9-1.0"),
+        (prob >= 0.7, "0.7-0.9"),
+        (prob >= 0.5, "0.5-0.7"),
+        else_="<0.5",
+    )
+    op.execute(performance_rollups.delete())
+    op.execute(performance_rollups.insert().from_select(
+        ["day", "model_version", "confidence_bucket", "samples", "accepted"],
+        sa.select(day, model, bucket, sa.func.count(), sa.func.coalesce(sa.func.sum(user_feedback.c.accepted), 0))
+        .select_from(
+            user_feedback
+            .join(quiz_sessions, quiz_sessions.c.id == user_feedback.c.session_id)
+            .join(recommendations, recommendations.c.session_id == user_feedback.c.session_id)
+        )
+        .group_by(day, model, bucket),
+    ))
+    op.execute(rollup_state.delete().where(rollup_state.c.name == "performance"))
+    op.execute(rollup_state.insert().from_select(
+        ["name", "high_water"],
+        sa.select(sa.literal("performance"), sa.func.coalesce(sa.func.max(user_feedback.c.id), 0)),
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rollup_state")
+    op.drop_table("performance_rollups")
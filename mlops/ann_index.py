@@ -0,0 +1,90 @@
+import numpy as np
+
+# The API searches the saved index with its own copy of load/search
+# (apps/api/ml/meal_index.py): keep the two in sync.
+
+# Rows used to fit the centroids; assignment still covers the whole catalog
+TRAIN_SAMPLE = 100_000
+ASSIGN_BLOCK = 200_000
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index for unit vectors (cosine).
+
+    Spherical k-means splits the catalog into `n_lists` cells; a query only
+    scores the rows in its `n_probe` closest cells. n_probe is the
+    recall/latency knob: n_probe == n_lists is exact brute force.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, rows: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets  # cell c holds rows[offsets[c]:offsets[c + 1]]
+        self.rows = rows
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, unit: np.ndarray, n_lists: int = 0, n_iter: int = 10, seed: int = 0):
+        n = len(unit)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(seed)
+
+        sample = unit[rng.choice(n, min(n, TRAIN_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.divide(sums, norms, out=centroids, where=~empty[:, None])
+            # re-seed empty cells from random sample rows
+            if empty.any():
+                centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, ASSIGN_BLOCK):
+            assign[start:start + ASSIGN_BLOCK] = (unit[start:start + ASSIGN_BLOCK] @ centroids.T).argmax(axis=1)
+
+        rows = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+        return cls(centroids.astype(np.float32), offsets, rows)
+
+    def save(self, path: str):
+        np.savez(path, centroids=self.centroids, offsets=self.offsets, rows=self.rows)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as f:
+            return cls(f["centroids"], f["offsets"], f["rows"])
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        n_probe = min(max(n_probe, 1), self.n_lists)
+        cell_scores = self.centroids @ query
+        cells = np.argpartition(-cell_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+
+    def search(self, unit: np.ndarray, queries, k: int, n_probe: int, exclude_self: bool = False):
+        """
+        Approximate top-k rows of `unit` for each row id in `queries`,
+        best first (skipping the query row itself with exclude_self).
+        """
+        out_idx, out_scores = [], []
+        for q in queries:
+            cand = self.candidates(unit[q], n_probe)
+            if exclude_self:
+                cand = cand[cand != q]
+            sims = unit[cand] @ unit[q]
+            kk = min(k, len(cand))
+            if kk > 0:
+                top = np.argpartition(-sims, kk - 1)[:kk]
+                top = top[np.argsort(-sims[top], kind="stable")]
+            else:
+                top = np.empty(0, dtype=np.intp)
+            out_idx.append(cand[top])
+            out_scores.append(sims[top])
+        return out_idx, out_scores
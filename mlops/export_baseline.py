@@ -0,0 +1,75 @@
+import os
+import json
+import sys
+
+# Must stay in sync with apps/api/monitoring/baseline.py (the API-side loader).
+FORMAT_VERSION = 1
+ARTIFACT_PATH = "baseline"
+FREQUENCIES_FILE = "frequencies.json"
+# Pseudo-feature holding the model's predicted-label counts on the same rows
+PREDICTED = "predicted_meal"
+# Baselines count the training split only, never the full CSV, so drift
+# scores don't depend on whether a run's artifact or the fallback loaded.
+# The training scripts split with these too.
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+TRAIN_SPLIT = f"train split (test_size={TEST_SIZE}, random_state={RANDOM_STATE}, stratified)"
+
+FEATURES = [
+    "meal_time","spicy","diet","gluten_free","dairy_free",
+    "cuisine","budget","prep_time","protein_pref","health_goal"
+]
+
+
+def _counts(values) -> dict:
+    import pandas as pd
+
+    return {str(k): int(v) for k, v in pd.Series(values).astype(str).value_counts().sort_index().items()}
+
+
+def train_split(*arrays, stratify):
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(*arrays, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=stratify)
+
+
+def baseline_frequencies(X, predictions=None, data: str = TRAIN_SPLIT) -> dict:
+    """
+    Per-feature category counts of the training frame (what drift compares
+    against), plus the model's predictions on it as PREDICTED when given.
+    `data` records which rows X is.
+    """
+    features = {f: _counts(X[f]) for f in FEATURES if f in X}
+    if predictions is not None:
+        features[PREDICTED] = _counts(predictions)
+    return {"format": FORMAT_VERSION, "data": data, "rows": int(len(X)), "features": features}
+
+
+def export_baseline(X, out_dir: str, predictions=None, data: str = TRAIN_SPLIT) -> str:
+    """Write the baseline artifact directory; returns it (log it under ARTIFACT_PATH)."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, FREQUENCIES_FILE), "w") as f:
+        json.dump(baseline_frequencies(X, predictions, data), f, indent=1, sort_keys=True)
+    return out_dir
+
+
+if __name__ == "__main__":
+    # Regenerate the committed fallback the API uses for runs without a
+    # baseline artifact, from the same training split train_classifier.py fits on:
+    #   python mlops/export_baseline.py [csv] [out.json] [model.joblib]
+    import pandas as pd
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "data/synth_meals.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "data/baseline_frequencies.json"
+    model_path = sys.argv[3] if len(sys.argv) > 3 else "artifacts/model.joblib"
+    target = os.getenv("TARGET", "label_meal")
+    df = pd.read_csv(src)
+    X, _ = train_split(df.drop(columns=[target]), stratify=df[target])
+    predictions = None
+    if os.path.exists(model_path):
+        import joblib
+
+        predictions = joblib.load(model_path).predict(X[FEATURES])
+    with open(dst, "w") as f:
+        json.dump(baseline_frequencies(X, predictions, f"{TRAIN_SPLIT} of {src}"), f, indent=1, sort_keys=True)
+    print(f"Wrote {dst} ({len(X)} of {len(df)} rows: {TRAIN_SPLIT})")
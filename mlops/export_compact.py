@@ -0,0 +1,50 @@
+import os
+import json
+import numpy as np
+
+# Must stay in sync with apps/api/ml/compact.py (the API-side loader).
+WEIGHTS_FILE = "weights.npz"
+VOCAB_FILE = "vocab.json"
+FORMAT_VERSION = 1
+ARTIFACT_PATH = "compact"
+
+
+def fold_pipeline(pipe):
+    """
+    Fold a ColumnTransformer(OneHotEncoder) + LogisticRegression pipeline into
+    one weight row per (feature, category) plus an intercept.
+    """
+    pre = pipe.named_steps["pre"]
+    clf = pipe.named_steps["clf"]
+
+    _, encoder, features = pre.transformers_[0]
+    categories = {f: [str(c) for c in cats] for f, cats in zip(features, encoder.categories_)}
+
+    coef = clf.coef_
+    intercept = clf.intercept_
+    if coef.shape[0] == 1:
+        # binary LR is a sigmoid over one score; softmax over [0, z] is the same
+        coef = np.vstack([np.zeros_like(coef), coef])
+        intercept = np.concatenate([[0.0], intercept])
+
+    # one-hot column j is category j in encoder order; last row = unknown
+    weights = np.vstack([coef.T, np.zeros((1, coef.shape[0]))])
+
+    vocab = {
+        "format": FORMAT_VERSION,
+        "features": list(features),
+        "categories": categories,
+        "classes": [str(c) for c in clf.classes_],
+    }
+    return vocab, weights, intercept
+
+
+def export_compact(pipe, out_dir: str) -> str:
+    vocab, weights, intercept = fold_pipeline(pipe)
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.savez(os.path.join(out_dir, WEIGHTS_FILE), weights=weights, intercept=intercept)
+    with open(os.path.join(out_dir, VOCAB_FILE), "w") as f:
+        json.dump(vocab, f, indent=2)
+
+    return out_dir
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import numpy as np
+
+try:
+    from meal_index import MealIndex  # training script / MLflow code_paths
+    from range_index import RangeIndex
+except ImportError:
+    from mlops.meal_index import MealIndex  # imported as a package (benchmarks)
+    from mlops.range_index import RangeIndex
+
+# Compact meal catalog artifact (a directory):
+#   vectors.npy   float32 (n, 4) scaled + unit-normalized features, for similarity
+#   features.npy  float32 (n, 4) raw nutrition values (FEATURES order)
+#   meta.json     columnar metadata returned to clients + scaler params
+#   range_order.npy / range_values.npy
+#                 RangeIndex over FEATURES (per-feature sorted row ids / values)
+# The .npy files are memory-mapped at load: near-instant, and the pages are
+# file-backed, so every worker process on the host shares one copy.
+# The API reads it with its own copy of the loader (apps/api/ml/meal_catalog.py):
+# keep the two in sync.
+FEATURES = ["Calories", "Proteins", "Carbs", "Fats"]
+META_COLUMNS = [
+    "meal_name", "meal_type", "diet_type", "cooking_method",
+    "prep_time_min", "cook_time_min", "serving_size_g", "rating",
+]
+VECTORS_FILE = "vectors.npy"
+FEATURES_FILE = "features.npy"
+META_FILE = "meta.json"
+RANGE_ORDER_FILE = "range_order.npy"
+RANGE_VALUES_FILE = "range_values.npy"
+FORMAT_VERSION = 1
+
+
+def save_catalog(df, scaler, out_dir: str) -> str:
+    os.makedirs(out_dir, exist_ok=True)
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+
+    np.save(os.path.join(out_dir, VECTORS_FILE), MealIndex.normalize(X, scaler.mean_, scaler.scale_))
+    np.save(os.path.join(out_dir, FEATURES_FILE), X)
+
+    ranges = RangeIndex.build(FEATURES, X)
+    np.save(os.path.join(out_dir, RANGE_ORDER_FILE), ranges.order)
+    np.save(os.path.join(out_dir, RANGE_VALUES_FILE), ranges.values)
+
+    columns = [c for c in META_COLUMNS if c in df.columns]
+    meta = {
+        "format": FORMAT_VERSION,
+        "features": FEATURES,
+        "scaler_mean": [float(v) for v in scaler.mean_],
+        "scaler_scale": [float(v) for v in scaler.scale_],
+        # NaN is not valid JSON; missing values become null
+        "columns": {
+            c: [None if v != v else v for v in df[c].tolist()]
+            for c in columns
+        },
+    }
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    return out_dir
+
+
+class MealCatalog:
+    def __init__(self, index: MealIndex, features: np.ndarray, columns: dict, mean, scale, ranges=None):
+        self.index = index
+        self.features = features
+        self.ranges = ranges if ranges is not None else RangeIndex.build(FEATURES, features)
+        self.columns = columns
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.index)
+
+    def filter(self, bounds: dict) -> np.ndarray:
+        """Row ids within {feature: (lo, hi)} nutrition bounds (inclusive, None = open)."""
+        return self.ranges.query(self.features, bounds)
+
+    def records(self, rows) -> list:
+        """Client-facing fields for the given row ids."""
+        out = []
+        for r in rows:
+            rec = {c: values[r] for c, values in self.columns.items()}
+            rec.update(zip(FEATURES, (float(v) for v in self.features[r])))
+            out.append(rec)
+        return out
+
+
+def load_catalog(path: str, mmap: bool = True) -> MealCatalog:
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        raise RuntimeError(f"Unsupported meal catalog format: {meta.get('format')}")
+
+    mode = "r" if mmap else None
+    vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode=mode)
+    features = np.load(os.path.join(path, FEATURES_FILE), mmap_mode=mode)
+
+    ranges = None
+    if os.path.exists(os.path.join(path, RANGE_ORDER_FILE)):
+        ranges = RangeIndex(
+            meta["features"],
+            np.load(os.path.join(path, RANGE_ORDER_FILE), mmap_mode=mode),
+            np.load(os.path.join(path, RANGE_VALUES_FILE), mmap_mode=mode),
+        )
+
+    index = MealIndex(meta["columns"]["meal_name"], vectors)
+    return MealCatalog(index, features, meta["columns"], meta["scaler_mean"], meta["scaler_scale"], ranges)
+
+
+if __name__ == "__main__":
+    # Convert an existing meals.csv + scaler.pkl:
+    #   python mlops/meal_catalog.py artifacts/meals.csv artifacts/scaler.pkl artifacts/meal_catalog
+    import joblib
+    import pandas as pd
+
+    csv_path, scaler_path, out_dir = sys.argv[1:4]
+    save_catalog(pd.read_csv(csv_path), joblib.load(scaler_path), out_dir)
+    print("Saved:", out_dir)
@@ -0,0 +1,115 @@
+import numpy as np
+
+# The API searches with its own copy (apps/api/ml/meal_index.py): keep the two in sync.
+
+# Cap on the (queries x meals) similarity block computed at once (~128 MB float32)
+MAX_BLOCK = 32_000_000
+
+
+class MealIndex:
+    """
+    Exact cosine-similarity index over standardized meal features.
+
+    Rows are scaled once and normalized to unit length at build time, so a
+    query is one matrix-vector product plus an argpartition top-k -- no
+    N x N matrix and no full sort.
+    """
+
+    def __init__(self, names, unit: np.ndarray):
+        self.names = list(names)
+        # unit-length rows (possibly a read-only memory map)
+        self.unit = unit
+
+        # first occurrence wins, matching a pandas lookup on a duplicated name
+        self.row_of = {}
+        for i, name in enumerate(self.names):
+            self.row_of.setdefault(name, i)
+
+        # optional approximate index (ann_index.IVFIndex) for large catalogs
+        self.ann = None
+        self.n_probe = 8
+
+    @staticmethod
+    def normalize(X: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        Z = (np.asarray(X, dtype=np.float32) - np.asarray(mean, dtype=np.float32)) / np.asarray(scale, dtype=np.float32)
+        norms = np.linalg.norm(Z, axis=1, keepdims=True)
+        # all-zero rows stay zero: similarity 0 to everything, like cosine_similarity
+        return np.divide(Z, norms, out=np.zeros_like(Z), where=norms > 0)
+
+    @classmethod
+    def from_features(cls, names, X: np.ndarray, mean: np.ndarray, scale: np.ndarray):
+        return cls(names, cls.normalize(X, mean, scale))
+
+    @classmethod
+    def from_scaler(cls, names, X: np.ndarray, scaler):
+        return cls.from_features(names, X, scaler.mean_, scaler.scale_)
+
+    def __len__(self):
+        return len(self.names)
+
+    def top_k(self, sims: np.ndarray, k: int, exclude: np.ndarray | None = None):
+        """Indices and scores of the k best columns per row of sims, best first."""
+        if exclude is not None:
+            sims[np.arange(len(sims)), exclude] = -np.inf
+        k = min(k, sims.shape[1] - (exclude is not None))
+        if k <= 0:
+            return np.empty((len(sims), 0), dtype=np.intp), np.empty((len(sims), 0), dtype=sims.dtype)
+
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+    def similar_rows(self, rows, top_n: int, exact: bool = False, candidates=None):
+        """
+        Top-n neighbours (excluding the row itself) for each row id,
+        optionally only among the `candidates` row ids (e.g. a range filter).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        top_n = max(int(top_n), 0)
+        if candidates is not None:
+            return self._similar_among(rows, top_n, np.asarray(candidates, dtype=np.intp))
+        if self.ann is not None and not exact:
+            return self.ann.search(self.unit, rows, top_n, self.n_probe, exclude_self=True)
+
+        idx = np.empty((len(rows), min(top_n, max(len(self) - 1, 0))), dtype=np.intp)
+        scores = np.empty(idx.shape, dtype=np.float32)
+
+        step = max(1, MAX_BLOCK // max(len(self), 1))
+        for start in range(0, len(rows), step):
+            block = rows[start:start + step]
+            sims = self.unit[block] @ self.unit.T
+            idx[start:start + step], scores[start:start + step] = self.top_k(sims, top_n, exclude=block)
+        return idx, scores
+
+    def _similar_among(self, rows, top_n: int, candidates: np.ndarray):
+        # exact search over the gathered candidate vectors only; the ANN cells
+        # don't help once a filter has already narrowed the set
+        cand_unit = self.unit[candidates]
+        out_idx, out_scores = [], []
+        step = max(1, MAX_BLOCK // max(len(candidates), 1))
+        for start in range(0, len(rows), step):
+            block = rows[start:start + step]
+            sims = self.unit[block] @ cand_unit.T
+            sims[block[:, None] == candidates[None, :]] = -np.inf
+            idx, scores = self.top_k(sims, top_n)
+            for i, s in zip(idx, scores):
+                keep = s > -np.inf
+                out_idx.append(candidates[i[keep]])
+                out_scores.append(s[keep])
+        return out_idx, out_scores
+
+    def similar(self, names, top_n: int, exact: bool = False, candidates=None):
+        """
+        Per name: (row ids, scores) of the top-n most similar meals, or None
+        if the name is not in the catalog.
+        """
+        known = [(i, self.row_of[n]) for i, n in enumerate(names) if n in self.row_of]
+        out = [None] * len(names)
+        if not known:
+            return out
+
+        idx, scores = self.similar_rows([row for _, row in known], top_n, exact, candidates)
+        for (i, _), r, s in zip(known, idx, scores):
+            out[i] = (r, s)
+        return out
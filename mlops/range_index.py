@@ -0,0 +1,88 @@
+import numpy as np
+
+# The API queries with its own copy (apps/api/ml/meal_catalog.py): keep the two in sync.
+
+# If even the most selective bound matches more than this fraction of the
+# catalog, a sequential scan of the columns beats gathering the candidates
+SCAN_FRACTION = 0.05
+
+
+class RangeIndex:
+    """
+    Sorted per-attribute index for nutrition range filters
+    ("Calories <= 600 and Proteins >= 30").
+
+    For every feature column we keep the row ids sorted by value plus the
+    sorted values, so one bound pair is two binary searches. A query starts
+    from the most selective attribute's slice and checks the remaining
+    bounds on those candidates only -- never a pass over the whole catalog.
+    """
+
+    def __init__(self, features: list, order: np.ndarray, values: np.ndarray):
+        self.features = list(features)
+        self.col = {f: j for j, f in enumerate(self.features)}
+        # (n_features, n_rows): order[j] = row ids sorted by feature j,
+        # values[j] = that feature's values in the same order
+        self.order = order
+        self.values = values
+
+    @classmethod
+    def build(cls, features: list, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float32)
+        index_dtype = np.int32 if len(X) < 2**31 else np.int64
+        order = np.argsort(X, axis=0, kind="stable").T.astype(index_dtype)
+        values = np.take_along_axis(X, order.T.astype(np.intp), axis=0).T
+        return cls(features, np.ascontiguousarray(order), np.ascontiguousarray(values))
+
+    def __len__(self):
+        return self.order.shape[1]
+
+    def span(self, feature: str, lo=None, hi=None):
+        """[start, stop) positions in order[feature] with lo <= value <= hi."""
+        vals = self.values[self.col[feature]]
+        start = 0 if lo is None else int(np.searchsorted(vals, lo, side="left"))
+        stop = len(vals) if hi is None else int(np.searchsorted(vals, hi, side="right"))
+        return start, max(start, stop)
+
+    def query(self, X: np.ndarray, bounds: dict) -> np.ndarray:
+        """
+        Sorted row ids matching every {feature: (lo, hi)} bound (inclusive,
+        None = open). X is the raw feature matrix the index was built from,
+        used to check the secondary bounds on the candidate rows.
+        """
+        bounds = {f: b for f, b in bounds.items() if b != (None, None)}
+        for f in bounds:
+            if f not in self.col:
+                raise KeyError(f"Unknown feature: {f}")
+        if not bounds:
+            return np.arange(len(self), dtype=np.intp)
+
+        spans = {f: self.span(f, *b) for f, b in bounds.items()}
+        first = min(spans, key=lambda f: spans[f][1] - spans[f][0])
+        start, stop = spans[first]
+        if stop - start > SCAN_FRACTION * len(self):
+            return self._scan(X, bounds)
+        # ascending row ids: the gathers below then walk X front to back
+        rows = np.sort(self.order[self.col[first], start:stop]).astype(np.intp)
+
+        for f, (lo, hi) in bounds.items():
+            if f == first or len(rows) == 0:
+                continue
+            v = X[rows, self.col[f]]
+            keep = np.ones(len(rows), dtype=bool)
+            if lo is not None:
+                keep &= v >= lo
+            if hi is not None:
+                keep &= v <= hi
+            rows = rows[keep]
+        return rows
+
+    def _scan(self, X: np.ndarray, bounds: dict) -> np.ndarray:
+        keep = np.ones(len(X), dtype=bool)
+        for f, (lo, hi) in bounds.items():
+            v = X[:, self.col[f]]
+            if lo is not None:
+                keep &= v >= lo
+            if hi is not None:
+                keep &= v <= hi
+        return np.flatnonzero(keep)
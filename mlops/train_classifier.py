@@ -4,13 +4,15 @@ import joblib
 import pandas as pd
 import mlflow
 
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.metrics import accuracy_score, f1_score
 from sklearn.linear_model import LogisticRegression
 
+from export_compact import export_compact, ARTIFACT_PATH as COMPACT_ARTIFACT_PATH
+from export_baseline import export_baseline, train_split, TRAIN_SPLIT, ARTIFACT_PATH as BASELINE_ARTIFACT_PATH, FREQUENCIES_FILE
+
 DATA_PATH = os.getenv("DATA_PATH", "/app/data/synth_meals.csv")
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 EXPERIMENT = os.getenv("MLFLOW_EXPERIMENT", "what_to_eat_classifier")
@@ -36,9 +38,8 @@ def main():
     clf = LogisticRegression(max_iter=3000)
     pipe = Pipeline([("pre", pre), ("clf", clf)])
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    # same split the committed fallback baseline is counted from
+    X_train, X_test, y_train, y_test = train_split(X, y, stratify=y)
 
     with mlflow.start_run() as run:
         pipe.fit(X_train, y_train)
@@ -58,9 +59,22 @@ def main():
             joblib.dump(pipe, model_path)
             mlflow.log_artifact(model_path, artifact_path="model")
 
+            # Compact NumPy-only export for sklearn-free serving
+            compact_dir = export_compact(pipe, os.path.join(td, COMPACT_ARTIFACT_PATH))
+            mlflow.log_artifacts(compact_dir, artifact_path=COMPACT_ARTIFACT_PATH)
+
+            # Training-set category and predicted-label counts: /monitoring/drift's baseline for this run
+            baseline_dir = export_baseline(
+                X_train, os.path.join(td, BASELINE_ARTIFACT_PATH), predictions=pipe.predict(X_train),
+                data=f"{TRAIN_SPLIT} of {DATA_PATH}",
+            )
+            mlflow.log_artifacts(baseline_dir, artifact_path=BASELINE_ARTIFACT_PATH)
+
         # Tag where the artifact is, so API can find it.
         mlflow.set_tag("model_artifact", "model/model.joblib")
         mlflow.set_tag("model_kind", "sklearn_pipeline_joblib")
+        mlflow.set_tag("compact_artifact", COMPACT_ARTIFACT_PATH)
+        mlflow.set_tag("baseline_artifact", f"{BASELINE_ARTIFACT_PATH}/{FREQUENCIES_FILE}")
 
         print(
             {
@@ -3,9 +3,13 @@ import pandas as pd
 import mlflow
 import mlflow.pyfunc
 import joblib
+import numpy as np
 
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
+
+from meal_index import MealIndex
+from ann_index import IVFIndex
+from meal_catalog import load_catalog, save_catalog
 
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000")
 EXPERIMENT_NAME = "what_to_eat_recommender"
@@ -14,26 +18,85 @@ DATA_PATH = "/home/adilababayeva/codes/what-to-eat/data.csv"
 
 FEATURES = ["Calories", "Proteins", "Carbs", "Fats"]
 
+# Optional approximate index for large catalogs. ANN_LISTS=0 means sqrt(n_meals)
+# cells; ANN_PROBES (read at load time) trades recall for latency.
+BUILD_ANN_INDEX = os.getenv("BUILD_ANN_INDEX", "0") == "1"
+ANN_LISTS = int(os.getenv("ANN_LISTS", "0"))
+
 class MealRecommender(mlflow.pyfunc.PythonModel):
     def load_context(self, context):
         self.scaler = joblib.load(context.artifacts["scaler"])
-        self.df = pd.read_csv(context.artifacts["meals"])
+        if "catalog" in context.artifacts:
+            # memory-mapped vectors + pruned metadata: no CSV parse
+            self.catalog = load_catalog(context.artifacts["catalog"])
+            self.index = self.catalog.index
+        else:
+            # models logged before the compact catalog
+            self.catalog = None
+            self.df = pd.read_csv(context.artifacts["meals"])
+            # scaled + normalized once; each query is a single matrix-vector product
+            self.index = MealIndex.from_scaler(
+                self.df["meal_name"], self.df[FEATURES].to_numpy(), self.scaler
+            )
+        if "ann_index" in context.artifacts:
+            self.index.ann = IVFIndex.load(context.artifacts["ann_index"])
+            self.index.n_probe = int(os.getenv("ANN_PROBES", "8"))
 
     def predict(self, context, model_input):
-        meal_name = model_input["meal_name"].iloc[0]
-        top_n = int(model_input.get("top_n", [5])[0])
-
-        if meal_name not in self.df["meal_name"].values:
-            return {"error": "Meal not found"}
-
-        X_scaled = self.scaler.transform(self.df[FEATURES])
-        sim = cosine_similarity(X_scaled)
-
-        idx = self.df.index[self.df["meal_name"] == meal_name][0]
-        scores = sorted(enumerate(sim[idx]), key=lambda x: x[1], reverse=True)
-
-        rec_idx = [i[0] for i in scores[1: top_n + 1]]
-        return self.df.iloc[rec_idx].to_dict(orient="records")
+        # One row per query; several rows are answered in one batched pass
+        names = model_input["meal_name"].tolist()
+        if "top_n" in model_input:
+            top_ns = [int(n) for n in model_input["top_n"]]
+        else:
+            top_ns = [5] * len(names)
+
+        bounds = self._bounds(model_input)
+        if any(bounds):
+            # nutrition filters ("min_Calories", "max_Proteins", ...): per row,
+            # similarity restricted to the range index candidates
+            hits = [
+                self.index.similar([name], n, candidates=self._filter(b) if b else None)[0]
+                for name, n, b in zip(names, top_ns, bounds)
+            ]
+        else:
+            hits = self.index.similar(names, max(top_ns))
+        results = [
+            {"error": "Meal not found"} if hit is None
+            else self._records(hit[0][:n])
+            for hit, n in zip(hits, top_ns)
+        ]
+        return results[0] if len(results) == 1 else results
+
+    def _bounds(self, model_input) -> list:
+        out = []
+        for _, row in model_input.iterrows():
+            b = {}
+            for f in FEATURES:
+                lo, hi = row.get(f"min_{f}"), row.get(f"max_{f}")
+                lo = None if lo is None or pd.isna(lo) else float(lo)
+                hi = None if hi is None or pd.isna(hi) else float(hi)
+                if lo is not None or hi is not None:
+                    b[f] = (lo, hi)
+            out.append(b)
+        return out
+
+    def _filter(self, bounds: dict):
+        if self.catalog is not None:
+            return self.catalog.filter(bounds)
+        # legacy CSV models: plain mask over the frame
+        mask = pd.Series(True, index=range(len(self.df)))
+        for f, (lo, hi) in bounds.items():
+            v = self.df[f].reset_index(drop=True)
+            if lo is not None:
+                mask &= v >= lo
+            if hi is not None:
+                mask &= v <= hi
+        return np.flatnonzero(mask.to_numpy())
+
+    def _records(self, rows):
+        if self.catalog is not None:
+            return self.catalog.records(rows)
+        return self.df.iloc[rows].to_dict(orient="records")
 
 def main():
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
@@ -56,20 +119,34 @@ def main():
 
     os.makedirs("artifacts", exist_ok=True)
     joblib.dump(scaler, "artifacts/scaler.pkl")
-    df.to_csv("artifacts/meals.csv", index=False)
+    # Only the similarity features and client-facing columns are shipped
+    save_catalog(df, scaler, "artifacts/meal_catalog")
+
+    artifacts = {
+        "scaler": "artifacts/scaler.pkl",
+        "catalog": "artifacts/meal_catalog",
+    }
+
+    ann = None
+    if BUILD_ANN_INDEX:
+        index = load_catalog("artifacts/meal_catalog").index
+        ann = IVFIndex.build(index.unit, n_lists=ANN_LISTS)
+        ann.save("artifacts/ann_index.npz")
+        artifacts["ann_index"] = "artifacts/ann_index.npz"
+
+    here = os.path.dirname(os.path.abspath(__file__))
 
     with mlflow.start_run():
         mlflow.log_param("type", "content_based_cosine")
         mlflow.log_param("features", FEATURES)
+        mlflow.log_param("ann_lists", ann.n_lists if ann else 0)
         mlflow.log_metric("n_meals", len(df))
 
         mlflow.pyfunc.log_model(
             artifact_path="model",
             python_model=MealRecommender(),
-            artifacts={
-                "scaler": "artifacts/scaler.pkl",
-                "meals": "artifacts/meals.csv",
-            },
+            artifacts=artifacts,
+            code_paths=[os.path.join(here, f) for f in ("meal_index.py", "ann_index.py", "range_index.py", "meal_catalog.py")],
             registered_model_name=MODEL_NAME,
         )
 
@@ -1,15 +1,18 @@
 import os
+import tempfile
 import pandas as pd
 import mlflow
 import mlflow.sklearn
 
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.metrics import accuracy_score, f1_score
 from sklearn.linear_model import LogisticRegression
 
+from export_compact import export_compact, ARTIFACT_PATH as COMPACT_ARTIFACT_PATH
+from export_baseline import export_baseline, train_split, TRAIN_SPLIT, ARTIFACT_PATH as BASELINE_ARTIFACT_PATH, FREQUENCIES_FILE
+
 BASE_DATA = "data/synth_meals.csv"
 FEEDBACK_DATA = "data/feedback_rows.csv"
 
@@ -51,12 +54,7 @@ def main():
     clf = LogisticRegression(max_iter=3000)
     pipe = Pipeline([("pre", pre), ("clf", clf)])
 
-    X_train, X_test, y_train, y_test, w_train, w_test = train_test_split(
-        X, y, sample_weight,
-        test_size=0.2,
-        random_state=42,
-        stratify=y
-    )
+    X_train, X_test, y_train, y_test, w_train, w_test = train_split(X, y, sample_weight, stratify=y)
 
     with mlflow.start_run():
         pipe.fit(X_train, y_train, clf__sample_weight=w_train)
@@ -81,6 +79,20 @@ def main():
             registered_model_name=MODEL_NAME,
         )
 
+        # Compact NumPy-only export for sklearn-free serving
+        with tempfile.TemporaryDirectory() as td:
+            compact_dir = export_compact(pipe, os.path.join(td, COMPACT_ARTIFACT_PATH))
+            mlflow.log_artifacts(compact_dir, artifact_path=COMPACT_ARTIFACT_PATH)
+
+            # Training-set category and predicted-label counts: /monitoring/drift's baseline for this run
+            baseline_dir = export_baseline(
+                X_train, os.path.join(td, BASELINE_ARTIFACT_PATH), predictions=pipe.predict(X_train),
+                data=f"{TRAIN_SPLIT} of {BASE_DATA}" + (f" + {FEEDBACK_DATA}" if len(data) > len(base) else ""),
+            )
+            mlflow.log_artifacts(baseline_dir, artifact_path=BASELINE_ARTIFACT_PATH)
+        mlflow.set_tag("compact_artifact", COMPACT_ARTIFACT_PATH)
+        mlflow.set_tag("baseline_artifact", f"{BASELINE_ARTIFACT_PATH}/{FREQUENCIES_FILE}")
+
         print("Retrained model logged")
 
 if __name__ == "__main__":